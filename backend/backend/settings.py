@@ -122,12 +122,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication', # Role checks from token claims, see users.authentication
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Sliding-window limits by throttle_scope (see core.throttling); periods may carry a multiple, e.g. 10/15m
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '30/m', # Attempts per IP
+        'login_failures': '10/15m', # Failed attempts per IP and per account
+        'register': '20/h', # Per IP
+        'match': '120/m', # Per IP
+        'match_account': '60/m', # Per user
+    },
 }
 
 # Simple JWT settings
@@ -136,7 +144,11 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': True, # Generates a new refresh token when one is used
     'BLACKLIST_AFTER_ROTATION': True, # Blacklists old refresh token
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is written in bulk by users.last_login instead of one save per login
+    'UPDATE_LAST_LOGIN': False,
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.LoginSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'users.serializers.LogoutSerializer',
 }
 
 # CORS settings
@@ -194,6 +206,9 @@ HEALTH_CHECK = {
 # For multiple fields, you might use multiple keys.
 CRYPTOGRAPHY_KEY = os.getenv('DJANGO_CRYPTOGRAPHY_KEY', 'a-very-secret-and-long-random-key-for-encryption')
 FIELD_ENCRYPTION_KEYS = [CRYPTOGRAPHY_KEY]
+# HMAC key of the *_bidx blind-index columns (core.blind_index). Falls back to
+# SECRET_KEY; changing it requires `manage.py backfill_blind_indexes --all`.
+BLIND_INDEX_KEY = os.getenv('BLIND_INDEX_KEY')
 
 
 # Caching (Redis)
@@ -217,10 +232,49 @@ if os.getenv('USE_REDIS_CACHE', 'False') == 'True':
         }
     }
 
+# Audit rows are buffered in-process and written in bulk once this many are
+# pending or the oldest is MAX_AGE seconds old (see core.audit). 1 disables buffering.
+AUDIT_LOG_BUFFER_SIZE = 100
+AUDIT_LOG_BUFFER_MAX_AGE = 5.0
+# Months of audit log kept in the database; older months are moved to gzip
+# JSONL files in AUDIT_LOG_ARCHIVE_DIR by `manage.py archive_audit_log`.
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv('AUDIT_LOG_RETENTION_MONTHS', 12))
+AUDIT_LOG_ARCHIVE_DIR = os.getenv('AUDIT_LOG_ARCHIVE_DIR', BASE_DIR / 'audit_archive')
+
+# Logins record last_login in-process; it is written in bulk once this many users
+# are pending or the oldest is MAX_AGE seconds old (see users.last_login). 1 disables buffering.
+LAST_LOGIN_BUFFER_SIZE = 200
+LAST_LOGIN_BUFFER_MAX_AGE = 30.0
+# Users loaded by JWT authentication are kept per process for this many seconds
+# (saves evict them at once in the saving process).
+AUTH_USER_CACHE_TIMEOUT = 30
+AUTH_USER_CACHE_SIZE = 1000
+# Trust the role/is_active/is_staff claims of access tokens without loading the
+# user (users.authentication). None trusts them only when the default cache is
+# shared by all workers, since claim revocations are stored there.
+AUTH_TRUST_TOKEN_CLAIMS = None
+# Cache alias holding blacklisted refresh token ids (see users.tokens). Must be
+# shared by all workers (Redis) for rotation to be enforced across processes.
+TOKEN_BLACKLIST_CACHE = 'default'
+# Processes hashing passwords during bulk onboarding (users.onboarding); None is one per CPU.
+ONBOARDING_HASH_WORKERS = int(os.getenv('ONBOARDING_HASH_WORKERS', 0)) or None
+
+# Matching: per-feature weight overrides for the ranked (ML) match endpoint.
+# See matching.scoring.DEFAULT_WEIGHTS for the keys.
+MATCHING_SCORE_WEIGHTS = {}
+# Seconds a match response stays cached; provider writes evict affected entries sooner.
+MATCH_CACHE_TIMEOUT = 60 * 15
+# Minimum seconds between two saved-search alert emails to the same seeker.
+MATCH_ALERT_MIN_INTERVAL = 60 * 60
+
 # Stripe settings
 # STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
 # STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY')
-# STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET')
+STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET')
+# Webhook events are stored on receipt and applied by `manage.py process_webhook_events`;
+# a failing event is retried after RETRY_BASE_DELAY * 2**attempts seconds, up to MAX_ATTEMPTS.
+WEBHOOK_MAX_ATTEMPTS = 8
+WEBHOOK_RETRY_BASE_DELAY = 5
 # STRIPE_REPORT_PRICE_ID = os.getenv('STRIPE_REPORT_PRICE_ID', 'price_...')
 # STRIPE_SEEKER_SUB_PRICE_ID = os.getenv('STRIPE_SEEKER_SUB_PRICE_ID', 'price_...')
 # STRIPE_PROVIDER_SUB_TIER1_PRICE_ID = os.getenv('STRIPE_PROVIDER_SUB_TIER1_PRICE_ID', 'price_...')
@@ -256,5 +310,8 @@ SPECTACULAR_SETTINGS = {
 
 # Site URL (for constructing full URLs in emails, Stripe redirects, etc.)
 SITE_URL = os.getenv('SITE_URL', 'http://localhost:3000')
+# Frontend page linked from onboarding invites, relative to SITE_URL. It reads uid and
+# token from the path and POSTs them with the new password to /api/v1/auth/password/set/.
+PASSWORD_INVITE_PATH = os.getenv('PASSWORD_INVITE_PATH', '/set-password/{uid}/{token}')
 
 FIELD_ENCRYPTION_KEY = "1Trp+dXbqoe3jXNN9ZAqWXHdZrfxinnHO6oL6AQDuOI="
\ No newline at end of file
@@ -1,12 +1,87 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
 from .models import AuditLog
 
+
+class UserInputFilter(admin.SimpleListFilter):
+    """Free-text user filter (id or email) instead of a sidebar link per user."""
+    title = "user"
+    parameter_name = 'user'
+    placeholder = "User id or email"
+    template = 'admin/core/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        # A single pseudo-choice carrying what the template's form needs
+        yield {
+            'selected': self.value() is not None,
+            'value': self.value() or '',
+            'hidden_params': [
+                (name, value) for name, value in changelist.params.items()
+                if name not in (self.parameter_name, PAGE_VAR)
+            ],
+            'clear_query_string': changelist.get_query_string(remove=[self.parameter_name]),
+        }
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(user_id=int(value))
+        return queryset.filter(user__email__iexact=value)
+
+
+class AuditLogChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        resolve_targets(self.result_list)
+
+
+def resolve_targets(entries):
+    """
+    Attach each entry's target instance as ``_target`` (None if it no longer
+    exists), with one ``in_bulk`` query per content type on the page. Forward
+    relations are joined since most targets' ``__str__`` reads their user.
+    """
+    by_type = {}
+    for entry in entries:
+        entry._target = None
+        if entry.target_content_type_id and entry.target_object_id:
+            by_type.setdefault(entry.target_content_type, []).append(entry)
+    for content_type, group in by_type.items():
+        model = content_type.model_class()
+        if model is None:
+            continue
+        pk_field = model._meta.pk
+        keys = {}
+        for entry in group:
+            try:
+                keys[entry] = pk_field.to_python(entry.target_object_id)
+            except Exception:
+                keys[entry] = None
+        relations = [field.name for field in model._meta.concrete_fields if field.many_to_one or field.one_to_one]
+        targets = model._default_manager.select_related(*relations).in_bulk({key for key in keys.values() if key is not None})
+        for entry, key in keys.items():
+            entry._target = targets.get(key)
+
+
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ('timestamp', 'user_display', 'action', 'ip_address', 'target_object_display')
-    list_filter = ('timestamp', 'user', 'action') # Add target_content_type if useful
+    list_filter = ('timestamp', UserInputFilter, 'action') # Add target_content_type if useful
+    list_select_related = ('user', 'target_content_type')
+    show_full_result_count = False # Skip the second COUNT(*) over the whole table
     search_fields = ('user__email', 'action', 'details', 'ip_address')
-    readonly_fields = ('timestamp', 'user', 'action', 'ip_address', 'details', 'target_content_type', 'target_object_id') # Make all readonly
+    readonly_fields = ('timestamp', 'user', 'action', 'ip_address', 'user_agent', 'details', 'target_content_type', 'target_object_id') # Make all readonly
+
+    def get_changelist(self, request, **kwargs):
+        return AuditLogChangeList
 
     def user_display(self, obj):
         return obj.user.email if obj.user else "System"
@@ -14,11 +89,10 @@ class AuditLogAdmin(admin.ModelAdmin):
 
     def target_object_display(self, obj):
         if obj.target_content_type and obj.target_object_id:
-            try:
-                target_model = obj.target_content_type.model_class()
-                target_instance = target_model.objects.get(pk=obj.target_object_id)
-                return f"{obj.target_content_type.model.capitalize()}: {str(target_instance)[:50]}"
-            except Exception:
-                return f"{obj.target_content_type.model.capitalize()} ID: {obj.target_object_id} (Instance not found or error)"
+            if not hasattr(obj, '_target'):
+                resolve_targets([obj])
+            if obj._target is not None:
+                return f"{obj.target_content_type.model.capitalize()}: {str(obj._target)[:50]}"
+            return f"{obj.target_content_type.model.capitalize()} ID: {obj.target_object_id} (Instance not found or error)"
         return "-"
-    target_object_display.short_description = "Target Object"
\ No newline at end of file
+    target_object_display.short_description = "Target Object"
@@ -1,8 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core' 
 
     def ready(self):
-        import core.auditing_receivers 
+        import core.auditing_receivers
+        from core.partitions import create_upcoming_partitions
+        post_migrate.connect(create_upcoming_partitions, sender=self) 
@@ -0,0 +1,110 @@
+import atexit
+import logging
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, transaction
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink:
+    """
+    Buffers unsaved AuditLog rows in-process and writes them with one
+    ``bulk_create`` per model once the buffer holds
+    ``AUDIT_LOG_BUFFER_SIZE`` rows or its oldest row is older than
+    ``AUDIT_LOG_BUFFER_MAX_AGE`` seconds. The age is checked on every record
+    and after every request, and the buffer is flushed at interpreter exit.
+
+    Rows join the buffer only when the surrounding transaction commits, so a
+    rolled-back request leaves no audit trail, same as a direct INSERT.
+    ``record(entry, sync=True)`` saves immediately, inside the caller's
+    transaction, for events that must never be lost (payments).
+    """
+
+    def __init__(self, max_size=None, max_age=None):
+        self._max_size = max_size
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+
+    @property
+    def max_size(self):
+        if self._max_size is None:
+            return getattr(settings, 'AUDIT_LOG_BUFFER_SIZE', 100)
+        return self._max_size
+
+    @property
+    def max_age(self):
+        if self._max_age is None:
+            return getattr(settings, 'AUDIT_LOG_BUFFER_MAX_AGE', 5.0)
+        return self._max_age
+
+    def record(self, entry, sync=False):
+        if sync or self.max_size <= 1:
+            entry.save()
+            return
+        transaction.on_commit(partial(self._append, entry))
+
+    def _append(self, entry):
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(entry)
+            due = len(self._pending) >= self.max_size
+        if due or self.is_stale():
+            self.flush()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def is_stale(self):
+        oldest = self._oldest
+        return bool(self._pending) and oldest is not None and time.monotonic() - oldest >= self.max_age
+
+    def flush(self):
+        """Write every buffered row now; returns the number written."""
+        with self._lock:
+            entries, self._pending, self._oldest = self._pending, [], None
+        if not entries:
+            return 0
+        by_model = {}
+        for entry in entries:
+            by_model.setdefault(type(entry), []).append(entry)
+        written = 0
+        for model, rows in by_model.items():
+            try:
+                model.objects.bulk_create(rows)
+                written += len(rows)
+            except DatabaseError:
+                # One bad row must not take the batch with it
+                logger.exception("Bulk audit write of %d %s rows failed; retrying one by one", len(rows), model.__name__)
+                written += self._save_each(rows)
+        return written
+
+    @staticmethod
+    def _save_each(rows):
+        written = 0
+        for row in rows:
+            try:
+                row.save()
+                written += 1
+            except DatabaseError:
+                logger.exception("Dropping audit row %r", row)
+        return written
+
+
+audit_sink = AuditSink()
+atexit.register(audit_sink.flush)
+
+
+@receiver(request_finished)
+def flush_stale_audit_rows(sender, **kwargs):
+    if audit_sink.is_stale():
+        audit_sink.flush()
@@ -0,0 +1,88 @@
+"""
+Blind indexes for encrypted columns.
+
+Encrypted fields use a random IV, so the same plaintext never produces the
+same ciphertext and the database cannot compare, index or constrain them.
+A blind index is a keyed HMAC of the plaintext kept in a plain column next
+to it: equal values give equal digests, so exact-match lookups and unique
+constraints work on the digest without revealing the value.
+
+A model lists its pairs in ``BLIND_INDEXES = {'<encrypted field>':
+'<digest column>'}``, puts BlindIndexMixin in its bases and uses
+BlindIndexQuerySet as its manager. Rows written around ``save()`` (bulk
+operations, data migrations) are filled in by ``manage.py
+backfill_blind_indexes``.
+"""
+from django.conf import settings
+from django.db import models
+from django.utils.crypto import salted_hmac
+
+from .fields import Ciphertext, EncryptedQuerySet
+
+DIGEST_LENGTH = 64  # hex SHA-256
+
+
+def blind_index(value):
+    """Digest of ``value`` for a blind-index column; None for empty values."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    return salted_hmac(
+        'core.blind_index', value, secret=getattr(settings, 'BLIND_INDEX_KEY', None) or None, algorithm='sha256',
+    ).hexdigest()
+
+
+def blind_index_field(**kwargs):
+    return models.CharField(max_length=DIGEST_LENGTH, null=True, blank=True, editable=False, **kwargs)
+
+
+class BlindIndexQuerySet(EncryptedQuerySet):
+    def _digests(self, lookups):
+        indexes = self.model.BLIND_INDEXES
+        unknown = set(lookups) - set(indexes)
+        if unknown:
+            raise ValueError(f"{self.model.__name__} has no blind index for {', '.join(sorted(unknown))}")
+        return {indexes[name]: blind_index(value) for name, value in lookups.items()}
+
+    def blind_filter(self, **lookups):
+        """Exact-match filter on encrypted fields, e.g. ``blind_filter(stripe_charge_id='ch_1')``."""
+        return self.filter(**self._digests(lookups))
+
+    def blind_get(self, **lookups):
+        return self.get(**self._digests(lookups))
+
+    def blind_exists(self, **lookups):
+        """Whether a row already holds these values, e.g. to dedupe before creating one."""
+        return self.blind_filter(**lookups).exists()
+
+
+class BlindIndexMixin:
+    """Recomputes each blind-index column from its encrypted field on ``save()``."""
+    BLIND_INDEXES = {}
+
+    def fill_blind_indexes(self, force=False):
+        """
+        Set every digest column from its field; returns the attnames that
+        changed. Fields never read since loading are skipped unless ``force``.
+        """
+        changed = []
+        deferred = self.get_deferred_fields()
+        for field, column in self.BLIND_INDEXES.items():
+            if field in deferred:
+                continue
+            if not force and isinstance(self.__dict__.get(field), Ciphertext) and getattr(self, column) is not None:
+                continue # Never read, so unchanged since it was loaded; no need to decrypt it
+            digest = blind_index(getattr(self, field))
+            if getattr(self, column) != digest:
+                setattr(self, column, digest)
+                changed.append(column)
+        return changed
+
+    def save(self, *args, **kwargs):
+        changed = self.fill_blind_indexes()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and changed:
+            kwargs['update_fields'] = {*update_fields, *changed}
+        super().save(*args, **kwargs)
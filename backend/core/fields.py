@@ -0,0 +1,118 @@
+"""
+Encrypted model fields that decrypt on first access instead of on load.
+
+Drop-in replacements for the ``encrypted_model_fields`` classes with the same
+column format. A loaded value stays a Ciphertext in the instance ``__dict__``
+until the attribute is read; the plaintext is then memoized on the instance.
+Rows that are listed, audited or passed through signal handlers without
+reading the field never pay for Fernet decryption, and saving a value that
+was never read writes the ciphertext back unchanged.
+
+Outside model instances (``values()``, ``values_list()``) a Ciphertext acts
+as a lazy string: ``str()``, JSON encoders and comparisons decrypt it.
+``EncryptedQuerySet.without_encrypted()`` skips the columns altogether.
+"""
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+from django.utils.functional import Promise
+from encrypted_model_fields import fields as encrypted_fields
+
+
+class Ciphertext(Promise):
+    """A stored token and the field that can decrypt it; the plaintext is computed once."""
+
+    def __init__(self, token, field):
+        self.token = token
+        self.field = field
+        self._decrypted = False
+
+    @property
+    def value(self):
+        if not self._decrypted:
+            self._value = encrypted_fields.EncryptedMixin.to_python(self.field, self.token)
+            self._decrypted = True
+        return self._value
+
+    def __str__(self):
+        return str(self.value)
+
+    def __repr__(self):
+        return f'<Ciphertext {self.field.model.__name__}.{self.field.name}>'
+
+    def __eq__(self, other):
+        if isinstance(other, Ciphertext):
+            return self.token == other.token or self.value == other.value
+        return self.value == other
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.value, name) # str methods, like a lazy string
+
+    def __reduce__(self):
+        return str, (str(self.value),) # Pickles (cache, sessions) as the plaintext
+
+
+class DecryptOnAccess(DeferredAttribute):
+    """Data descriptor so every read passes through here, even once the value is in ``__dict__``."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, Ciphertext):
+            value = instance.__dict__[self.field.attname] = value.value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class LazyEncryptedMixin(encrypted_fields.EncryptedMixin):
+    descriptor_class = DecryptOnAccess
+
+    def from_db_value(self, value, *args, **kwargs):
+        return None if value is None else Ciphertext(value, self)
+
+    def pre_save(self, model_instance, add):
+        # The raw value, so an unread Ciphertext is not decrypted just to be re-encrypted
+        return model_instance.__dict__.get(self.attname)
+
+    def get_db_prep_save(self, value, connection):
+        if isinstance(value, Ciphertext):
+            return value.token
+        return super().get_db_prep_save(value, connection)
+
+    def to_python(self, value):
+        if isinstance(value, Ciphertext):
+            return value.value
+        return super().to_python(value)
+
+    def deconstruct(self):
+        # Same column and behaviour at the database level: migrations keep the library path
+        name, path, args, kwargs = super().deconstruct()
+        return name, f'encrypted_model_fields.fields.{type(self).__name__}', args, kwargs
+
+
+class EncryptedCharField(LazyEncryptedMixin, encrypted_fields.EncryptedCharField):
+    pass
+
+
+class EncryptedTextField(LazyEncryptedMixin, encrypted_fields.EncryptedTextField):
+    pass
+
+
+class EncryptedEmailField(LazyEncryptedMixin, encrypted_fields.EncryptedEmailField):
+    pass
+
+
+class EncryptedQuerySet(models.QuerySet):
+    def without_encrypted(self):
+        """Defer every encrypted column, for listings that never show them."""
+        return self.defer(*(
+            field.name for field in self.model._meta.concrete_fields
+            if isinstance(field, encrypted_fields.EncryptedMixin)
+        ))
@@ -0,0 +1,86 @@
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core import partitions
+from core.utils.json import PreciseJSONEncoder
+
+
+class Command(BaseCommand):
+    help = (
+        "Move audit log months older than the retention period out of the "
+        "database into gzip-compressed JSONL files (one per month), and "
+        "create upcoming monthly partitions on PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-months', type=int, default=None,
+                            help="Months kept in the database (default: AUDIT_LOG_RETENTION_MONTHS)")
+        parser.add_argument('--archive-dir', default=None, help="Default: AUDIT_LOG_ARCHIVE_DIR")
+        parser.add_argument('--months-ahead', type=int, default=partitions.MONTHS_AHEAD, help="Partitions to create in advance (PostgreSQL)")
+        parser.add_argument('--dry-run', action='store_true', help="List the months that would be archived")
+
+    def handle(self, *args, **options):
+        retention = options['retention_months'] or getattr(settings, 'AUDIT_LOG_RETENTION_MONTHS', 12)
+        archive_dir = Path(options['archive_dir'] or getattr(settings, 'AUDIT_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'audit_archive'))
+        cutoff = partitions.add_months(partitions.month_start(timezone.now()), -retention)
+
+        # Months detached by an interrupted run come first
+        pending = partitions.detached_months()
+        expired = [month for month in partitions.expired_months(cutoff) if month not in pending]
+        if options['dry_run']:
+            for month in pending + expired:
+                self.stdout.write(f"{month:%Y-%m} -> {archive_dir / self.archive_name(month)}")
+            return
+
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        total = 0
+        for month in expired:
+            with transaction.atomic():
+                partitions.detach(month)
+        for month in pending + expired:
+            rows = self.archive(partitions.partition_name(month), archive_dir / self.archive_name(month))
+            total += rows
+            self.stdout.write(f"Archived {rows} rows for {month:%Y-%m}")
+
+        created = partitions.ensure_partitions(partitions.month_start(timezone.now()), months_ahead=options['months_ahead'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {total} audit rows from {len(pending) + len(expired)} months in {elapsed:.1f}s"
+            + (f"; created {len(created)} partitions" if created else "")
+        ))
+
+    @staticmethod
+    def archive_name(month):
+        return f"{partitions.partition_name(month)}.jsonl.gz"
+
+    @staticmethod
+    def archive(table, path):
+        """Dump ``table`` to ``path`` and drop it once the file is safely on disk."""
+        partial = path.with_name(path.name + '.partial')
+        rows = 0
+        with gzip.open(partial, 'wt', encoding='utf-8') as archive:
+            for row in partitions.iter_rows(table):
+                archive.write(json.dumps(row, cls=PreciseJSONEncoder, separators=(',', ':')) + '\n')
+                rows += 1
+        if path.exists():
+            # Late rows for an already archived month: keep both as gzip members of one file
+            with open(path, 'ab') as existing, open(partial, 'rb') as extra:
+                existing.write(extra.read())
+                existing.flush()
+                os.fsync(existing.fileno())
+            partial.unlink()
+        else:
+            with open(partial, 'rb') as written:
+                os.fsync(written.fileno())
+            os.replace(partial, path)
+        partitions.drop(table)
+        return rows
@@ -0,0 +1,61 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from core.blind_index import BlindIndexMixin
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill blind-index (*_bidx) columns for rows written without save(), "
+        "e.g. before the columns existed. With --all every digest is "
+        "recomputed, which is needed after changing BLIND_INDEX_KEY."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Recompute every row, not only missing digests")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if issubclass(model, BlindIndexMixin) and model.BLIND_INDEXES:
+                updated, conflicts = self.backfill(model, options['all'], options['chunk_size'])
+                self.stdout.write(f"{model._meta.label}: {updated} rows updated")
+                for pk, error in conflicts:
+                    self.stderr.write(f"{model._meta.label} {pk}: {error}")
+
+    @staticmethod
+    def backfill(model, recompute, chunk_size):
+        indexes = model.BLIND_INDEXES
+        queryset = model._default_manager.order_by('pk').only(*indexes, *indexes.values())
+        if not recompute:
+            missing = Q()
+            for field, column in indexes.items():
+                missing |= Q(**{f'{column}__isnull': True, f'{field}__isnull': False})
+            queryset = queryset.filter(missing)
+
+        updated, conflicts, last_pk = 0, [], None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(page[:chunk_size])
+            if not rows:
+                return updated, conflicts
+            last_pk = rows[-1].pk
+            changed = [row for row in rows if row.fill_blind_indexes(force=True)]
+            try:
+                with transaction.atomic():
+                    # bulk_update skips save(), so no audit rows are written for a backfill
+                    model._default_manager.bulk_update(changed, list(indexes.values()))
+                updated += len(changed)
+            except IntegrityError:
+                # Duplicate plaintexts under a unique index: keep the first, report the rest
+                for row in changed:
+                    try:
+                        with transaction.atomic():
+                            model._default_manager.filter(pk=row.pk).update(
+                                **{column: getattr(row, column) for column in indexes.values()}
+                            )
+                        updated += 1
+                    except IntegrityError as exc:
+                        conflicts.append((row.pk, exc))
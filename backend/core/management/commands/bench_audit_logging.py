@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth.signals import user_logged_in
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.audit import audit_sink
+from core.models import AuditLog
+from profiles.views import MyProfileView
+from users.models import User, Role
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare login and profile-update latency with audit rows written "
+        "synchronously (AUDIT_LOG_BUFFER_SIZE=1) and through the buffered "
+        "audit sink. Uses a throwaway provider that is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        user = User.objects.create_user(username='bench-audit', email='bench-audit@example.invalid', role=Role.SEEKER)
+        try:
+            def login(i):
+                user_logged_in.send(sender=User, request=factory.post('/'), user=user)
+
+            def profile_update(i):
+                request = factory.patch('/', {'company_name': f'Bench {i}'}, format='json')
+                force_authenticate(request, user)
+                MyProfileView.as_view()(request)
+
+            for label, operation in (('login', login), ('profile update', profile_update)):
+                timings = {}
+                for mode, size in (('sync', 1), ('buffered', None)):
+                    with override_settings(**({'AUDIT_LOG_BUFFER_SIZE': size} if size else {})):
+                        timings[mode] = self._time(operation, iterations)
+                        audit_sink.flush()
+                saved = timings['sync'] - timings['buffered']
+                self.stdout.write(
+                    f"{label:<15} sync {timings['sync'] * 1e3:7.3f} ms  buffered {timings['buffered'] * 1e3:7.3f} ms  "
+                    f"saved {saved * 1e3:7.3f} ms/request ({saved / timings['sync']:.0%})"
+                )
+        finally:
+            audit_sink.flush()
+            AuditLog.objects.filter(user=user).delete()
+            user.delete()
+
+    @staticmethod
+    def _time(operation, iterations):
+        started = time.perf_counter()
+        for i in range(iterations):
+            operation(i)
+        return (time.perf_counter() - started) / iterations
@@ -0,0 +1,63 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import serializers
+
+from payments.models import PaymentRecord
+
+
+class ListedPaymentRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PaymentRecord
+        fields = ['id', 'amount', 'currency', 'status', 'description', 'created_at']
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the CPU time of listing PaymentRecords with a serializer that "
+        "shows no encrypted field: eager decryption on load (the previous "
+        "behaviour), decryption on access, and with encrypted columns deferred. "
+        "Runs on throwaway rows inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        encrypted = [field.attname for field in PaymentRecord._meta.concrete_fields if field.attname in ('stripe_charge_id', 'payment_method')]
+
+        def eager():
+            rows = list(PaymentRecord.objects.all())
+            for row in rows:
+                for name in encrypted:
+                    getattr(row, name) # What the library field did for every loaded row
+            return ListedPaymentRecordSerializer(rows, many=True).data
+
+        def lazy():
+            return ListedPaymentRecordSerializer(PaymentRecord.objects.all(), many=True).data
+
+        def deferred():
+            return ListedPaymentRecordSerializer(PaymentRecord.objects.without_encrypted(), many=True).data
+
+        with transaction.atomic():
+            PaymentRecord.objects.bulk_create([
+                PaymentRecord(stripe_charge_id=f'ch_bench_{uuid.uuid4().hex}', payment_method='card',
+                              amount=Decimal('100.00'), currency='PHP', status='succeeded')
+                for _ in range(options['rows'])
+            ], batch_size=1000)
+            baseline = None
+            for label, operation in (('eager decryption', eager), ('decrypt on access', lazy), ('without_encrypted()', deferred)):
+                cpu = min(self._cpu(operation) for _ in range(options['repeat']))
+                baseline = baseline or cpu
+                self.stdout.write(f"{label:<20} {cpu * 1e3:8.1f} ms CPU for {options['rows']} rows ({cpu / baseline:.0%})")
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _cpu(operation):
+        started = time.process_time()
+        operation()
+        return time.process_time() - started
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+PAYMENTS_VERBS = {'CREATE': 'created', 'UPDATE': 'updated', 'DELETE': 'deleted'}
+
+
+def copy_payments_audit_log(apps, schema_editor):
+    """Move payments.AuditLog rows into the unified store before that table is dropped."""
+    PaymentsAuditLog = apps.get_model('payments', 'AuditLog')
+    AuditLog = apps.get_model('core', 'AuditLog')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    content_types = {}
+    batch = []
+    for row in PaymentsAuditLog.objects.order_by('pk').iterator(chunk_size=2000):
+        if row.model_name not in content_types:
+            content_types[row.model_name] = ContentType.objects.filter(app_label='payments', model=row.model_name.lower()).first()
+        verb = PAYMENTS_VERBS.get(row.action, row.action.lower())
+        batch.append(AuditLog(
+            user_id=row.user_id,
+            action=f"{row.model_name} {verb}",
+            target_content_type=content_types[row.model_name],
+            target_object_id=row.object_id,
+            details=row.details,
+            ip_address=row.ip_address,
+            user_agent=row.user_agent,
+            timestamp=row.created_at,
+        ))
+        if len(batch) == 2000:
+            AuditLog.objects.bulk_create(batch)
+            batch = []
+    AuditLog.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_auditlog_timestamp_default'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('payments', '0003_sync_models_with_migrations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='user_agent',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='target_object_id',
+            field=models.CharField(blank=True, help_text='Primary key of the target object (if any)', max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp'], name='auditlog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['target_content_type', 'target_object_id'], name='auditlog_target_idx'),
+        ),
+        migrations.RunPython(copy_payments_audit_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+from datetime import timezone as dt_timezone
+
+from django.db import migrations
+from django.utils import timezone
+
+from core.partitions import TABLE, add_months, month_start, partition_name
+
+MONTHS_AHEAD = 3
+
+
+def partition_audit_log(apps, schema_editor):
+    """
+    Rebuild core_auditlog as a table partitioned by month on PostgreSQL. Other
+    backends keep the plain table; core.partitions detaches months into
+    shadow tables there instead.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [TABLE, f'{TABLE}_pkey'],
+        )
+        index_definitions = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT MIN("timestamp") FROM "{TABLE}"')
+        oldest = cursor.fetchone()[0] or timezone.now()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{TABLE}_unpartitioned"')
+        # The partition key has to be part of the primary key
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{TABLE}_unpartitioned" INCLUDING DEFAULTS INCLUDING IDENTITY, '
+            f'PRIMARY KEY ("id", "timestamp")) PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+        month = month_start(oldest.astimezone(dt_timezone.utc))
+        last = add_months(month_start(timezone.now()), MONTHS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE "{partition_name(month)}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [month.isoformat() + ' 00:00:00+00', add_months(month, 1).isoformat() + ' 00:00:00+00'],
+            )
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{TABLE}_unpartitioned"')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(\"id\"), 0) + 1, false) FROM \"{TABLE}\"",
+            [TABLE],
+        )
+        cursor.execute(f'DROP TABLE "{TABLE}_unpartitioned"')
+        # Same names as before, so later migrations still find them
+        for definition in index_definitions:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_unified_audit_store'),
+    ]
+
+    operations = [
+        # Converting back to a plain table is not supported
+        migrations.RunPython(partition_audit_log, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,89 @@
+import copy
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+
+class ChangeTrackingMixin:
+    """
+    Snapshots concrete field values when an instance is loaded, so callers can
+    ask what changed (``changed_fields``, ``previous_value``) without reading
+    the row again, and ``save()`` writes only the changed columns. Saving an
+    unchanged instance is a no-op. Put it before ``models.Model`` in the bases.
+    """
+    _loaded_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: _snapshot_value(value)
+            for name, value in zip(field_names, values)
+            if name in instance.__dict__
+        }
+        return instance
+
+    def _current_values(self, attnames=None):
+        if attnames is None:
+            attnames = [field.attname for field in self._meta.concrete_fields]
+        return {name: _snapshot_value(self.__dict__[name]) for name in attnames if name in self.__dict__}
+
+    @property
+    def is_tracked(self):
+        """False for unsaved instances and ones built by hand rather than loaded."""
+        return self._loaded_values is not None and not self._state.adding
+
+    @property
+    def changed_fields(self):
+        """Attnames whose value differs from what was loaded (every set field if untracked)."""
+        current = self._current_values()
+        if not self.is_tracked:
+            return set(current)
+        return {
+            name for name, value in current.items()
+            if name not in self._loaded_values or self._loaded_values[name] != value
+        }
+
+    def previous_value(self, name):
+        """The value ``name`` had when loaded, or None when the instance is untracked."""
+        if not self.is_tracked:
+            return None
+        return self._loaded_values.get(self._meta.get_field(name).attname)
+
+    def save(self, *args, **kwargs):
+        if self.is_tracked and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            changed = self.changed_fields
+            if not changed:
+                return
+            if self._meta.pk.attname not in changed: # A new pk means a new row; save it in full
+                auto_now = {field.attname for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)}
+                kwargs['update_fields'] = changed | auto_now
+        super().save(*args, **kwargs)
+        saved = kwargs.get('update_fields')
+        self._loaded_values = {
+            **(self._loaded_values if saved is not None and self._loaded_values else {}),
+            **self._current_values(None if saved is None else [self._meta.get_field(name).attname for name in saved]),
+        }
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        attnames = None if fields is None else [self._meta.get_field(name).attname for name in fields]
+        self._loaded_values = {**(self._loaded_values or {}), **self._current_values(attnames)}
+
+
+def _snapshot_value(value):
+    # JSON values are mutated in place; keep an independent copy to compare against
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
 class AuditLog(models.Model):
+    """
+    The single, append-only audit store. Partitioned by month on ``timestamp``
+    (see core.partitions); expired months are moved to compressed archives by
+    ``manage.py archive_audit_log``.
+    """
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     action = models.CharField(max_length=255, help_text="Description of the action performed")
     target_content_type = models.ForeignKey(
@@ -11,17 +92,32 @@ class AuditLog(models.Model):
         null=True, blank=True,
         help_text="Content type of the target object (if any)"
     )
-    target_object_id = models.PositiveIntegerField(null=True, blank=True, help_text="Primary key of the target object (if any)")
+    # Text so integer and UUID primary keys both fit
+    target_object_id = models.CharField(max_length=64, null=True, blank=True, help_text="Primary key of the target object (if any)")
   
     details = models.JSONField(default=dict, blank=True, help_text="Additional details about the event, e.g., changed fields")
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    user_agent = models.TextField(null=True, blank=True)
+    # Set when the event happens, not when a buffered row is flushed (see core.audit)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         user_email = self.user.email if self.user else "System"
         return f"{self.timestamp.strftime('%Y-%m-%d %H:%M:%S')} - {user_email} - {self.action}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Audit log entries are append-only.")
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-timestamp']
         verbose_name = _("Audit Log Entry")
-        verbose_name_plural = _("Audit Log Entries")
\ No newline at end of file
+        verbose_name_plural = _("Audit Log Entries")
+        # One per filter of the audit log API, each ending in the pagination order
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='auditlog_timestamp_idx'),
+            models.Index(fields=['user', '-timestamp', '-id'], name='auditlog_user_time_idx'),
+            models.Index(fields=['action', '-timestamp', '-id'], name='auditlog_action_time_idx'),
+            models.Index(fields=['target_content_type', 'target_object_id', '-timestamp', '-id'], name='auditlog_target_time_idx'),
+        ]
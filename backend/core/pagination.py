@@ -0,0 +1,139 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .utils.json import PreciseJSONEncoder
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the full ``ordering`` tuple instead of
+    using OFFSET, so page N costs the same as page 1 given a matching
+    composite index. The last ordering field must be unique (usually ``-id``).
+
+    Cursors are opaque base64 tokens holding the last row's ordering values.
+    ``paginate_queryset`` also accepts a pre-sorted list of ordering tuples,
+    for views that filter in memory and hydrate rows afterwards; set ``model``
+    so cursor values can be parsed back to field types in that case.
+    """
+    model = None
+    ordering = ('-id',)
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        model = getattr(queryset, 'model', None) or self.model or view.get_queryset().model
+        position = self.decode_cursor(request, model)
+
+        if isinstance(queryset, (list, tuple)):
+            start = self._seek(queryset, position) if position is not None else 0
+            rows = list(queryset[start:start + self.page_size + 1])
+        else:
+            if position is not None:
+                queryset = queryset.filter(self.after_position_q(position))
+            rows = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.position_of(rows[-1]) if self.has_next else None
+        return rows
+
+    def position_of(self, row):
+        if isinstance(row, (list, tuple)):
+            return list(row)
+        if isinstance(row, dict):
+            return [row[name] for name, _ in self.fields]
+        return [getattr(row, name) for name, _ in self.fields]
+
+    def after_position_q(self, position):
+        """Rows strictly after ``position`` in ``ordering``, as (a < x) OR (a = x AND b < y) ..."""
+        condition = Q()
+        for i, (name, descending) in enumerate(self.fields):
+            step = Q(**{f'{name}__{"lt" if descending else "gt"}': position[i]})
+            for (prior_name, _), prior_value in zip(self.fields[:i], position):
+                step &= Q(**{prior_name: prior_value})
+            condition |= step
+        return condition
+
+    def _is_after(self, key, position):
+        for (_, descending), value, bound in zip(self.fields, key, position):
+            if value != bound:
+                return value < bound if descending else value > bound
+        return False
+
+    def _seek(self, keys, position):
+        low, high = 0, len(keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self._is_after(keys[middle], position):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def encode_cursor(self, position):
+        # A timestamp cut to the millisecond would skip the rows sharing that millisecond
+        raw = json.dumps(position, cls=PreciseJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [
+                self._model_field(model, name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _model_field(model, name):
+        return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
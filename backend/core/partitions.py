@@ -0,0 +1,184 @@
+"""
+Monthly partitions of the audit log table.
+
+On PostgreSQL ``core_auditlog`` is a native ``PARTITION BY RANGE (timestamp)``
+table with one partition per month plus a default partition. On SQLite, which
+has no partitioning, every row lives in ``core_auditlog`` and a month is
+"detached" by moving its rows into a shadow table with the same name a native
+partition would have. Either way, archiving a month is: detach it into its
+own table, dump that table, drop it. A detached table left behind by an
+interrupted run is picked up again by the next one.
+
+Upcoming PostgreSQL partitions are created after every ``migrate`` and by
+each ``archive_audit_log`` run. Rows written for a month before its
+partition exists land in the default partition and are moved over when the
+partition is created.
+"""
+import re
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.utils import timezone
+
+TABLE = 'core_auditlog'
+DEFAULT_PARTITION = f'{TABLE}_default'
+MONTHS_AHEAD = 3
+PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def month_bounds(month):
+    """[start, end) of ``month`` in UTC, the boundaries partitions are cut on."""
+    start = datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+    end = datetime.combine(add_months(month, 1), time.min, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def _db_bounds(month):
+    return [connection.ops.adapt_datetimefield_value(value) for value in month_bounds(month)]
+
+
+def detached_months():
+    """Months whose rows sit in their own table, detached from the hot table."""
+    months = []
+    for table in connection.introspection.table_names():
+        match = PARTITION_NAME.match(table)
+        if match and not _is_attached(table):
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def _is_attached(table):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE c.relname = %s AND p.relname = %s",
+            [table, TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def expired_months(cutoff):
+    """Attached months that end on or before ``cutoff`` (a first-of-month date)."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s",
+                [TABLE],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        months = [date(int(m[1]), int(m[2]), 1) for m in map(PARTITION_NAME.match, names) if m]
+        return sorted(month for month in months if month < cutoff)
+
+    from .models import AuditLog
+    cutoff_start, _ = month_bounds(cutoff)
+    return sorted(
+        month_start(value)
+        for value in AuditLog.objects.filter(timestamp__lt=cutoff_start).datetimes('timestamp', 'month', tzinfo=dt_timezone.utc)
+    )
+
+
+def _is_partitioned():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table t JOIN pg_class c ON c.oid = t.partrelid WHERE c.relname = %s", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def ensure_partitions(first, months_ahead=MONTHS_AHEAD):
+    """
+    Create the missing monthly partitions from ``first`` through
+    ``months_ahead`` months past now (PostgreSQL only) and return their names.
+    """
+    if connection.vendor != 'postgresql' or not _is_partitioned():
+        return []
+    existing = set(connection.introspection.table_names())
+    last = add_months(month_start(timezone.now()), months_ahead)
+    created = []
+    month = month_start(first)
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            with transaction.atomic():
+                _create_partition(month)
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def _create_partition(month):
+    """
+    PostgreSQL refuses to add a partition while the default partition holds
+    rows in its range, so those rows are moved into the new table first. The
+    default partition stays locked against writes until the partition is
+    attached.
+    """
+    name = partition_name(month)
+    start, end = _db_bounds(month)
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{DEFAULT_PARTITION}" IN SHARE ROW EXCLUSIVE MODE')
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', [start, end])
+
+
+def create_upcoming_partitions(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """``post_migrate`` receiver: every deploy leaves ``MONTHS_AHEAD`` months of partitions in place."""
+    if using == DEFAULT_DB_ALIAS:
+        ensure_partitions(month_start(timezone.now()))
+
+
+def detach(month):
+    """Move ``month`` out of the hot table into its own table and return the table name."""
+    name = partition_name(month)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+            return name
+        start, end = _db_bounds(month)
+        # Shadow table: same columns, no constraints; rows moved in one transaction
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS "{name}" AS SELECT * FROM "{TABLE}" WHERE 0')
+        cursor.execute(
+            f'INSERT INTO "{name}" SELECT * FROM "{TABLE}" WHERE "timestamp" >= %s AND "timestamp" < %s',
+            [start, end],
+        )
+        cursor.execute(f'DELETE FROM "{TABLE}" WHERE "timestamp" >= %s AND "timestamp" < %s', [start, end])
+    return name
+
+
+def iter_rows(table, chunk_size=5000):
+    """Yield every row of a detached table as a dict, in id order."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT * FROM "{table}" ORDER BY "id"')
+        columns = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(columns, row))
+
+
+def drop(table):
+    if not PARTITION_NAME.match(table):
+        raise ValueError(f"{table} is not an audit log partition")
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS "{table}"')
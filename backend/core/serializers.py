@@ -0,0 +1,61 @@
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import serializers
+
+from . import export
+from .models import AuditLog
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    user_email = serializers.EmailField(source='user.email', read_only=True, default=None)
+    target_content_type = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AuditLog
+        fields = (
+            'id', 'timestamp', 'user', 'user_email', 'action', 'target_content_type', 'target_object_id',
+            'details', 'ip_address', 'user_agent',
+        )
+        read_only_fields = fields
+
+    def get_target_content_type(self, obj):
+        content_type = obj.target_content_type
+        return f'{content_type.app_label}.{content_type.model}' if content_type else None
+
+
+class AuditLogFilterSerializer(serializers.Serializer):
+    """Query parameters of the audit log API. ``since`` is inclusive, ``until`` exclusive."""
+    user = serializers.IntegerField(required=False, min_value=1)
+    action = serializers.CharField(required=False, max_length=255)
+    content_type = serializers.CharField(required=False, help_text="app_label.model, e.g. payments.payment")
+    object_id = serializers.CharField(required=False, max_length=64)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate_content_type(self, value):
+        try:
+            app_label, model = value.lower().split('.', 1)
+            return ContentType.objects.get_by_natural_key(app_label, model)
+        except (ValueError, ContentType.DoesNotExist):
+            raise serializers.ValidationError("Expected app_label.model of an installed model.")
+
+    def validate(self, attrs):
+        if 'object_id' in attrs and 'content_type' not in attrs:
+            raise serializers.ValidationError({'object_id': "Requires content_type."})
+        if 'since' in attrs and 'until' in attrs and attrs['since'] >= attrs['until']:
+            raise serializers.ValidationError({'until': "Must be after since."})
+        return attrs
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """Query parameters of the streaming export endpoint; see core.export."""
+    output = serializers.ChoiceField(choices=export.FORMATS, default='csv')
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    after = serializers.CharField(required=False, help_text="Watermark '<date>,<id>' to resume after")
+    include_encrypted = serializers.BooleanField(default=False)
+
+    def validate_after(self, value):
+        try:
+            return self.context['export'].parse_watermark(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
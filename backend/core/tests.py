@@ -1,3 +1,395 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from encrypted_model_fields import fields as encrypted_fields
+from rest_framework.test import APIClient
+
+from payments.models import PaymentRecord
+from profiles.models import ProviderProfile
+from users.last_login import last_login_buffer
+from users.models import User, Role
+from . import partitions
+from .audit import audit_sink
+from .export import EXPORTS, stream
+from .fields import Ciphertext
+from .models import AuditLog
+from .signals import profile_updated
+from .throttling import SlidingWindow, parse_rate
+
+
+@override_settings(AUDIT_LOG_BUFFER_SIZE=3, AUDIT_LOG_BUFFER_MAX_AGE=60)
+class AuditSinkTests(TestCase):
+    def setUp(self):
+        audit_sink.flush()
+        self.user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.addCleanup(audit_sink.flush)
+
+    def record_updates(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(count):
+                audit_sink.record(AuditLog(user=self.user, action="SeekerProfile updated"))
+
+    def test_rows_are_written_in_bulk_once_the_buffer_is_full(self):
+        self.record_updates(2)
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(audit_sink.pending, 2)
+        with self.assertNumQueries(1):
+            self.record_updates(1)
+        self.assertEqual(AuditLog.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(audit_sink.pending, 0)
+
+    def test_stale_rows_are_flushed_after_a_request(self):
+        self.record_updates(1)
+        request_finished.send(sender=self.__class__)
+        self.assertEqual(AuditLog.objects.count(), 0)
+        with mock.patch('core.audit.time.monotonic', return_value=10 ** 9):
+            request_finished.send(sender=self.__class__)
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+    def test_sync_rows_and_rolled_back_transactions(self):
+        audit_sink.record(AuditLog(user=self.user, action="Payment successful"), sync=True)
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+        # Never committed: the on_commit hook is discarded with the transaction
+        profile_updated.send(sender=self.__class__, user=self.user, profile=self.user.seekerprofile, request=None)
+        self.assertEqual(audit_sink.pending, 0)
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+
+class AuditArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        now = timezone.now()
+        self.oldest = (now - timedelta(days=460)).replace(microsecond=123456)
+        AuditLog.objects.bulk_create([
+            AuditLog(user=self.user, action="Old", target_object_id=str(uuid.uuid4()), timestamp=now - timedelta(days=400)),
+            AuditLog(user=self.user, action="Old", target_object_id='7', timestamp=self.oldest),
+            AuditLog(user=self.user, action="Recent", timestamp=now),
+        ])
+
+    def test_expired_months_are_moved_to_compressed_archives(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command('archive_audit_log', retention_months=12, archive_dir=archive_dir, stdout=StringIO())
+            rows = []
+            for path in sorted(Path(archive_dir).glob('core_auditlog_p*.jsonl.gz')):
+                with gzip.open(path, 'rt') as archive:
+                    rows.extend(json.loads(line) for line in archive)
+            self.assertEqual(len(list(Path(archive_dir).iterdir())), 2)
+        self.assertEqual(len(rows), 2)
+        self.assertIn('7', [row['target_object_id'] for row in rows])
+        # Full precision, whether the backend hands back a datetime or the stored text
+        archived = [parse_datetime(row['timestamp']).replace(tzinfo=None) for row in rows]
+        self.assertIn(self.oldest.replace(tzinfo=None), archived)
+        self.assertEqual(list(AuditLog.objects.values_list('action', flat=True)), ["Recent"])
+        self.assertEqual(partitions.detached_months(), [])
+
+    def test_entries_are_append_only(self):
+        entry = AuditLog.objects.first()
+        entry.action = "Rewritten"
+        with self.assertRaises(ValueError):
+            entry.save()
+
+
+@skipUnless(connection.vendor == 'postgresql', "Native partitions need PostgreSQL")
+class AuditPartitionTests(TestCase):
+    def test_rows_in_the_default_partition_move_to_their_new_partition(self):
+        user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        this_month = partitions.month_start(timezone.now())
+        month = partitions.add_months(this_month, partitions.MONTHS_AHEAD + 2)
+        start, _ = partitions.month_bounds(month)
+        AuditLog.objects.create(user=user, action="Early", timestamp=start + timedelta(days=1))
+
+        created = partitions.ensure_partitions(this_month, months_ahead=partitions.MONTHS_AHEAD + 2)
+        self.assertIn(partitions.partition_name(month), created)
+        self.assertEqual(partitions.ensure_partitions(this_month, months_ahead=partitions.MONTHS_AHEAD + 2), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT "action" FROM "{partitions.partition_name(month)}"')
+            self.assertEqual(cursor.fetchall(), [("Early",)])
+            cursor.execute(f'SELECT COUNT(*) FROM "{partitions.DEFAULT_PARTITION}" WHERE "action" = %s', ["Early"])
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(AuditLog.objects.filter(action="Early").count(), 1)
+
+
+class AuditLogAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass1234!')
+        self.client.force_login(self.admin)
+
+    def add_entries(self, count):
+        users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', role=Role.PROVIDER)
+            for i in range(AuditLog.objects.count(), AuditLog.objects.count() + count)
+        ]
+        profile_type = ContentType.objects.get_for_model(ProviderProfile)
+        AuditLog.objects.bulk_create([
+            AuditLog(user=user, action="ProviderProfile updated", target_content_type=profile_type, target_object_id=str(user.providerprofile.pk))
+            for user in users
+        ] + [AuditLog(user=users[0], action="User registered", target_content_type=ContentType.objects.get_for_model(User), target_object_id=str(users[0].pk))])
+
+    def changelist_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:core_auditlog_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_rows_or_users(self):
+        self.add_entries(3)
+        _, few = self.changelist_queries()
+        self.add_entries(30)
+        response, many = self.changelist_queries()
+        self.assertEqual(few, many)
+        self.assertContains(response, 'Providerprofile: user4@example.com')
+
+    def test_user_filter_takes_an_id_or_email(self):
+        self.add_entries(3)
+        user = User.objects.get(username='user1')
+        for value in (str(user.pk), 'USER1@example.com'):
+            response = self.client.get(reverse('admin:core_auditlog_changelist'), {'user': value})
+            self.assertEqual(list(response.context['cl'].result_list.values_list('user', flat=True).distinct()), [user.pk])
+
+
+class AuditLogAPITests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass1234!')
+        self.seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.now = timezone.now()
+        user_type = ContentType.objects.get_for_model(User)
+        AuditLog.objects.bulk_create([
+            AuditLog(user=self.seeker, action="User logged in", target_content_type=user_type, target_object_id=str(self.seeker.pk),
+                     timestamp=self.now - timedelta(minutes=i))
+            for i in range(5)
+        ] + [AuditLog(user=self.admin, action="User logged in", timestamp=self.now - timedelta(days=2))])
+
+    def fetch(self, **params):
+        response = self.client.get(reverse('audit_log_list'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen, params = [], {'page_size': 2}
+        while True:
+            page = self.fetch(**params)
+            seen.extend(row['id'] for row in page['results'])
+            if not page['next']:
+                break
+            params['cursor'] = page['next'].split('cursor=')[1].split('&')[0]
+        self.assertEqual(seen, list(AuditLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True)))
+
+    def test_cursor_keeps_rows_sharing_a_millisecond(self):
+        moment = self.now.replace(microsecond=456000) + timedelta(hours=1)
+        tied = AuditLog.objects.bulk_create([
+            AuditLog(user=self.seeker, action=f"a{i}", timestamp=moment + timedelta(microseconds=10 * i)) for i in range(4)
+        ])
+        seen, params = [], {'page_size': 1, 'since': moment.isoformat()}
+        while True:
+            page = self.fetch(**params)
+            seen.extend(row['action'] for row in page['results'])
+            if not page['next']:
+                break
+            params['cursor'] = page['next'].split('cursor=')[1].split('&')[0]
+        self.assertEqual(seen, [row.action for row in reversed(tied)])
+
+    def test_filters(self):
+        self.assertEqual(len(self.fetch(user=self.seeker.pk)['results']), 5)
+        self.assertEqual(len(self.fetch(content_type='users.user', object_id=self.seeker.pk)['results']), 5)
+        self.assertEqual(len(self.fetch(since=(self.now - timedelta(days=1)).isoformat(), until=self.now.isoformat())['results']), 4)
+        row = self.fetch(action="User logged in", user=self.admin.pk)['results'][0]
+        self.assertEqual((row['user_email'], row['target_content_type']), ('admin@example.com', None))
+        self.assertEqual(self.client.get(reverse('audit_log_list'), {'content_type': 'nope.model'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('audit_log_list'), {'object_id': '1'}).status_code, 400)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.seeker)
+        self.assertEqual(self.client.get(reverse('audit_log_list')).status_code, 403)
+
+    def test_user_filter_seeks_on_composite_index(self):
+        queryset = AuditLog.objects.filter(user=self.seeker).order_by('-timestamp', '-id')
+        self.assertIn('auditlog_user_time_idx', queryset.explain())
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass1234!')
+        start = timezone.now() - timedelta(days=1)
+        AuditLog.objects.bulk_create([
+            AuditLog(user=self.admin, action=f"Event {i}", details={'n': i}, timestamp=start + timedelta(minutes=i))
+            for i in range(7)
+        ])
+        self.start = start
+
+    def test_interrupted_jsonl_export_resumes_from_the_watermark(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output, watermark = Path(directory) / 'audit.jsonl.gz', Path(directory) / 'watermark'
+            options = {'format': 'jsonl', 'output_file': str(output), 'watermark_file': str(watermark),
+                       'chunk_size': 2, 'stderr': StringIO()}
+            call_command('export_records', 'audit-logs', until=self.start + timedelta(minutes=3), **options)
+            self.assertTrue(watermark.read_text().endswith(f',{AuditLog.objects.get(action="Event 2").pk}'))
+            call_command('export_records', 'audit-logs', **options)
+            with gzip.open(output, 'rt') as exported:
+                rows = [json.loads(line) for line in exported]
+        self.assertEqual([row['action'] for row in rows], [f"Event {i}" for i in range(7)])
+        self.assertIn('rows/s', options['stderr'].getvalue())
+
+    def test_resuming_from_the_last_jsonl_line_skips_nothing_and_repeats_nothing(self):
+        moment = (self.start + timedelta(hours=1)).replace(microsecond=321000)
+        AuditLog.objects.bulk_create([
+            AuditLog(user=self.admin, action=f"Tied {i}", timestamp=moment + timedelta(microseconds=i)) for i in range(4)
+        ])
+        export = EXPORTS['audit-logs']
+        first = gzip.decompress(b''.join(stream(export, 'jsonl', until=moment + timedelta(microseconds=2))))
+        last = json.loads(first.decode().splitlines()[-1])
+        self.assertEqual(last['action'], "Tied 1")
+        after = export.parse_watermark(f"{last['timestamp']},{last['id']}")
+        rest = gzip.decompress(b''.join(stream(export, 'jsonl', after=after)))
+        actions = [json.loads(line)['action'] for line in (first + rest).decode().splitlines()]
+        self.assertEqual(actions, [f"Event {i}" for i in range(7)] + [f"Tied {i}" for i in range(4)])
+
+    def test_encrypted_columns_are_left_out_by_default(self):
+        PaymentRecord.objects.create(user=self.admin, stripe_charge_id='ch_secret', amount='10.00', currency='PHP')
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'payments.csv'
+            call_command('export_records', 'payment-records', output_file=str(output), stderr=out)
+            header = output.read_text().splitlines()[0].split(',')
+        self.assertEqual(header[:2], ['id', 'created_at'])
+        self.assertNotIn('stripe_charge_id', header)
+        self.assertIn('Exported 1 rows', out.getvalue())
+
+    def test_staff_endpoint_streams_csv(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        first = AuditLog.objects.order_by('timestamp').first()
+        response = client.get(reverse('export', args=['audit-logs']), {'after': f'{first.timestamp.isoformat()},{first.pk}'})
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual([row['action'] for row in rows], [f"Event {i}" for i in range(1, 7)])
+        self.assertEqual(json.loads(rows[0]['details']), {'n': 1})
+
+        self.assertEqual(client.get(reverse('export', args=['audit-logs']), {'after': 'garbage'}).status_code, 400)
+        self.assertEqual(client.get(reverse('export', args=['nothing'])).status_code, 404)
+        client.force_authenticate(User.objects.create_user(username='seeker', email='seeker@example.com', role=Role.SEEKER))
+        self.assertEqual(client.get(reverse('export', args=['audit-logs'])).status_code, 403)
+
+
+class LazyEncryptedFieldTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        PaymentRecord.objects.create(user=self.user, stripe_charge_id='ch_1', payment_method='card', amount='10.00', currency='PHP')
+        self.decrypt = mock.patch('encrypted_model_fields.fields.decrypt_str', wraps=encrypted_fields.decrypt_str)
+
+    def test_values_are_decrypted_once_on_first_access(self):
+        with self.decrypt as decrypt:
+            record = PaymentRecord.objects.get()
+            self.assertIsInstance(record.__dict__['stripe_charge_id'], Ciphertext)
+            self.assertEqual((record.amount, record.status), (Decimal('10.00'), 'pending'))
+            self.assertEqual(decrypt.call_count, 0)
+            self.assertEqual([record.stripe_charge_id, record.stripe_charge_id], ['ch_1', 'ch_1'])
+            self.assertEqual(decrypt.call_count, 1)
+            self.assertEqual(record.changed_fields, set())
+
+    def test_unread_ciphertext_is_saved_back_untouched(self):
+        stored = PaymentRecord.objects.values_list('stripe_charge_id', flat=True).get()
+        self.assertEqual(str(stored), 'ch_1')
+        with self.decrypt as decrypt:
+            record = PaymentRecord.objects.get()
+            record.status = 'succeeded'
+            record.save()
+            full = PaymentRecord.objects.get()
+            full.save(update_fields=None, force_update=True)
+            self.assertEqual(decrypt.call_count, 0)
+        self.assertEqual(PaymentRecord.objects.values_list('stripe_charge_id', flat=True).get().token, stored.token)
+
+        record.payment_method = 'bank'
+        self.assertEqual(record.changed_fields, {'payment_method'})
+        record.save()
+        self.assertEqual(PaymentRecord.objects.blind_get(stripe_charge_id='ch_1').payment_method, 'bank')
+
+    def test_without_encrypted_defers_the_columns(self):
+        record = PaymentRecord.objects.without_encrypted().get()
+        self.assertEqual(record.get_deferred_fields(), {'stripe_charge_id', 'payment_method'})
+
+
+THROTTLE_TEST_RATES = {
+    'login': '5/m', 'login_failures': '3/15m', 'register': '2/h', 'match': '100/m', 'match_account': '3/m',
+}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': THROTTLE_TEST_RATES})
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(audit_sink.flush)
+        last_login_buffer.clear()
+        self.addCleanup(last_login_buffer.clear) # Logins below must not be flushed into a later test
+        self.user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+
+    def test_sliding_window_weights_the_previous_window(self):
+        self.assertEqual(parse_rate('10/15m'), (10, 900))
+        self.assertEqual(parse_rate('120/min'), (120, 60))
+        window = SlidingWindow(limit=10, period=60)
+        for _ in range(8):
+            window.hit('k', now=119)
+        # A quarter into the next window three quarters of the previous one still count
+        self.assertEqual(window.hit('k', now=135), 8 * 0.75 + 1)
+        self.assertEqual(window.count('k', now=150), 8 * 0.5 + 1)
+        self.assertEqual(window.count('k', now=181), 1 * (1 - 1 / 60))
+
+    def login(self, password, email='seeker@example.com', ip='10.0.0.1'):
+        return APIClient().post(reverse('token_obtain_pair'), {'email': email, 'password': password}, format='json', REMOTE_ADDR=ip)
+
+    def test_failed_logins_lock_the_account_and_ip_without_queries(self):
+        for _ in range(3):
+            self.assertEqual(self.login('wrong', ip='10.0.0.1').status_code, 401)
+        with self.assertNumQueries(0):
+            response = self.login('pass1234!', ip='10.0.0.2') # Right password, other IP: the account is locked
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.login('x', email='other@example.com', ip='10.0.0.1').status_code, 429)
+        self.assertEqual(self.login('x', email='other@example.com', ip='10.0.0.3').status_code, 401)
+
+    def test_successful_logins_use_the_per_ip_rate(self):
+        for _ in range(5):
+            self.assertEqual(self.login('pass1234!').status_code, 200)
+        self.assertEqual(self.login('pass1234!').status_code, 429)
+        self.assertEqual(self.login('pass1234!', ip='10.0.0.2').status_code, 200)
+
+    def test_registration_is_throttled_per_ip(self):
+        client = APIClient()
+        for n in range(3):
+            response = client.post(reverse('user_register'), {
+                'username': f'new{n}', 'email': f'new{n}@example.com', 'password': 'A-long-pass-123',
+                'password2': 'A-long-pass-123', 'consent_given': True,
+            }, format='json', REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(User.objects.filter(username__startswith='new').count(), 2)
+
+    def test_match_endpoint_is_throttled_per_account(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for _ in range(3):
+            self.assertEqual(client.get(reverse('get_matches'), REMOTE_ADDR='10.0.0.1').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get(reverse('get_matches'), REMOTE_ADDR='10.0.0.2').status_code, 429)
@@ -0,0 +1,179 @@
+"""
+Sliding-window request throttles on the shared cache.
+
+A window of ``period`` seconds is approximated from two fixed-window
+counters, the current one and the one before it, weighted by how much of
+the previous window still overlaps: ``previous * (1 - progress) + current``.
+Counting is one atomic ``cache.incr`` and reading the previous window one
+``cache.get``, so a refused request never reaches the database. Counters
+live in the default cache (LocMem per process, django_redis shared).
+
+Rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` under the
+view's ``throttle_scope``, written ``<requests>/<period>`` where the period
+is ``s``, ``m``, ``h`` or ``d`` with an optional multiple, e.g. ``10/15m``.
+"""
+import re
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .auditing_receivers import get_client_ip
+
+_PERIOD = re.compile(r'^(\d*)\s*([smhd])')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'10/15m'`` -> ``(10, 900)``; None for no limit."""
+    if rate is None:
+        return None
+    count, period = rate.split('/')
+    match = _PERIOD.match(period.strip())
+    if match is None:
+        raise ValueError(f"Invalid throttle rate {rate!r}")
+    return int(count), int(match.group(1) or 1) * _UNITS[match.group(2)]
+
+
+class SlidingWindow:
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+
+    def _keys(self, key, now):
+        index = int(now // self.period)
+        return f'{key}:{index}', f'{key}:{index - 1}', (now % self.period) / self.period
+
+    def hit(self, key, now=None):
+        """Count one request under ``key``; returns the estimated count in the window, this one included."""
+        current, previous, progress = self._keys(key, time.time() if now is None else now)
+        cache.add(current, 0, timeout=self.period * 2)
+        try:
+            count = cache.incr(current)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(current, 1, timeout=self.period * 2)
+            count = 1
+        return cache.get(previous, 0) * (1 - progress) + count
+
+    def count(self, key, now=None):
+        current, previous, progress = self._keys(key, time.time() if now is None else now)
+        counts = cache.get_many([current, previous])
+        return counts.get(previous, 0) * (1 - progress) + counts.get(current, 0)
+
+    def wait(self, key, now=None):
+        """Seconds until the estimate drops back under the limit."""
+        now = time.time() if now is None else now
+        current, previous, progress = self._keys(key, now)
+        counts = cache.get_many([current, previous])
+        current_count, previous_count = counts.get(current, 0), counts.get(previous, 0)
+        if current_count >= self.limit or not previous_count:
+            return self.period * (1 - progress) # The next window starts with only this one's weight
+        # Progress at which the previous window's share has decayed enough
+        needed = 1 - (self.limit - current_count) / previous_count
+        return max(needed - progress, 0) * self.period
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Base class: subclasses name the scope suffix and the keys a request is
+    counted under. A request is refused when any of its keys is over the rate.
+    Refused requests are counted too, so a client that keeps hammering stays
+    throttled instead of getting a request through every few seconds.
+    """
+    scope_suffix = ''
+    counts_requests = True
+
+    def get_scope(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        return f'{scope}{self.scope_suffix}' if scope else None
+
+    def get_idents(self, request, view):
+        raise NotImplementedError
+
+    def get_window(self, view):
+        scope = self.get_scope(view)
+        parsed = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope)) if scope else None
+        return (scope, SlidingWindow(*parsed)) if parsed else (scope, None)
+
+    def allow_request(self, request, view):
+        scope, window = self.get_window(view)
+        if window is None:
+            return True
+        self.window = window
+        self.denied = []
+        for ident in self.get_idents(request, view):
+            key = f'throttle:{scope}:{ident}'
+            estimate = window.hit(key) if self.counts_requests else window.count(key)
+            limit_reached = estimate > window.limit if self.counts_requests else estimate >= window.limit
+            if limit_reached:
+                self.denied.append(key)
+        return not self.denied
+
+    def wait(self):
+        return max(self.window.wait(key) for key in self.denied)
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """Requests per client IP under the view's ``throttle_scope``."""
+
+    def get_idents(self, request, view):
+        ip = get_client_ip(request)
+        return [f'ip:{ip}'] if ip else []
+
+
+def account_ident(request):
+    """The authenticated user's id, else the email the request logs in or registers with."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    email = request.data.get('email') if hasattr(request.data, 'get') else None
+    return f'email:{email.strip().lower()}' if isinstance(email, str) and email.strip() else None
+
+
+class AccountThrottle(SlidingWindowThrottle):
+    """Requests per account under ``<throttle_scope>_account``."""
+    scope_suffix = '_account'
+
+    def get_idents(self, request, view):
+        ident = account_ident(request)
+        return [ident] if ident else []
+
+
+class FailedLoginThrottle(SlidingWindowThrottle):
+    """
+    Refuses logins from an IP or for an account with too many recent
+    failures under ``<throttle_scope>_failures``. Only failures count; they
+    are recorded by ``record_failed_login`` from the ``user_login_failed``
+    receiver, so successful logins never use up the allowance.
+    """
+    scope_suffix = '_failures'
+    counts_requests = False
+
+    def get_idents(self, request, view):
+        return failed_login_idents(request, email=None)
+
+
+def failed_login_idents(request, email):
+    idents = []
+    ip = get_client_ip(request)
+    if ip:
+        idents.append(f'ip:{ip}')
+    if email is not None:
+        idents.append(f'email:{email.strip().lower()}')
+    elif request is not None:
+        ident = account_ident(request)
+        if ident and ident.startswith('email:'):
+            idents.append(ident)
+    return idents
+
+
+def record_failed_login(request, email, scope='login'):
+    """Count a failed login against the client IP and the account it tried."""
+    parsed = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}_failures'))
+    if parsed is None:
+        return
+    window = SlidingWindow(*parsed)
+    for ident in failed_login_idents(request, email or None):
+        window.hit(f'throttle:{scope}_failures:{ident}')
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
-from .views import HealthCheckView # Ensure this view is created
+from .views import AuditLogListView, ExportView, HealthCheckView # Ensure this view is created
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,6 +11,8 @@ urlpatterns = [
     path('api/v1/profiles/', include('profiles.urls')),
     path('api/v1/matching/', include('matching.urls')),
     path('api/v1/payments/', include('payments.urls')),
+    path('api/v1/audit-logs/', AuditLogListView.as_view(), name='audit_log_list'),
+    path('api/v1/exports/<slug:name>/', ExportView.as_view(), name='export'),
 
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
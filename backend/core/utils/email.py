@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.utils.html import escape
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, To, From
 import logging
@@ -73,4 +74,38 @@ def send_match_alert_email(seeker_email, seeker_name, provider_company_name, pro
     <p>Log in to your dashboard to see more details: {settings.SITE_URL}/dashboard/matches</p>
     <p>Thanks,<br/>The CreditBPO Team</p>
     """
-    return send_email(seeker_email, subject, html_content)
\ No newline at end of file
+    return send_email(seeker_email, subject, html_content)
+
+def send_match_alert_digest_email(seeker_email, seeker_name, providers):
+    """One email listing several new matches; ``providers`` are (company_name, services) pairs."""
+    count = len(providers)
+    subject = "New Potential Match Found!" if count == 1 else f"{count} New Potential Matches Found!"
+    # Names and services are user input
+    items = ''.join(
+        f"<li><strong>{escape(company_name)}</strong>: {escape(', '.join(map(str, services)))}</li>"
+        for company_name, services in providers
+    )
+    html_content = f"""
+    <p>Hi {escape(seeker_name)},</p>
+    <p>We found new potential matches for your saved searches:</p>
+    <ul>{items}</ul>
+    <p>Log in to your dashboard to see more details: {settings.SITE_URL}/dashboard/matches</p>
+    <p>Thanks,<br/>The CreditBPO Team</p>
+    """
+    return send_email(seeker_email, subject, html_content)
+
+def send_password_invite_email(user_email, user_name, uid, token):
+    """
+    Invite to an account created for the user. The link opens the frontend
+    page at ``PASSWORD_INVITE_PATH``, which sets the first password through
+    ``users.views.SetPasswordView``.
+    """
+    subject = "Your CreditBPO Matching Platform account is ready"
+    link = settings.SITE_URL + settings.PASSWORD_INVITE_PATH.format(uid=uid, token=token)
+    html_content = f"""
+    <p>Hi {escape(user_name)},</p>
+    <p>An account has been created for you on the CreditBPO Matching Platform.</p>
+    <p>Choose your password to get started: {escape(link)}</p>
+    <p>Thanks,<br/>The CreditBPO Team</p>
+    """
+    return send_email(user_email, subject, html_content)
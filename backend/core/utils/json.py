@@ -0,0 +1,16 @@
+import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class PreciseJSONEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder with datetimes and times at full precision instead of
+    truncated to the millisecond, for values that are read back and compared
+    (keyset cursors, archived audit rows).
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
@@ -1,9 +1,16 @@
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.views import View
 from django.db import connections
 from django.db.utils import OperationalError
+from rest_framework import generics, permissions
+from rest_framework.views import APIView
 import logging
 
+from . import export
+from .models import AuditLog
+from .pagination import KeysetPagination
+from .serializers import AuditLogFilterSerializer, AuditLogSerializer, ExportQuerySerializer
+
 logger = logging.getLogger(__name__)
 
 class HealthCheckView(View):
@@ -31,4 +38,76 @@ class HealthCheckView(View):
         }
         if db_status != "ok":
             return JsonResponse(data, status=503)
-        return JsonResponse(data)
\ No newline at end of file
+        return JsonResponse(data)
+
+
+class AuditLogPagination(KeysetPagination):
+    model = AuditLog
+    ordering = ('-timestamp', '-id')
+    page_size = 50
+    max_page_size = 500
+
+
+class AuditLogListView(generics.ListAPIView):
+    """
+    Read-only audit trail for staff, newest first. Every filter combination
+    is served by one of the composite ``(..., timestamp)`` indexes on
+    AuditLog, and keyset pagination keeps deep pages as cheap as the first.
+    """
+    serializer_class = AuditLogSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = AuditLogPagination
+
+    def get_queryset(self):
+        params = AuditLogFilterSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+
+        queryset = AuditLog.objects.select_related('user', 'target_content_type')
+        if 'user' in filters:
+            queryset = queryset.filter(user_id=filters['user'])
+        if 'action' in filters:
+            queryset = queryset.filter(action=filters['action'])
+        if 'content_type' in filters:
+            queryset = queryset.filter(target_content_type=filters['content_type'])
+        if 'object_id' in filters:
+            queryset = queryset.filter(target_object_id=filters['object_id'])
+        if 'since' in filters:
+            queryset = queryset.filter(timestamp__gte=filters['since'])
+        if 'until' in filters:
+            queryset = queryset.filter(timestamp__lt=filters['until'])
+        return queryset
+
+
+class ExportView(APIView):
+    """
+    Staff-only streaming export of ``audit-logs`` or ``payment-records`` as
+    CSV or gzip-compressed JSONL. Rows are written as they are read, so the
+    response starts at once and memory stays flat; resume a cut-off download
+    with ``after`` set to the date and id of the last row received.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    content_types = {'csv': 'text/csv', 'jsonl': 'application/gzip'}
+    extensions = {'csv': 'csv', 'jsonl': 'jsonl.gz'}
+
+    def get(self, request, name):
+        spec = export.EXPORTS.get(name)
+        if spec is None:
+            raise Http404
+        params = ExportQuerySerializer(data=request.query_params, context={'export': spec})
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+        output = options['output']
+
+        stats = export.ExportStats()
+        blocks = export.stream(
+            spec, output, options.get('since'), options.get('until'), options.get('after'),
+            include_encrypted=options['include_encrypted'], stats=stats,
+        )
+        response = StreamingHttpResponse(self.logged(name, blocks, stats), content_type=self.content_types[output])
+        response['Content-Disposition'] = f'attachment; filename="{name}.{self.extensions[output]}"'
+        return response
+
+    def logged(self, name, blocks, stats):
+        yield from blocks
+        logger.info("Export %s by user %s: %s", name, self.request.user.pk, stats)
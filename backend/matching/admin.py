@@ -1,3 +1,30 @@
 from django.contrib import admin
+from .models import MatchAlert, SavedSearch, SeekerMatch, TopMatchRefresh
 
-# Register your models here.
+@admin.register(SeekerMatch)
+class SeekerMatchAdmin(admin.ModelAdmin):
+    list_display = ('seeker', 'rank', 'provider', 'score', 'computed_at')
+    raw_id_fields = ('seeker', 'provider')
+    list_select_related = ('seeker__user', 'provider__user')
+
+
+@admin.register(TopMatchRefresh)
+class TopMatchRefreshAdmin(admin.ModelAdmin):
+    list_display = ('provider', 'queued_at')
+    raw_id_fields = ('provider',)
+    list_select_related = ('provider__user',)
+
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ('seeker', 'name', 'industry', 'location', 'is_active', 'created_at')
+    list_filter = ('is_active',)
+    raw_id_fields = ('seeker',)
+    list_select_related = ('seeker__user',)
+
+
+@admin.register(MatchAlert)
+class MatchAlertAdmin(admin.ModelAdmin):
+    list_display = ('saved_search', 'provider', 'created_at', 'sent_at')
+    raw_id_fields = ('saved_search', 'provider')
+    list_select_related = ('saved_search', 'provider__user')
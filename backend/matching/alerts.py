@@ -0,0 +1,201 @@
+import threading
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from core.signals import match_alert_triggered
+from core.utils.email import send_match_alert_digest_email
+from profiles.models import SeekerProfile
+from .index import normalize_token, resolve_location
+from .models import MatchAlert, SavedSearch
+
+GENERATION_CACHE_KEY = 'matching:saved-search-index:generation'
+
+
+def min_interval():
+    """Seconds between two alert emails to the same seeker."""
+    return getattr(settings, 'MATCH_ALERT_MIN_INTERVAL', 60 * 60)
+
+
+class SavedSearchIndex:
+    """
+    Per-process reverse index from saved-search criteria to active SavedSearch
+    ids. A provider write is matched against the distinct criteria (and the
+    regions it covers), never against every seeker, so the cost of finding
+    the searches it satisfies does not grow with the number of seekers.
+
+    Kept current by the receivers in matching.signals and rebuilt when another
+    process bumps the shared generation, like matching.index.ProviderIndex.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self._built = False
+            self._generation = None
+            self._criteria = {}
+            # '' holds the searches that leave that filter blank
+            self._industry = {}
+            self._location = {}
+            self._region = {}
+
+    @staticmethod
+    def criteria_for(search):
+        location = normalize_token(search.location)
+        region_ids = resolve_location(search.location) if location else frozenset()
+        # Resolved locations are matched on region ids only, as in the match endpoint
+        return normalize_token(search.industry), '' if region_ids else location, region_ids
+
+    def build(self, generation=None):
+        searches = SavedSearch.objects.filter(is_active=True).only('id', 'industry', 'location')
+        with self.lock:
+            self.reset()
+            for search in searches.iterator(chunk_size=2000):
+                self._add(search.pk, self.criteria_for(search))
+            self._built = True
+            self._generation = generation if generation is not None else cache.get(GENERATION_CACHE_KEY)
+
+    def sync(self):
+        with self.lock:
+            shared = cache.get(GENERATION_CACHE_KEY)
+            if not self._built or shared != self._generation:
+                self.build(shared)
+
+    def _bump_generation(self):
+        cache.add(GENERATION_CACHE_KEY, 0, timeout=None)
+        try:
+            generation = cache.incr(GENERATION_CACHE_KEY)
+        except ValueError:
+            return False
+        current = self._generation is not None and self._generation == generation - 1
+        self._generation = generation if current else None
+        return current
+
+    def _add(self, pk, criteria):
+        industry, location, region_ids = criteria
+        self._criteria[pk] = criteria
+        self._industry.setdefault(industry, set()).add(pk)
+        if region_ids:
+            for region_id in region_ids:
+                self._region.setdefault(region_id, set()).add(pk)
+        else:
+            self._location.setdefault(location, set()).add(pk)
+
+    def _discard(self, pk):
+        criteria = self._criteria.pop(pk, None)
+        if criteria is None:
+            return
+        industry, location, region_ids = criteria
+        for postings, keys in ((self._industry, [industry]), (self._region, region_ids), (self._location, [] if region_ids else [location])):
+            for key in keys:
+                ids = postings.get(key)
+                if ids is not None:
+                    ids.discard(pk)
+                    if not ids:
+                        del postings[key]
+
+    def update(self, search):
+        with self.lock:
+            if not self._bump_generation() or not self._built:
+                self._built = False
+                return
+            self._discard(search.pk)
+            if search.is_active:
+                self._add(search.pk, self.criteria_for(search))
+
+    def remove(self, pk):
+        with self.lock:
+            if not self._bump_generation() or not self._built:
+                self._built = False
+                return
+            self._discard(pk)
+
+    def matching(self, entry):
+        """Ids of active saved searches the provider ``entry`` (see ProviderIndex.entry_for) satisfies."""
+        with self.lock:
+            self.sync()
+            industry_ids = set(self._industry.get('', ()))
+            for key, ids in self._industry.items():
+                if key and any(key in token for token in entry.service_tokens):
+                    industry_ids |= ids
+            if not industry_ids:
+                return set()
+            location_ids = set(self._location.get('', ()))
+            for region_id in entry.region_ids:
+                location_ids |= self._region.get(region_id, set())
+            for key, ids in self._location.items():
+                if key and any(key in token for token in entry.geo_tokens):
+                    location_ids |= ids
+            return industry_ids & location_ids
+
+
+saved_search_index = SavedSearchIndex()
+
+
+def record_match_alerts(entries, batch_size=1000):
+    """
+    Record a pending MatchAlert for every active saved search each provider
+    entry satisfies. Searches already alerted about a provider are skipped by
+    the unique constraint. Pass every entry of a bulk import in one call.
+    """
+    alerts = [
+        MatchAlert(saved_search_id=search_id, provider_id=entry.pk)
+        for entry in entries
+        for search_id in saved_search_index.matching(entry)
+    ]
+    MatchAlert.objects.bulk_create(alerts, batch_size=batch_size, ignore_conflicts=True)
+    return len(alerts)
+
+
+def deliver_match_alerts(chunk_size=2000):
+    """
+    Send one digest email per seeker covering all of their pending alerts,
+    at most once per ``MATCH_ALERT_MIN_INTERVAL``. Alerts for rate-limited
+    seekers stay pending and are folded into their next digest. Returns
+    ``(emails_sent, alerts_delivered, seekers_deferred)``.
+
+    The time of the last digest is kept on the SeekerProfile, so the limit
+    holds across runs and processes whatever cache is configured.
+    """
+    pending = (
+        MatchAlert.objects.filter(sent_at__isnull=True, saved_search__is_active=True, provider__user__is_active=True)
+        .select_related('saved_search__seeker__user', 'provider')
+        .order_by('saved_search__seeker_id', 'created_at')
+    )
+    emails_sent = alerts_delivered = seekers_deferred = 0
+    for _, group in groupby(pending.iterator(chunk_size=chunk_size), key=lambda alert: alert.saved_search.seeker_id):
+        alerts = list(group)
+        seeker = alerts[0].saved_search.seeker
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=min_interval())
+        previous = seeker.match_alert_sent_at
+        # The conditional UPDATE claims the seeker, so two overlapping runs never both send
+        if (previous is not None and previous > cutoff) or not SeekerProfile.objects.filter(
+            Q(match_alert_sent_at__isnull=True) | Q(match_alert_sent_at__lte=cutoff), pk=seeker.pk,
+        ).update(match_alert_sent_at=now):
+            seekers_deferred += 1
+            continue
+
+        providers = {alert.provider_id: alert.provider for alert in alerts}
+        user = seeker.user
+        sent = send_match_alert_digest_email(
+            user.email,
+            user.first_name or user.username,
+            [(provider.company_name, provider.service_types or []) for provider in providers.values()],
+        )
+        if not sent:
+            # Retry on the next run
+            SeekerProfile.objects.filter(pk=seeker.pk, match_alert_sent_at=now).update(match_alert_sent_at=previous)
+            continue
+        MatchAlert.objects.filter(pk__in=[alert.pk for alert in alerts]).update(sent_at=timezone.now())
+        match_alert_triggered.send(sender=MatchAlert, seeker=seeker, providers=list(providers.values()), alerts=alerts)
+        emails_sent += 1
+        alerts_delivered += len(alerts)
+    return emails_sent, alerts_delivered, seekers_deferred
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .index import normalize_token, provider_index, resolve_location
+
+KEY_PREFIX = 'matching:results'
+TAG_PREFIX = 'matching:tag'
+
+# Every entry carries ALL_TAG; it is only bumped when a write cannot be
+# attributed to specific tokens (e.g. this process has no index to diff against).
+ALL_TAG = 'all'
+# Entries for unfiltered searches depend on every provider.
+ANY_PROVIDER_TAG = 'any'
+
+
+def _tag_key(tag):
+    # Tokens are free text; hash them into portable cache keys.
+    return f'{TAG_PREFIX}:{hashlib.sha1(tag.encode()).hexdigest()}'
+
+
+class MatchResultCache:
+    """
+    Match responses cached per normalized query and invalidated by tag.
+
+    Each entry stores the version of every tag it depends on: the provider ids
+    it returned and the index tokens its filters expanded to. A read is a hit
+    only if none of those versions moved. Invalidating a tag is a single atomic
+    ``incr``, so this works the same on LocMemCache and django_redis and never
+    needs to enumerate keys.
+    """
+
+    def __init__(self, timeout=None):
+        self._timeout = timeout
+
+    @property
+    def timeout(self):
+        if self._timeout is None:
+            return getattr(settings, 'MATCH_CACHE_TIMEOUT', 60 * 15)
+        return self._timeout
+
+    def make_key(self, request, industry=None, location=None):
+        params = request.query_params
+        query = [
+            normalize_token(industry),
+            normalize_token(location),
+            params.get('cursor', ''),
+            params.get('page_size', ''),
+            params.get('fields'),
+            getattr(request.user, 'role', ''),
+            request.scheme,
+            request.get_host(), # Pagination links are absolute
+        ]
+        digest = hashlib.sha1(json.dumps(query).encode()).hexdigest()
+        return f'{KEY_PREFIX}:{digest}'
+
+    def query_tags(self, industry=None, location=None):
+        tags = {ALL_TAG}
+        if industry:
+            tags.add('vocab:service')
+            tags.update(f'service:{token}' for token in provider_index.expand('service', industry))
+        if location:
+            region_ids = resolve_location(location)
+            if region_ids:
+                tags.update(f'region:{region_id}' for region_id in region_ids)
+            else:
+                tags.add('vocab:geo')
+                tags.update(f'geo:{token}' for token in provider_index.expand('geo', location))
+        if not industry and not location:
+            tags.add(ANY_PROVIDER_TAG)
+        return tags
+
+    @staticmethod
+    def provider_tags(provider_ids):
+        return {f'provider:{pk}' for pk in provider_ids}
+
+    def tag_versions(self, tags):
+        keys = {_tag_key(tag): tag for tag in tags}
+        versions = cache.get_many(list(keys))
+        for key in keys.keys() - versions.keys():
+            # Seed from the clock so a tag that was evicted and recreated
+            # cannot come back with a version an old entry still holds.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+        return {keys[key]: version for key, version in versions.items()}
+
+    def get(self, key):
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        versions, data = entry
+        current = cache.get_many([_tag_key(tag) for tag in versions])
+        for tag, version in versions.items():
+            if current.get(_tag_key(tag)) != version:
+                return None
+        return data
+
+    def set(self, key, data, versions):
+        cache.set(key, (versions, data), timeout=self.timeout)
+
+    def invalidate(self, tags):
+        for tag in tags:
+            try:
+                cache.incr(_tag_key(tag))
+            except ValueError:
+                pass # Never seeded or evicted: nothing can depend on the current version
+
+    def invalidate_provider(self, old_entry, new_entry, known=True):
+        """
+        Evict entries affected by a provider changing from ``old_entry`` to
+        ``new_entry`` (either may be None for creates, deletes and
+        deactivations). Pass ``known=False`` when the previous state is
+        unavailable, which falls back to evicting everything.
+        """
+        if not known:
+            self.invalidate({ALL_TAG})
+            return
+        tags = {ANY_PROVIDER_TAG}
+        for entry in (old_entry, new_entry):
+            if entry is None:
+                continue
+            tags.add(f'provider:{entry.pk}')
+            tags.update(f'service:{token}' for token in entry.service_tokens)
+            tags.update(f'geo:{token}' for token in entry.geo_tokens)
+            tags.update(f'region:{region_id}' for region_id in entry.region_ids)
+        if new_entry is not None:
+            if any(not provider_index.has_token('service', token) for token in new_entry.service_tokens):
+                tags.add('vocab:service')
+            if any(not provider_index.has_token('geo', token) for token in new_entry.geo_tokens):
+                tags.add('vocab:geo')
+        self.invalidate(tags)
+
+
+match_cache = MatchResultCache()
@@ -0,0 +1,297 @@
+import heapq
+import re
+import threading
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from profiles.gazetteer import get_gazetteer
+from profiles.models import ProviderProfile
+
+# Shared across worker processes so a write handled by one worker makes the
+# others rebuild their copy on their next search.
+GENERATION_CACHE_KEY = 'matching:provider-index:generation'
+
+ProviderEntry = namedtuple('ProviderEntry', ['pk', 'user_id', 'service_tokens', 'geo_tokens', 'region_ids', 'sort_key'])
+
+_SET_BITS = re.compile('1')
+
+
+def normalize_token(value):
+    """Casefold and collapse whitespace so 'Metro  Manila' and 'metro manila' index together."""
+    if value is None:
+        return ''
+    return ' '.join(str(value).casefold().split())
+
+
+def _tokens(values):
+    if isinstance(values, str):
+        values = [values]
+    tokens = {normalize_token(value) for value in values or []}
+    tokens.discard('')
+    return frozenset(tokens)
+
+
+def resolve_location(location):
+    """Canonical region ids for a location query; empty if the gazetteer doesn't know it."""
+    return get_gazetteer().resolve(location)
+
+
+def _iter_bits(bits):
+    """Yield the positions of the set bits in ``bits`` without touching the unset ones."""
+    binary = bin(bits)
+    top = len(binary) - 1
+    for match in _SET_BITS.finditer(binary, 2):
+        yield top - match.start()
+
+
+class ProviderIndex:
+    """
+    Per-process inverted index from normalized service type / geo token to a
+    bitset of ProviderProfile ids (a Python int, bit N set for provider pk N).
+
+    Only providers whose user is active are indexed. The index is built from the
+    database on first use and kept current by the receivers in matching.signals.
+    Locations the gazetteer recognises are matched on canonical region ids.
+    Other lookups keep the ``icontains`` semantics of the original queryset
+    filters by matching the query against the token vocabulary, which is much
+    smaller than the provider table.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._listeners = []
+        self.reset()
+
+    def add_listener(self, listener):
+        """
+        Register an object mirroring the index (see matching.scoring). It gets
+        ``on_reset()``, ``on_add(entry)`` and ``on_discard(entry)`` calls, always
+        under ``self.lock``.
+        """
+        with self.lock:
+            self._listeners.append(listener)
+            for entry in self._entries.values():
+                listener.on_add(entry)
+
+    def reset(self):
+        with self.lock:
+            self._built = False
+            self._generation = None
+            self._entries = {}
+            self._by_user = {}
+            self._service_postings = {}
+            self._geo_postings = {}
+            self._region_postings = {}
+            self._all = 0
+            for listener in self._listeners:
+                listener.on_reset()
+
+    @staticmethod
+    def entry_for(profile):
+        return ProviderEntry(
+            pk=profile.pk,
+            user_id=profile.user_id,
+            service_tokens=_tokens(profile.service_types),
+            geo_tokens=_tokens(profile.geos_served) | _tokens(profile.location),
+            region_ids=profile.covered_regions,
+            sort_key=(profile.subscription_tier, profile.updated_at, profile.pk),
+        )
+
+    def build(self, generation=None):
+        profiles = (
+            ProviderProfile.objects.filter(user__is_active=True)
+            .only('id', 'user_id', 'service_types', 'geos_served', 'location', 'subscription_tier', 'updated_at')
+        )
+        with self.lock:
+            self.reset()
+            for profile in profiles.iterator(chunk_size=2000):
+                self._add(self.entry_for(profile))
+            self._built = True
+            self._generation = generation if generation is not None else cache.get(GENERATION_CACHE_KEY)
+
+    def sync(self):
+        """Rebuild if this copy was never built or another process has written since."""
+        with self.lock:
+            shared = cache.get(GENERATION_CACHE_KEY)
+            if not self._built or shared != self._generation:
+                self.build(shared)
+
+    def _bump_generation(self):
+        """Advance the shared generation; return True if this copy was current before the write."""
+        cache.add(GENERATION_CACHE_KEY, 0, timeout=None)
+        try:
+            generation = cache.incr(GENERATION_CACHE_KEY)
+        except ValueError:
+            # Evicted between add() and incr(); every copy will rebuild.
+            return False
+        current = self._generation is not None and self._generation == generation - 1
+        self._generation = generation if current else None
+        return current
+
+    def _add(self, entry):
+        bit = 1 << entry.pk
+        self._entries[entry.pk] = entry
+        self._by_user[entry.user_id] = entry.pk
+        self._all |= bit
+        for token in entry.service_tokens:
+            self._service_postings[token] = self._service_postings.get(token, 0) | bit
+        for token in entry.geo_tokens:
+            self._geo_postings[token] = self._geo_postings.get(token, 0) | bit
+        for region_id in entry.region_ids:
+            self._region_postings[region_id] = self._region_postings.get(region_id, 0) | bit
+        for listener in self._listeners:
+            listener.on_add(entry)
+
+    def _discard(self, pk):
+        entry = self._entries.pop(pk, None)
+        if entry is None:
+            return None
+        mask = ~(1 << pk)
+        self._by_user.pop(entry.user_id, None)
+        self._all &= mask
+        for postings, tokens in (
+            (self._service_postings, entry.service_tokens),
+            (self._geo_postings, entry.geo_tokens),
+            (self._region_postings, entry.region_ids),
+        ):
+            for token in tokens:
+                remaining = postings.get(token, 0) & mask
+                if remaining:
+                    postings[token] = remaining
+                else:
+                    postings.pop(token, None)
+        for listener in self._listeners:
+            listener.on_discard(entry)
+        return entry
+
+    def update(self, pk, entry):
+        """
+        Replace the entry of provider ``pk`` with ``entry`` (from ``entry_for``),
+        or drop it when ``entry`` is None. Call once the write has committed.
+        """
+        with self.lock:
+            if not self._bump_generation() or not self._built:
+                self._built = False
+                return
+            self._discard(pk)
+            if entry is not None:
+                self._add(entry)
+
+    def remove(self, pk):
+        with self.lock:
+            if not self._bump_generation() or not self._built:
+                self._built = False
+                return
+            self._discard(pk)
+
+    def invalidate(self):
+        """Force every process to rebuild its copy, e.g. after writes that bypass signals."""
+        with self.lock:
+            self._bump_generation()
+            self._built = False
+
+    @property
+    def built(self):
+        return self._built
+
+    def get(self, pk):
+        with self.lock:
+            return self._entries.get(pk)
+
+    def provider_for_user(self, user_id):
+        with self.lock:
+            return self._by_user.get(user_id)
+
+    @staticmethod
+    def _lookup(postings, query):
+        query = normalize_token(query)
+        bits = 0
+        for token, token_bits in postings.items():
+            if query in token:
+                bits |= token_bits
+        return bits
+
+    def _postings(self, kind):
+        return self._service_postings if kind == 'service' else self._geo_postings
+
+    def expand(self, kind, query):
+        """Return the indexed 'service' or 'geo' tokens a query matches."""
+        query = normalize_token(query)
+        with self.lock:
+            self.sync()
+            return {token for token in self._postings(kind) if query in token}
+
+    def has_token(self, kind, token):
+        with self.lock:
+            return token in self._postings(kind)
+
+    def match(self, industry=None, location=None):
+        """Return the bitset of active providers matching the given filters."""
+        with self.lock:
+            self.sync()
+            return self._filter_bits(industry, location, lambda kind, query: self._lookup(self._postings(kind), query))
+
+    def _filter_bits(self, industry, location, lookup):
+        bits = self._all
+        if industry:
+            bits &= lookup('service', industry)
+        if location and bits:
+            region_ids = resolve_location(location)
+            if region_ids:
+                bits &= self._region_bits(region_ids)
+            else:
+                bits &= lookup('geo', location)
+        return bits
+
+    def _region_bits(self, region_ids):
+        bits = 0
+        for region_id in region_ids:
+            bits |= self._region_postings.get(region_id, 0)
+        return bits
+
+    def search_keys(self, industry=None, location=None):
+        """
+        Return the ``(subscription_tier, updated_at, id)`` keys of matching
+        providers in the MatchAPIView ordering (all three descending).
+        """
+        bits = self.match(industry=industry, location=location)
+        with self.lock:
+            keys = [self._entries[pk].sort_key for pk in _iter_bits(bits)]
+        keys.sort(reverse=True)
+        return keys
+
+    def search_many(self, queries, limit=None):
+        """
+        Evaluate many ``(industry, location)`` filters against one snapshot of
+        the index, looking up each distinct filter value once. Returns a
+        ``(total, keys)`` pair per query, in order, where ``keys`` are the first
+        ``limit`` sort keys in the search_keys() ordering.
+        """
+        lookups, evaluated, results = {}, {}, []
+
+        def lookup(kind, query):
+            key = (kind, normalize_token(query))
+            if key not in lookups:
+                lookups[key] = self._lookup(self._postings(kind), query)
+            return lookups[key]
+
+        with self.lock:
+            self.sync()
+            for industry, location in queries:
+                query = (normalize_token(industry), normalize_token(location))
+                if query not in evaluated:
+                    bits = self._filter_bits(industry, location, lookup)
+                    keys = [self._entries[pk].sort_key for pk in _iter_bits(bits)]
+                    total = len(keys)
+                    keys = heapq.nlargest(limit, keys) if limit is not None else sorted(keys, reverse=True)
+                    evaluated[query] = (total, keys)
+                results.append(evaluated[query])
+        return results
+
+    def search(self, industry=None, location=None):
+        """Return matching provider ids, premium first, then most recently updated."""
+        return [key[2] for key in self.search_keys(industry=industry, location=location)]
+
+
+provider_index = ProviderIndex()
@@ -0,0 +1,90 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from profiles.models import ProviderProfile
+from users.models import User, Role
+from matching.cache import ALL_TAG, match_cache
+from matching.index import provider_index
+from matching.views import BatchMatchAPIView, MatchAPIView
+
+INDUSTRIES = ['Term Loan', 'Trade Finance', 'Invoice Factoring', 'Leasing', 'Working Capital']
+LOCATIONS = ['Makati City', 'Cebu City', 'Davao City', 'Iloilo City', 'Baguio']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare N sequential MatchAPIView requests with one BatchMatchAPIView "
+        "request for the same queries. Runs on throwaway rows inside a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=2000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        count, limit = options['queries'], options['limit']
+        rng = random.Random(0)
+        queries = [
+            {'industry': rng.choice(INDUSTRIES), 'location': rng.choice(LOCATIONS)}
+            for _ in range(count)
+        ]
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+
+        with transaction.atomic():
+            seeker = self._create_rows(options['providers'])
+            provider_index.invalidate() # bulk_create bypasses the index signals
+            provider_index.sync()
+
+            def sequential():
+                view = MatchAPIView.as_view()
+                for query in queries:
+                    request = factory.get('/', {**query, 'page_size': limit})
+                    force_authenticate(request, seeker)
+                    view(request).render()
+
+            def batch():
+                request = factory.post('/', {'queries': queries, 'limit': limit}, format='json')
+                force_authenticate(request, seeker)
+                BatchMatchAPIView.as_view()(request).render()
+
+            for label, run in ((f'{count} x MatchAPIView', sequential), ('1 x BatchMatchAPIView', batch)):
+                match_cache.invalidate({ALL_TAG}) # Measure cold results, not cache hits
+                elapsed = self._time(run)
+                self.stdout.write(f"{label:<30} {elapsed * 1e3:9.1f} ms  ({count / elapsed:8.1f} queries/s)")
+
+            transaction.set_rollback(True)
+        provider_index.invalidate()
+
+    @staticmethod
+    def _time(run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
+
+    @staticmethod
+    def _create_rows(count):
+        rng = random.Random(1)
+        password = make_password(None)
+        seeker = User.objects.create_user(username='bench-seeker', email='bench-seeker@example.invalid', role=Role.SEEKER)
+        users = User.objects.bulk_create(
+            User(username=f'bench-provider-{i}', email=f'bench-provider-{i}@example.invalid', password=password, role=Role.PROVIDER)
+            for i in range(count)
+        )
+        ProviderProfile.objects.bulk_create(
+            ProviderProfile(
+                user=user,
+                company_name=f'Bench Provider {i}',
+                location=rng.choice(LOCATIONS),
+                service_types=rng.sample(INDUSTRIES, 2),
+                geos_served=rng.sample(LOCATIONS, 2),
+            )
+            for i, user in enumerate(users)
+        )
+        return seeker
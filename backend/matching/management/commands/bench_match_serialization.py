@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from profiles.models import ProviderProfile
+from users.models import User, Role
+from matching.serializers import MatchResultSerializer, ProjectedMatchSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-row cost of full MatchResultSerializer output with the "
+        "?fields= projection path. Runs on throwaway rows inside a transaction "
+        "that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--fields', default='company_name,service_types,location')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        projection = ProjectedMatchSerializer.from_query_param(options['fields'])
+
+        with transaction.atomic():
+            provider_ids = self._create_rows(rows)
+
+            def full():
+                profiles = ProviderProfile.objects.select_related('user').filter(pk__in=provider_ids)
+                return MatchResultSerializer(profiles, many=True).data
+
+            def projected():
+                values = projection.project(ProviderProfile.objects.filter(pk__in=provider_ids))
+                return [projection.to_representation(row) for row in values]
+
+            for label, run in (('full serializer', full), (f'projection ({options["fields"]})', projected)):
+                best = min(self._time(run) for _ in range(repeat))
+                self.stdout.write(f"{label:<55} {best * 1e6 / rows:8.1f} us/row  ({best * 1e3:.1f} ms for {rows} rows)")
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _time(run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
+
+    @staticmethod
+    def _create_rows(count):
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            User(username=f'bench-provider-{i}', email=f'bench-provider-{i}@example.invalid', password=password, role=Role.PROVIDER)
+            for i in range(count)
+        )
+        profiles = ProviderProfile.objects.bulk_create(
+            ProviderProfile(
+                user=user,
+                company_name=f'Bench Provider {i}',
+                location='Makati City',
+                service_types=['Term Loan', 'Trade Finance'],
+                geos_served=['Metro Manila', 'Cebu City'],
+            )
+            for i, user in enumerate(users)
+        )
+        return [profile.pk for profile in profiles]
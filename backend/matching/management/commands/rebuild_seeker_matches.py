@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from profiles.models import SeekerProfile
+from matching.top_matches import refresh_seeker_matches
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed top-K matches (SeekerMatch) for every seeker."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Seekers re-ranked per transaction")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+        seekers = SeekerProfile.objects.only('id', 'industry', 'location').order_by('pk')
+        seeker_count = rows = 0
+        batch = []
+        for seeker in seekers.iterator(chunk_size=chunk_size):
+            batch.append(seeker)
+            if len(batch) == chunk_size:
+                rows += refresh_seeker_matches(batch)
+                seeker_count += len(batch)
+                batch = []
+        if batch:
+            rows += refresh_seeker_matches(batch)
+            seeker_count += len(batch)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {rows} matches for {seeker_count} seekers in {elapsed:.1f}s"
+        ))
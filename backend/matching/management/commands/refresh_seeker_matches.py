@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from matching.top_matches import process_refresh_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the precomputed top-K matches (SeekerMatch) of the seekers "
+        "affected by queued provider updates. Run it from cron, like "
+        "send_match_alerts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Seekers re-ranked per transaction")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        providers, seekers, rows = process_refresh_queue(chunk_size=options['chunk_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {rows} matches for {seekers} seekers affected by {providers} provider updates in {elapsed:.1f}s"
+        ))
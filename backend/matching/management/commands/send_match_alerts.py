@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from profiles.models import ProviderProfile
+from matching.alerts import deliver_match_alerts, record_match_alerts
+from matching.index import ProviderIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Email every seeker a digest of the pending alerts for their saved "
+        "searches. With --updated-since, first record alerts for providers "
+        "written without signals (e.g. bulk imports)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--updated-since', help="ISO datetime; record alerts for providers updated after it")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        chunk_size = options['chunk_size']
+        if options['updated_since']:
+            since = parse_datetime(options['updated_since'])
+            if since is None:
+                raise CommandError("--updated-since must be an ISO datetime")
+            providers = (
+                ProviderProfile.objects.filter(updated_at__gt=since, user__is_active=True)
+                .only('id', 'user_id', 'service_types', 'geos_served', 'location', 'subscription_tier', 'updated_at')
+            )
+            recorded = 0
+            batch = []
+            for profile in providers.iterator(chunk_size=chunk_size):
+                batch.append(ProviderIndex.entry_for(profile))
+                if len(batch) == chunk_size:
+                    recorded += record_match_alerts(batch)
+                    batch = []
+            recorded += record_match_alerts(batch)
+            self.stdout.write(f"Matched {recorded} provider/search pairs")
+
+        emails, alerts, deferred = deliver_match_alerts(chunk_size=chunk_size)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {emails} digests covering {alerts} alerts in {elapsed:.1f}s; {deferred} seekers rate-limited"
+        ))
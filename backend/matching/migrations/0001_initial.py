@@ -0,0 +1,36 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('profiles', '0004_seeker_match_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeekerMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 is the best match')),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='profiles.providerprofile')),
+                ('seeker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='top_matches', to='profiles.seekerprofile')),
+            ],
+            options={
+                'verbose_name': 'Seeker Match',
+                'verbose_name_plural': 'Seeker Matches',
+                'ordering': ['seeker', 'rank'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='seekermatch',
+            constraint=models.UniqueConstraint(fields=('seeker', 'rank'), name='unique_seeker_match_rank'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_profile_regions'),
+        ('matching', '0002_saved_searches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopMatchRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queued_at', models.DateTimeField()),
+                ('provider', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='profiles.providerprofile')),
+            ],
+            options={
+                'verbose_name': 'Top Match Refresh',
+                'verbose_name_plural': 'Top Match Refreshes',
+            },
+        ),
+    ]
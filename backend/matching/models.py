@@ -1,3 +1,97 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from profiles.models import SeekerProfile, ProviderProfile
+
+
+class SeekerMatch(models.Model):
+    """
+    Materialized top-K providers for a seeker, as ranked by matching.scoring.
+    Rebuilt in bulk by ``manage.py rebuild_seeker_matches``. A seeker's own
+    update refreshes their rows; a provider update is queued as a
+    TopMatchRefresh.
+    """
+    seeker = models.ForeignKey(SeekerProfile, on_delete=models.CASCADE, related_name='top_matches')
+    provider = models.ForeignKey(ProviderProfile, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField(help_text="1 is the best match")
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['seeker', 'rank']
+        verbose_name = _("Seeker Match")
+        verbose_name_plural = _("Seeker Matches")
+        constraints = [
+            # Also the index the read endpoint looks up by
+            models.UniqueConstraint(fields=['seeker', 'rank'], name='unique_seeker_match_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.seeker_id} #{self.rank}: provider {self.provider_id} ({self.score:.3f})"
+
+
+class TopMatchRefresh(models.Model):
+    """
+    A provider update whose affected seekers still need their top matches
+    refreshed. Written in the transaction of the update and processed, once
+    per provider however often it changed, by ``manage.py
+    refresh_seeker_matches``.
+    """
+    provider = models.OneToOneField(ProviderProfile, on_delete=models.CASCADE, related_name='+')
+    queued_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = _("Top Match Refresh")
+        verbose_name_plural = _("Top Match Refreshes")
+
+    def __str__(self):
+        return f"Provider {self.provider_id} queued at {self.queued_at:%Y-%m-%d %H:%M:%S}"
+
+
+class SavedSearch(models.Model):
+    """
+    Match criteria a seeker wants to be alerted about. Same semantics as the
+    ``industry``/``location`` filters of the match endpoint; blank means any.
+    """
+    seeker = models.ForeignKey(SeekerProfile, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100, blank=True)
+    industry = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=255, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _("Saved Search")
+        verbose_name_plural = _("Saved Searches")
+
+    def __str__(self):
+        return f"{self.seeker_id}: {self.name or self.industry or 'any'} @ {self.location or 'anywhere'}"
+
+
+class MatchAlert(models.Model):
+    """
+    A provider newly matching a saved search. Recorded when the provider is
+    saved and delivered later, coalesced per seeker, by ``manage.py
+    send_match_alerts``. A provider is alerted at most once per search.
+    """
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='alerts')
+    provider = models.ForeignKey(ProviderProfile, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = _("Match Alert")
+        verbose_name_plural = _("Match Alerts")
+        constraints = [
+            models.UniqueConstraint(fields=['saved_search', 'provider'], name='unique_match_alert'),
+        ]
+        indexes = [
+            # The sender only ever reads undelivered alerts
+            models.Index(fields=['created_at'], condition=models.Q(sent_at__isnull=True), name='pending_match_alert_idx'),
+        ]
+
+    def __str__(self):
+        return f"Search {self.saved_search_id}: provider {self.provider_id}"
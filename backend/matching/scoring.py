@@ -0,0 +1,169 @@
+import time
+
+import numpy as np
+from django.conf import settings
+
+from profiles.models import ProviderProfile
+from .index import normalize_token, provider_index, resolve_location
+
+DEFAULT_WEIGHTS = {
+    'service': 0.5,
+    'geo': 0.3,
+    'tier': 0.15,
+    'recency': 0.05,
+}
+TIER_SCORES = {
+    ProviderProfile.SubscriptionTier.NONE: 0.0,
+    ProviderProfile.SubscriptionTier.BASIC: 0.5,
+    ProviderProfile.SubscriptionTier.PREMIUM: 1.0,
+}
+PARTIAL_MATCH_SCORE = 0.6 # Query is a substring of the token rather than the whole token
+RECENCY_HALF_LIFE_DAYS = 30.0
+
+
+class ProviderScorer:
+    """
+    Column-oriented copy of the provider index as NumPy arrays, one row per
+    active provider, so a request can be scored against every provider in a
+    single vectorized pass.
+
+    Rows are maintained incrementally through the index's listener hooks and
+    freed rows are reused, so a profile write costs O(tokens), not a reload.
+    """
+
+    def __init__(self, index, weights=None):
+        self._index = index
+        self._weights = weights
+        self.on_reset()
+        index.add_listener(self)
+
+    @property
+    def weights(self):
+        if self._weights is None:
+            return {**DEFAULT_WEIGHTS, **getattr(settings, 'MATCHING_SCORE_WEIGHTS', {})}
+        return self._weights
+
+    def on_reset(self, capacity=1024):
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._tier = np.zeros(capacity, dtype=np.float32)
+        self._updated = np.zeros(capacity, dtype=np.float64)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._size = 0
+        self._free = []
+        self._rows = {}
+        self._postings = {'service': {}, 'geo': {}, 'region': {}}
+        self._posting_arrays = {}
+
+    def _grow(self):
+        extra = len(self._ids)
+        self._ids = np.concatenate([self._ids, np.zeros(extra, dtype=self._ids.dtype)])
+        self._tier = np.concatenate([self._tier, np.zeros(extra, dtype=self._tier.dtype)])
+        self._updated = np.concatenate([self._updated, np.zeros(extra, dtype=self._updated.dtype)])
+        self._active = np.concatenate([self._active, np.zeros(extra, dtype=bool)])
+
+    def _touch_postings(self, kind, tokens, row, add):
+        postings = self._postings[kind]
+        for token in tokens:
+            rows = postings.setdefault(token, set())
+            if add:
+                rows.add(row)
+            else:
+                rows.discard(row)
+                if not rows:
+                    del postings[token]
+            self._posting_arrays.pop((kind, token), None)
+
+    def on_add(self, entry):
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._size == len(self._ids):
+                self._grow()
+            row = self._size
+            self._size += 1
+        tier, updated_at, pk = entry.sort_key
+        self._rows[pk] = row
+        self._ids[row] = pk
+        self._tier[row] = TIER_SCORES.get(tier, 0.0)
+        self._updated[row] = updated_at.timestamp() if updated_at else 0.0
+        self._active[row] = True
+        self._touch_postings('service', entry.service_tokens, row, add=True)
+        self._touch_postings('geo', entry.geo_tokens, row, add=True)
+        self._touch_postings('region', entry.region_ids, row, add=True)
+
+    def on_discard(self, entry):
+        row = self._rows.pop(entry.pk, None)
+        if row is None:
+            return
+        self._active[row] = False
+        self._touch_postings('service', entry.service_tokens, row, add=False)
+        self._touch_postings('geo', entry.geo_tokens, row, add=False)
+        self._touch_postings('region', entry.region_ids, row, add=False)
+        self._free.append(row)
+
+    def _rows_array(self, kind, token):
+        key = (kind, token)
+        if key not in self._posting_arrays:
+            rows = self._postings[kind][token]
+            self._posting_arrays[key] = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        return self._posting_arrays[key]
+
+    def _overlap(self, kind, query):
+        values = np.zeros(self._size, dtype=np.float32)
+        if not query:
+            return values
+        if kind == 'geo':
+            region_ids = resolve_location(query)
+            if region_ids:
+                # Same region is a full geo match, however the location was spelled
+                for region_id in region_ids & self._postings['region'].keys():
+                    values[self._rows_array('region', region_id)] = 1.0
+                return values
+        query = normalize_token(query)
+        for token in self._postings[kind]:
+            if query not in token:
+                continue
+            indices = self._rows_array(kind, token)
+            values[indices] = np.maximum(values[indices], 1.0 if token == query else PARTIAL_MATCH_SCORE)
+        return values
+
+    def top_k(self, industry=None, location=None, k=20, now=None):
+        """
+        Return up to ``k`` ``(provider_id, score)`` pairs, best first. When an
+        industry or location is given, providers with no overlap on it are
+        excluded rather than merely ranked low.
+        """
+        now = time.time() if now is None else now
+        weights = self.weights
+        with self._index.lock:
+            self._index.sync()
+            size = self._size
+            service = self._overlap('service', industry)
+            geo = self._overlap('geo', location)
+            age_days = np.maximum(now - self._updated[:size], 0.0) / 86400.0
+            scores = (
+                weights['service'] * service
+                + weights['geo'] * geo
+                + weights['tier'] * self._tier[:size]
+                + weights['recency'] * np.exp2(-age_days / RECENCY_HALF_LIFE_DAYS)
+            )
+            mask = self._active[:size].copy()
+            if industry:
+                mask &= service > 0
+            if location:
+                mask &= geo > 0
+            candidates = np.flatnonzero(mask)
+            ids = self._ids[candidates]
+
+        if k <= 0 or not len(candidates):
+            return []
+        candidate_scores = scores[candidates]
+        if k < len(candidates):
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-candidate_scores[top], kind='stable')]
+        return list(zip(ids[top].tolist(), candidate_scores[top].tolist()))
+
+
+provider_scorer = ProviderScorer(provider_index)
@@ -1,6 +1,91 @@
 from rest_framework import serializers
 from profiles.models import ProviderProfile
 from profiles.serializers import ProviderProfileSerializer 
+from .models import SavedSearch, SeekerMatch
 
 class MatchResultSerializer(ProviderProfileSerializer): 
-    pass
\ No newline at end of file
+    pass
+
+
+class ScoredMatchResultSerializer(MatchResultSerializer):
+    score = serializers.FloatField(read_only=True) # Set on the instance by the scoring view
+
+
+
+class SeekerMatchSerializer(serializers.ModelSerializer):
+    provider = MatchResultSerializer(read_only=True)
+
+    class Meta:
+        model = SeekerMatch
+        fields = ('rank', 'score', 'computed_at', 'provider')
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        fields = ('id', 'name', 'industry', 'location', 'is_active', 'created_at', 'updated_at')
+        read_only_fields = ('created_at', 'updated_at')
+
+    def validate(self, attrs):
+        industry = attrs.get('industry', getattr(self.instance, 'industry', ''))
+        location = attrs.get('location', getattr(self.instance, 'location', ''))
+        if not industry.strip() and not location.strip():
+            raise serializers.ValidationError("Set an industry, a location or both.")
+        return attrs
+
+
+class ProjectedMatchSerializer:
+    """
+    Dict-based stand-in for MatchResultSerializer behind ``?fields=a,b,c``.
+    Rows are read with ``.values()``, so no model instances, nested user
+    serializer or DRF field objects are built per row. ``id`` is always included.
+    """
+    allowed_fields = ('id', 'company_name', 'location', 'service_types', 'geos_served', 'subscription_tier', 'created_at', 'updated_at')
+
+    def __init__(self, fields):
+        self.fields = ('id', *(name for name in fields if name != 'id'))
+
+    @classmethod
+    def from_query_param(cls, raw):
+        """Return a serializer for the requested fields, or None when no projection was asked for."""
+        if raw is None:
+            return None
+        fields = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = sorted(set(fields) - set(cls.allowed_fields))
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(cls.allowed_fields)}."})
+        return cls(dict.fromkeys(fields))
+
+    def project(self, queryset):
+        return queryset.values(*self.fields)
+
+    def to_representation(self, row):
+        return {name: row[name] for name in self.fields}
+
+
+class MatchQuerySerializer(serializers.Serializer):
+    id = serializers.CharField(required=False, max_length=100) # Key for this query's results; defaults to its position
+    industry = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    location = serializers.CharField(required=False, allow_blank=True, max_length=255)
+
+
+class BatchMatchRequestSerializer(serializers.Serializer):
+    max_queries = 1000
+
+    queries = MatchQuerySerializer(many=True, allow_empty=False)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+    fields = serializers.CharField(required=False)
+
+    def validate_queries(self, queries):
+        if len(queries) > self.max_queries:
+            raise serializers.ValidationError(f"At most {self.max_queries} queries per batch.")
+        for position, query in enumerate(queries):
+            query.setdefault('id', str(position))
+        # Defaulted ids count too: an explicit "1" would overwrite the second query's results
+        ids = [query['id'] for query in queries]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Query ids must be unique, including the positions used for queries without one.")
+        return queries
+
+    def validate_fields(self, raw):
+        return ProjectedMatchSerializer.from_query_param(raw)
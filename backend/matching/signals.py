@@ -0,0 +1,99 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.signals import profile_updated
+from profiles.models import ProviderProfile
+from users.models import Role
+from .alerts import record_match_alerts, saved_search_index
+from .cache import match_cache
+from .index import ProviderIndex, provider_index
+from .models import SavedSearch
+from .top_matches import queue_refresh
+
+
+def reindex_provider(profile, is_active):
+    """
+    Re-index ``profile`` once the transaction saving it commits, so a rolled
+    back write never reaches the index, the scorer mirroring it or the cache.
+    The entry is taken now, from the values that were saved.
+    """
+    entry = ProviderIndex.entry_for(profile) if is_active else None
+    transaction.on_commit(partial(_replace_provider, profile.pk, entry))
+
+
+def unindex_provider(pk):
+    transaction.on_commit(partial(_replace_provider, pk, None))
+
+
+def _replace_provider(pk, new_entry):
+    # Diff against the indexed entry before it is replaced so the cache can
+    # evict exactly the queries the old and new versions appear in.
+    match_cache.invalidate_provider(provider_index.get(pk), new_entry, known=provider_index.built)
+    provider_index.update(pk, new_entry)
+
+
+@receiver(post_save, sender=ProviderProfile)
+def index_provider_profile(sender, instance, **kwargs):
+    reindex_provider(instance, is_active=instance.user.is_active)
+
+
+@receiver(post_save, sender=ProviderProfile)
+def queue_match_alerts(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'service_types', 'geos_served', 'location'} & set(update_fields):
+        return
+    if instance.user.is_active:
+        record_match_alerts([ProviderIndex.entry_for(instance)])
+
+
+@receiver(post_save, sender=SavedSearch)
+def index_saved_search(sender, instance, **kwargs):
+    # On commit, like the provider index: a rolled-back search must never be alerted
+    transaction.on_commit(partial(saved_search_index.update, instance))
+
+
+@receiver(post_delete, sender=SavedSearch)
+def unindex_saved_search(sender, instance, **kwargs):
+    transaction.on_commit(partial(saved_search_index.remove, instance.pk))
+
+
+@receiver(post_delete, sender=ProviderProfile)
+def unindex_provider_profile(sender, instance, **kwargs):
+    unindex_provider(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_provider_activity(sender, instance, created, update_fields=None, **kwargs):
+    # Cached match rows embed the provider's user, and (de)activating a
+    # provider changes what the index holds.
+    if created or instance.role != Role.PROVIDER:
+        return
+    if update_fields is not None and not {'is_active', 'email', 'username', 'first_name', 'last_name'} & set(update_fields):
+        return
+    transaction.on_commit(partial(_sync_provider_activity, instance.pk, instance.is_active))
+
+
+def _sync_provider_activity(user_id, is_active):
+    if not provider_index.built:
+        provider_index.invalidate()
+        match_cache.invalidate_provider(None, None, known=False)
+        return
+    indexed_pk = provider_index.provider_for_user(user_id)
+    if indexed_pk is not None:
+        match_cache.invalidate(match_cache.provider_tags([indexed_pk]))
+    if is_active == (indexed_pk is not None):
+        return
+    if indexed_pk is not None:
+        _replace_provider(indexed_pk, None)
+    else:
+        profile = ProviderProfile.objects.filter(user_id=user_id).first()
+        if profile is not None:
+            _replace_provider(profile.pk, ProviderIndex.entry_for(profile))
+
+
+@receiver(profile_updated)
+def refresh_top_matches(sender, user, profile, **kwargs):
+    queue_refresh(profile)
@@ -1,3 +1,514 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.audit import audit_sink
+from core.signals import match_alert_triggered, profile_updated
+from core.utils.email import send_match_alert_digest_email
+from profiles.models import ProviderProfile, SeekerProfile
+from users.models import User, Role
+from .alerts import deliver_match_alerts, saved_search_index
+from .index import provider_index
+from .models import MatchAlert, SavedSearch, SeekerMatch, TopMatchRefresh
+from .scoring import provider_scorer
+from .top_matches import seekers_affected_by
+from .views import MatchPagination
+
+
+def make_provider(username, service_types=(), geos_served=(), location='', tier=ProviderProfile.SubscriptionTier.NONE):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass1234!', role=Role.PROVIDER)
+    profile = user.providerprofile
+    profile.company_name = username.title()
+    profile.service_types = list(service_types)
+    profile.geos_served = list(geos_served)
+    profile.location = location
+    profile.subscription_tier = tier
+    profile.save()
+    return profile
+
+
+class ProviderIndexTests(TestCase):
+    def setUp(self):
+        self.addCleanup(audit_sink.flush) # Rows buffered by the on-commit callbacks run below
+        provider_index.reset()
+        self.lender = make_provider('lender', ['Term Loan', 'Trade Finance'], ['Metro Manila'], 'Makati City')
+        self.factor = make_provider('factor', ['Invoice Factoring'], ['Cebu City'], 'Cebu', ProviderProfile.SubscriptionTier.PREMIUM)
+        self.bank = make_provider('bank', ['Term Loan'], [], 'Cebu City')
+
+    def test_matches_queryset_filtering(self):
+        self.assertEqual(provider_index.search(industry='loan'), [self.bank.pk, self.lender.pk])
+        self.assertEqual(provider_index.search(location='cebu'), [self.factor.pk, self.bank.pk])
+        self.assertEqual(provider_index.search(industry='term loan', location='CEBU city'), [self.bank.pk])
+        self.assertEqual(provider_index.search(industry='leasing'), [])
+
+    def test_premium_first_then_recently_updated(self):
+        self.assertEqual(provider_index.search(), [self.factor.pk, self.bank.pk, self.lender.pk])
+
+    def test_rolled_back_writes_never_reach_the_index(self):
+        provider_index.search()  # build
+        provider_scorer.top_k()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                phantom = make_provider('phantom', ['Term Loan'], ['Cebu City'], 'Cebu')
+                self.lender.service_types = ['Leasing']
+                self.lender.save()
+                transaction.set_rollback(True)
+        self.assertEqual(provider_index.search(industry='loan'), [self.bank.pk, self.lender.pk])
+        self.assertNotIn(phantom.pk, [pk for pk, _ in provider_scorer.top_k(industry='term loan', k=10)])
+
+    def test_profile_save_and_delete_keep_index_current(self):
+        provider_index.search()  # build
+        self.lender.service_types = ['Leasing']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lender.save()
+        self.assertEqual(provider_index.search(industry='loan'), [self.bank.pk])
+        self.assertEqual(provider_index.search(industry='leasing'), [self.lender.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bank.delete()
+        self.assertEqual(provider_index.search(location='cebu'), [self.factor.pk])
+
+    def test_deactivated_providers_are_dropped(self):
+        provider_index.search()  # build
+        self.factor.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.factor.user.save()
+        self.assertNotIn(self.factor.pk, provider_index.search())
+
+        self.factor.user.is_active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.factor.user.save()
+        self.assertIn(self.factor.pk, provider_index.search())
+
+
+    def test_known_places_match_on_region(self):
+        self.assertEqual(provider_index.search(location='Metro Manila'), [self.lender.pk])
+        self.assertEqual(provider_index.search(location='NCR'), [self.lender.pk])
+        self.assertEqual(provider_scorer.top_k(location='ncr')[0][0], self.lender.pk)
+
+
+class MatchAPIViewTests(TestCase):
+    def setUp(self):
+        provider_index.reset()
+        cache.clear()
+        self.client = APIClient()
+        self.seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.client.force_authenticate(self.seeker)
+        self.providers = [make_provider(f'provider{i}', ['Term Loan'], ['Metro Manila']) for i in range(3)]
+
+    def test_returns_one_page_of_matches(self):
+        response = self.client.get(reverse('get_matches'), {'industry': 'loan', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [self.providers[2].pk, self.providers[1].pk],
+        )
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['id'] for row in response.data['results']], [self.providers[0].pk])
+        self.assertIsNone(response.data['next'])
+
+    def test_cursor_pages_match_between_index_and_queryset(self):
+        for provider in self.providers:
+            provider.subscription_tier = ProviderProfile.SubscriptionTier.PREMIUM
+        ProviderProfile.objects.bulk_update(self.providers, ['subscription_tier'])  # same tier, bypasses signals
+        provider_index.reset()
+
+        paginator = MatchPagination()
+        request = Request(APIRequestFactory().get('/', {'page_size': 1}))
+        first = paginator.paginate_queryset(ProviderProfile.objects.all(), request)
+        cursor = paginator.encode_cursor(paginator.next_position)
+        request = Request(APIRequestFactory().get('/', {'page_size': 1, 'cursor': cursor}))
+        from_db = paginator.paginate_queryset(ProviderProfile.objects.all(), request)
+        from_index = paginator.paginate_queryset(provider_index.search_keys(), request)
+
+        self.assertEqual(first[0].pk, self.providers[2].pk)
+        self.assertEqual([from_db[0].pk], [key[2] for key in from_index])
+        self.assertEqual(from_db[0].pk, self.providers[1].pk)
+
+    def test_cursor_keeps_rows_sharing_a_millisecond(self):
+        self.providers.append(make_provider('provider3', ['Term Loan'], ['Metro Manila']))
+        moment = timezone.now().replace(microsecond=123000)
+        for i, provider in enumerate(self.providers):
+            provider.updated_at = moment + timedelta(microseconds=100 * i)
+        ProviderProfile.objects.bulk_update(self.providers, ['updated_at']) # bypasses signals
+        provider_index.reset()
+        expected = [provider.pk for provider in reversed(self.providers)]
+
+        seen, params = [], {'industry': 'loan', 'page_size': 1}
+        url = reverse('get_matches')
+        while url:
+            response = self.client.get(url, params)
+            seen.extend(row['id'] for row in response.data['results'])
+            url, params = response.data['next'], None
+        self.assertEqual(seen, expected)
+
+        paginator, seen, cursor = MatchPagination(), [], None
+        while True:
+            request = Request(APIRequestFactory().get('/', {'page_size': 1, **({'cursor': cursor} if cursor else {})}))
+            seen.extend(row.pk for row in paginator.paginate_queryset(ProviderProfile.objects.all(), request))
+            if not paginator.has_next:
+                break
+            cursor = paginator.encode_cursor(paginator.next_position)
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('get_matches'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_providers_cannot_search(self):
+        self.client.force_authenticate(self.providers[0].user)
+        response = self.client.get(reverse('get_matches'))
+        self.assertEqual(response.status_code, 403)
+
+
+class ProviderScorerTests(TestCase):
+    def setUp(self):
+        self.addCleanup(audit_sink.flush) # Rows buffered by the on-commit callbacks run below
+        provider_index.reset()
+        self.lender = make_provider('lender', ['Term Loan'], ['Metro Manila'], 'Makati City')
+        self.premium = make_provider('premium', ['Term Loan'], ['Cebu City'], 'Cebu', ProviderProfile.SubscriptionTier.PREMIUM)
+        self.partial = make_provider('partial', ['Short Term Loan Facility'], ['Metro Manila'], 'Pasig')
+        self.other = make_provider('other', ['Leasing'], ['Metro Manila'], 'Pasig')
+
+    def test_ranks_by_weighted_overlap(self):
+        ranked = provider_scorer.top_k(industry='term loan', location='metro manila', k=10)
+        self.assertEqual([pk for pk, _ in ranked], [self.lender.pk, self.partial.pk])
+        self.assertGreater(ranked[0][1], ranked[1][1])
+
+    def test_tier_breaks_ties_and_k_bounds_results(self):
+        ranked = provider_scorer.top_k(industry='term loan', k=1)
+        self.assertEqual([pk for pk, _ in ranked], [self.premium.pk])
+
+    def test_profile_changes_refresh_rows(self):
+        provider_scorer.top_k()  # build
+        self.other.service_types = ['Term Loan']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.save()
+            self.lender.delete()
+        ranked = provider_scorer.top_k(industry='term loan', location='metro manila', k=10)
+        self.assertEqual([pk for pk, _ in ranked], [self.other.pk, self.partial.pk])
+
+    def test_endpoint_defaults_to_seeker_profile(self):
+        seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        seeker.seekerprofile.industry = 'Term Loan'
+        seeker.seekerprofile.location = 'Cebu'
+        seeker.seekerprofile.save()
+        client = APIClient()
+        client.force_authenticate(seeker)
+        response = client.get(reverse('ml_get_matches_stub'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], [self.premium.pk])
+        self.assertIn('score', response.data[0])
+
+
+class MatchResultCacheTests(TestCase):
+    def setUp(self):
+        self.addCleanup(audit_sink.flush) # Rows buffered by the on-commit callbacks run below
+        provider_index.reset()
+        cache.clear()
+        self.client = APIClient()
+        self.seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.client.force_authenticate(self.seeker)
+        self.lender = make_provider('lender', ['Term Loan'], ['Metro Manila'])
+        self.factor = make_provider('factor', ['Invoice Factoring'], ['Cebu City'])
+
+    def get_ids(self, **params):
+        response = self.client.get(reverse('get_matches'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_repeat_queries_are_served_from_cache(self):
+        self.get_ids(industry='loan')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_ids(industry=' LOAN '), [self.lender.pk])
+
+    def test_profile_write_evicts_only_affected_entries(self):
+        self.get_ids(industry='loan')
+        self.get_ids(industry='factoring')
+        self.lender.company_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lender.save()
+        with self.assertNumQueries(0):
+            self.get_ids(industry='factoring')
+        response = self.client.get(reverse('get_matches'), {'industry': 'loan'})
+        self.assertEqual(response.data['results'][0]['company_name'], 'Renamed')
+
+    def test_provider_gaining_a_matching_token_evicts(self):
+        self.assertEqual(self.get_ids(industry='loan'), [self.lender.pk])
+        self.factor.service_types = ['Bridge Loan']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.factor.save()
+        self.assertEqual(self.get_ids(industry='loan'), [self.factor.pk, self.lender.pk])
+
+    def test_deactivating_a_provider_evicts(self):
+        self.assertEqual(self.get_ids(location='manila'), [self.lender.pk])
+        self.lender.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lender.user.save()
+        self.assertEqual(self.get_ids(location='manila'), [])
+
+
+class SeekerTopMatchesTests(TestCase):
+    def setUp(self):
+        self.addCleanup(audit_sink.flush) # Rows buffered by the on-commit callbacks run below
+        provider_index.reset()
+        self.lender = make_provider('lender', ['Term Loan'], ['Metro Manila'])
+        self.factor = make_provider('factor', ['Invoice Factoring'], ['Cebu City'])
+        self.seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.seeker_profile = self.seeker.seekerprofile
+        self.seeker_profile.industry = 'Loan'
+        self.seeker_profile.location = 'Manila'
+        self.seeker_profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.seeker)
+
+    def test_rebuild_command_materializes_rankings(self):
+        call_command('rebuild_seeker_matches', stdout=StringIO())
+        self.assertEqual(
+            list(SeekerMatch.objects.filter(seeker=self.seeker_profile).values_list('rank', 'provider')),
+            [(1, self.lender.pk)],
+        )
+
+    def test_endpoint_reads_stored_rows(self):
+        call_command('rebuild_seeker_matches', stdout=StringIO())
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('seeker_top_matches'))
+        self.assertEqual([row['provider']['id'] for row in response.data], [self.lender.pk])
+
+    def test_seeker_update_refreshes_own_rows_on_commit(self):
+        self.seeker_profile.industry = 'Factoring'
+        self.seeker_profile.location = 'Cebu'
+        with self.captureOnCommitCallbacks() as callbacks:
+            profile_updated.send(sender=self.__class__, user=self.seeker, profile=self.seeker_profile, request=None)
+        self.assertFalse(SeekerMatch.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(list(SeekerMatch.objects.values_list('seeker', 'provider')), [(self.seeker_profile.pk, self.factor.pk)])
+
+    def test_rolled_back_provider_is_never_ranked(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                phantom = make_provider('phantom', ['Term Loan'], ['Metro Manila'], tier=ProviderProfile.SubscriptionTier.PREMIUM)
+                profile_updated.send(sender=self.__class__, user=phantom.user, profile=phantom, request=None)
+                transaction.set_rollback(True)
+        self.assertFalse(TopMatchRefresh.objects.exists())
+        call_command('rebuild_seeker_matches', stdout=StringIO())
+        self.assertEqual(list(SeekerMatch.objects.values_list('provider', flat=True)), [self.lender.pk])
+
+    def test_provider_update_reranks_only_affected_seekers(self):
+        call_command('rebuild_seeker_matches', stdout=StringIO())
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass1234!', role=Role.SEEKER)
+        other.seekerprofile.industry = 'Leasing'
+        other.seekerprofile.location = 'Davao'
+        other.seekerprofile.save()
+
+        self.factor.service_types = ['Bridge Loan']
+        self.factor.geos_served = ['Metro Manila']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.factor.save()
+            profile_updated.send(sender=self.__class__, user=self.factor.user, profile=self.factor, request=None)
+        # The request only queues the provider
+        self.assertEqual(list(SeekerMatch.objects.filter(seeker=self.seeker_profile).values_list('provider', flat=True)), [self.lender.pk])
+        self.assertTrue(TopMatchRefresh.objects.filter(provider=self.factor).exists())
+
+        call_command('refresh_seeker_matches', stdout=StringIO())
+        self.assertEqual(
+            set(SeekerMatch.objects.filter(seeker=self.seeker_profile).values_list('provider', flat=True)),
+            {self.lender.pk, self.factor.pk},
+        )
+        self.assertFalse(TopMatchRefresh.objects.exists())
+        self.assertIn(self.seeker_profile, seekers_affected_by(self.factor))
+        self.assertNotIn(other.seekerprofile, seekers_affected_by(self.factor))
+
+
+class MatchNDJSONExportTests(TestCase):
+    def setUp(self):
+        provider_index.reset()
+        cache.clear()
+        self.client = APIClient()
+        seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.client.force_authenticate(seeker)
+        self.providers = [make_provider(f'provider{i}', ['Term Loan'], ['Metro Manila']) for i in range(3)]
+        make_provider('leasing', ['Leasing'], ['Cebu City'])
+
+    def test_streams_every_match_one_per_line(self):
+        response = self.client.get(reverse('get_matches'), {'industry': 'loan', 'format': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines],
+            [provider.pk for provider in reversed(self.providers)],
+        )
+
+    def test_errors_use_the_same_format(self):
+        self.client.force_authenticate(self.providers[0].user)
+        response = self.client.get(reverse('get_matches'), {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('detail', json.loads(response.content.decode().splitlines()[0]))
+
+
+class MatchProjectionTests(TestCase):
+    def setUp(self):
+        provider_index.reset()
+        cache.clear()
+        self.client = APIClient()
+        seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.client.force_authenticate(seeker)
+        self.lender = make_provider('lender', ['Term Loan'], ['Metro Manila'], 'Makati City')
+
+    def test_returns_only_requested_fields(self):
+        response = self.client.get(reverse('get_matches'), {'fields': 'company_name,service_types'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['results'],
+            [{'id': self.lender.pk, 'company_name': 'Lender', 'service_types': ['Term Loan']}],
+        )
+
+    def test_projection_is_part_of_the_cache_key(self):
+        self.client.get(reverse('get_matches'), {'fields': 'location'})
+        response = self.client.get(reverse('get_matches'))
+        self.assertIn('user', response.data['results'][0])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('get_matches'), {'fields': 'company_name,user__password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ndjson_stream_honours_projection(self):
+        response = self.client.get(reverse('get_matches'), {'fields': 'location', 'format': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{'id': self.lender.pk, 'location': 'Makati City'}])
+
+
+class BatchMatchAPIViewTests(TestCase):
+    def setUp(self):
+        provider_index.reset()
+        cache.clear()
+        self.client = APIClient()
+        seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.client.force_authenticate(seeker)
+        self.lender = make_provider('lender', ['Term Loan'], ['Metro Manila'], 'Makati City')
+        self.factor = make_provider('factor', ['Invoice Factoring'], ['Cebu City'], 'Cebu', ProviderProfile.SubscriptionTier.PREMIUM)
+
+    def test_results_are_keyed_per_query_and_match_single_searches(self):
+        queries = [
+            {'id': 'loans', 'industry': 'loan'},
+            {'industry': 'factoring', 'location': 'cebu'},
+            {'location': 'Metro Manila'},
+            {},
+        ]
+        response = self.client.post(reverse('batch_get_matches'), {'queries': queries, 'limit': 1}, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(list(results), ['loans', '1', '2', '3'])
+        self.assertEqual([row['id'] for row in results['loans']['results']], [self.lender.pk])
+        self.assertEqual([row['id'] for row in results['1']['results']], [self.factor.pk])
+        self.assertEqual([row['id'] for row in results['2']['results']], [self.lender.pk])
+        self.assertEqual(results['3']['count'], 2)
+        self.assertEqual([row['id'] for row in results['3']['results']], provider_index.search()[:1])
+
+    def test_projection_and_validation(self):
+        response = self.client.post(
+            reverse('batch_get_matches'), {'queries': [{'industry': 'loan'}], 'fields': 'location'}, format='json',
+        )
+        self.assertEqual(response.data['results']['0']['results'], [{'id': self.lender.pk, 'location': 'Makati City'}])
+
+        invalid = (
+            {'queries': []}, {'queries': [{'id': 'a'}, {'id': 'a'}]}, {'queries': [{}], 'fields': 'password'},
+            {'queries': [{'id': '1', 'industry': 'loan'}, {'industry': 'factoring'}]}, # The second defaults to '1'
+        )
+        for body in invalid:
+            response = self.client.post(reverse('batch_get_matches'), body, format='json')
+            self.assertEqual(response.status_code, 400, body)
+
+
+class MatchAlertTests(TestCase):
+    def setUp(self):
+        self.addCleanup(audit_sink.flush) # Rows buffered by the on-commit callbacks run below
+        provider_index.reset()
+        saved_search_index.reset()
+        cache.clear()
+        self.seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.seeker)
+        for body in ({'industry': 'loan', 'location': 'NCR'}, {'industry': 'factoring'}):
+            response = self.client.post(reverse('saved_search_list'), body, format='json')
+            self.assertEqual(response.status_code, 201)
+        self.loans, self.factoring = SavedSearch.objects.order_by('pk')
+
+    def test_provider_saves_alert_only_matching_searches(self):
+        lender = make_provider('lender', ['Term Loan'], ['Metro Manila'])
+        make_provider('cebu-lender', ['Term Loan'], ['Cebu City'])
+        factor = make_provider('factor', ['Invoice Factoring'], [], 'Davao City')
+        self.assertEqual(
+            set(MatchAlert.objects.values_list('saved_search', 'provider')),
+            {(self.loans.pk, lender.pk), (self.factoring.pk, factor.pk)},
+        )
+        lender.save()  # already alerted
+        self.assertEqual(MatchAlert.objects.count(), 2)
+
+        self.loans.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.loans.save()
+        make_provider('makati-lender', ['Term Loan'], [], 'Makati City')
+        self.assertEqual(MatchAlert.objects.count(), 2)
+
+    def test_digest_is_coalesced_and_rate_limited(self):
+        make_provider('lender', ['Term Loan'], ['Metro Manila'])
+        make_provider('factor', ['Invoice Factoring'])
+        triggered = []
+        match_alert_triggered.connect(lambda sender, **kwargs: triggered.append(kwargs), weak=False, dispatch_uid='test')
+        self.addCleanup(match_alert_triggered.disconnect, dispatch_uid='test')
+
+        with mock.patch('matching.alerts.send_match_alert_digest_email', return_value=True) as send:
+            self.assertEqual(deliver_match_alerts(), (1, 2, 0))
+            self.assertEqual(len(send.call_args.args[2]), 2)
+            self.assertEqual(len(triggered), 1)
+
+            make_provider('leasing-factor', ['Factoring'])
+            cache.clear() # The limit is stored with the seeker, not in the cache
+            self.assertEqual(deliver_match_alerts(), (0, 0, 1))
+            SeekerProfile.objects.filter(user=self.seeker).update(match_alert_sent_at=timezone.now() - timedelta(hours=2))
+            self.assertEqual(deliver_match_alerts(), (1, 1, 0))
+        self.assertFalse(MatchAlert.objects.filter(sent_at__isnull=True).exists())
+
+    def test_failed_digest_is_retried_on_the_next_run(self):
+        make_provider('lender', ['Term Loan'], ['Metro Manila'])
+        with mock.patch('matching.alerts.send_match_alert_digest_email', return_value=False):
+            self.assertEqual(deliver_match_alerts(), (0, 0, 0))
+        self.assertIsNone(SeekerProfile.objects.get(user=self.seeker).match_alert_sent_at)
+        with mock.patch('matching.alerts.send_match_alert_digest_email', return_value=True):
+            self.assertEqual(deliver_match_alerts(), (1, 1, 0))
+
+    def test_rolled_back_search_is_never_alerted(self):
+        make_provider('warmup', ['Leasing']) # builds the search index
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.client.post(reverse('saved_search_list'), {'industry': 'leasing'}, format='json')
+                transaction.set_rollback(True)
+        leasing = make_provider('lessor', ['Leasing'])
+        self.assertFalse(MatchAlert.objects.filter(provider=leasing).exists())
+
+    def test_digest_escapes_provider_input(self):
+        with mock.patch('core.utils.email.send_email', return_value=True) as send:
+            send_match_alert_digest_email('seeker@example.com', '<b>Ana</b>', [('<script>x</script>', ['Loan & Lease', 7])])
+        html = send.call_args.args[2]
+        self.assertIn('&lt;script&gt;x&lt;/script&gt;', html)
+        self.assertIn('Loan &amp; Lease, 7', html)
+        self.assertNotIn('<b>Ana</b>', html)
 
-# Create your tests here.
+    def test_saved_search_needs_criteria(self):
+        response = self.client.post(reverse('saved_search_list'), {'name': 'anything'}, format='json')
+        self.assertEqual(response.status_code, 400)
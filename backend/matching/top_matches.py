@@ -0,0 +1,104 @@
+import operator
+from functools import partial, reduce
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from profiles.models import ProviderProfile, SeekerProfile
+from .index import normalize_token, provider_index
+from .models import SeekerMatch, TopMatchRefresh
+from .scoring import provider_scorer
+
+
+def top_k():
+    return getattr(settings, 'SEEKER_TOP_MATCHES_K', 20)
+
+
+def refresh_seeker_matches(seekers):
+    """Recompute and store the top-K providers for each of the given seekers."""
+    seekers = list(seekers)
+    k = top_k()
+    rankings = [
+        (seeker.pk, provider_scorer.top_k(industry=seeker.industry, location=seeker.location, k=k))
+        for seeker in seekers
+    ]
+    with transaction.atomic():
+        # The scorer can still hold a provider another process has just deleted
+        ranked_ids = {provider_id for _, ranked in rankings for provider_id, _ in ranked}
+        existing = set(ProviderProfile.objects.filter(pk__in=ranked_ids).values_list('pk', flat=True))
+        rows = [
+            SeekerMatch(seeker_id=seeker_id, provider_id=provider_id, rank=rank, score=score)
+            for seeker_id, ranked in rankings
+            for rank, (provider_id, score) in enumerate([item for item in ranked if item[0] in existing], start=1)
+        ]
+        SeekerMatch.objects.filter(seeker__in=[seeker.pk for seeker in seekers]).delete()
+        SeekerMatch.objects.bulk_create(rows)
+    return len(rows)
+
+
+def _matching_values(values, tokens):
+    """Raw stored values whose normalized form is a substring of one of ``tokens``."""
+    matched = []
+    for value in values:
+        needle = normalize_token(value)
+        if needle and any(needle in token for token in tokens):
+            matched.append(value)
+    return matched
+
+
+def seekers_affected_by(provider):
+    """
+    Seekers whose top-K could change because ``provider`` changed: those whose
+    industry or location matches it now, plus those currently ranking it.
+    Matching runs over the distinct industry/location values, not every seeker.
+    """
+    entry = provider_index.get(provider.pk) or provider_index.entry_for(provider)
+    industries = SeekerProfile.objects.order_by().values_list('industry', flat=True).distinct()
+    # Seekers with a canonical region match on it; only the rest need text matching
+    locations = SeekerProfile.objects.filter(region='').order_by().values_list('location', flat=True).distinct()
+    condition = (
+        Q(industry__in=_matching_values(industries, entry.service_tokens))
+        | Q(region__in=entry.region_ids)
+        | Q(region='', location__in=_matching_values(locations, entry.geo_tokens))
+        | Q(top_matches__provider=provider)
+    )
+    return SeekerProfile.objects.filter(condition).only('id', 'industry', 'location').distinct()
+
+
+def queue_refresh(profile):
+    """
+    Refresh top matches after ``profile`` was updated. A seeker's own rows
+    are recomputed once the transaction commits. A provider can move any
+    number of seekers' rankings, so it is only queued, in the caller's
+    transaction, for ``process_refresh_queue``.
+    """
+    if isinstance(profile, SeekerProfile):
+        transaction.on_commit(partial(refresh_seeker_matches, [profile]))
+        return
+    TopMatchRefresh.objects.bulk_create(
+        [TopMatchRefresh(provider=profile, queued_at=timezone.now())],
+        update_conflicts=True, unique_fields=['provider'], update_fields=['queued_at'],
+    )
+
+
+def process_refresh_queue(chunk_size=500):
+    """
+    Refresh every seeker affected by a queued provider update, each seeker
+    once, then dequeue those providers. A provider queued again meanwhile
+    stays queued for the next run. Returns ``(providers, seekers, rows)``.
+    """
+    queued = list(TopMatchRefresh.objects.select_related('provider'))
+    if not queued:
+        return 0, 0, 0
+    seeker_ids = set()
+    for item in queued:
+        seeker_ids.update(seekers_affected_by(item.provider).values_list('pk', flat=True))
+    seeker_ids = sorted(seeker_ids)
+    rows = 0
+    for start in range(0, len(seeker_ids), chunk_size):
+        chunk = SeekerProfile.objects.filter(pk__in=seeker_ids[start:start + chunk_size]).only('id', 'industry', 'location')
+        rows += refresh_seeker_matches(chunk)
+    TopMatchRefresh.objects.filter(reduce(operator.or_, (Q(pk=item.pk, queued_at=item.queued_at) for item in queued))).delete()
+    return len(queued), len(seeker_ids), rows
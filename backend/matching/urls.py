@@ -1,7 +1,14 @@
 from django.urls import path
-from .views import MatchAPIView, MLMatchStubAPIView
+from .views import (
+    BatchMatchAPIView, MatchAPIView, MLMatchStubAPIView, SavedSearchDetailView, SavedSearchListCreateView,
+    SeekerTopMatchesView,
+)
 
 urlpatterns = [
     path('', MatchAPIView.as_view(), name='get_matches'),
     path('ml/', MLMatchStubAPIView.as_view(), name='ml_get_matches_stub'),
+    path('batch/', BatchMatchAPIView.as_view(), name='batch_get_matches'),
+    path('top/', SeekerTopMatchesView.as_view(), name='seeker_top_matches'),
+    path('saved-searches/', SavedSearchListCreateView.as_view(), name='saved_search_list'),
+    path('saved-searches/<int:pk>/', SavedSearchDetailView.as_view(), name='saved_search_detail'),
 ]
\ No newline at end of file
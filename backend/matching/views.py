@@ -1,11 +1,22 @@
-from rest_framework import generics, permissions
+from rest_framework import generics, permissions, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django.db.models import Q
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page 
-from django.conf import settings
+from django.http import StreamingHttpResponse
 
-from profiles.models import ProviderProfile
-from .serializers import MatchResultSerializer
+from core.pagination import KeysetPagination
+from core.throttling import AccountThrottle, IPThrottle
+from profiles.models import ProviderProfile, SeekerProfile
+from .cache import match_cache
+from .index import provider_index, resolve_location
+from .models import SavedSearch, SeekerMatch
+from .renderers import NDJSONRenderer
+from .scoring import provider_scorer
+from .serializers import (
+    BatchMatchRequestSerializer, MatchResultSerializer, ProjectedMatchSerializer, SavedSearchSerializer,
+    ScoredMatchResultSerializer, SeekerMatchSerializer,
+)
+from .top_matches import refresh_seeker_matches
 from users.models import Role
 # Define a permission, e.g., only Seekers can search for matches
 class IsSeekerOrAdmin(permissions.BasePermission):
@@ -13,9 +24,22 @@ class IsSeekerOrAdmin(permissions.BasePermission):
         return request.user and (request.user.role == Role.SEEKER or request.user.role == Role.ADMIN)
 
 
+class MatchPagination(KeysetPagination):
+    model = ProviderProfile
+    # Backed by provider_match_order_idx; id makes the order total
+    ordering = ('-subscription_tier', '-updated_at', '-id')
+    page_size = 20
+    max_page_size = 100
+
+
 class MatchAPIView(generics.ListAPIView):
     serializer_class = MatchResultSerializer
     permission_classes = [permissions.IsAuthenticated, IsSeekerOrAdmin] # Or just IsAuthenticated
+    throttle_classes = [IPThrottle, AccountThrottle]
+    throttle_scope = 'match'
+    pagination_class = MatchPagination
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+    stream_chunk_size = 500
 
     def get_queryset(self):
         queryset = ProviderProfile.objects.filter(user__is_active=True) # Only active providers
@@ -31,27 +55,206 @@ class MatchAPIView(generics.ListAPIView):
             queryset = queryset.filter(service_types__icontains=industry)
 
         if location:
-            # Assuming location can be part of geos_served or general location
-            queryset = queryset.filter(
-                Q(geos_served__icontains=location) | Q(location__icontains=location)
-            )
+            region_ids = resolve_location(location)
+            if region_ids:
+                # Known place: indexed equality on canonical region ids
+                queryset = queryset.filter(coverage__region__in=region_ids).distinct()
+            else:
+                # Assuming location can be part of geos_served or general location
+                queryset = queryset.filter(
+                    Q(geos_served__icontains=location) | Q(location__icontains=location)
+                )
 
         # Further filtering based on subscription_tier could be added
         # e.g., queryset = queryset.filter(subscription_tier__in=[ProviderProfile.SubscriptionTier.BASIC, ProviderProfile.SubscriptionTier.PREMIUM])
 
-        return queryset.select_related('user').order_by('-subscription_tier', '-updated_at') # Premium first
+        return queryset.select_related('user').order_by('-subscription_tier', '-updated_at', '-id') # Premium first
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            return self.stream_ndjson()
+
+        industry = request.query_params.get('industry')
+        location = request.query_params.get('location')
+        projection = self.get_projection()
+
+        # Tag versions are read before computing so a concurrent provider write
+        # leaves the stored entry already stale rather than silently current.
+        cache_key = match_cache.make_key(request, industry=industry, location=location)
+        data = match_cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+        versions = match_cache.tag_versions(match_cache.query_tags(industry=industry, location=location))
+
+        # Filter on the in-memory index and only go to the DB for the page being returned
+        sort_keys = provider_index.search_keys(industry=industry, location=location)
+        page = [pk for _, _, pk in self.paginate_queryset(sort_keys)]
+        if projection:
+            data = [projection.to_representation(row) for row in self.hydrate_values(page, projection)]
+        else:
+            data = self.get_serializer(self.hydrate(page), many=True).data
+        response = self.get_paginated_response(data)
+
+        versions.update(match_cache.tag_versions(match_cache.provider_tags(page)))
+        match_cache.set(cache_key, response.data, versions)
+        return response
+
+    def stream_ndjson(self):
+        """
+        Every match, one serialized provider per line, fetched from the database
+        in chunks so memory stays flat and the first rows go out before the scan
+        finishes. Not paginated and not cached.
+        """
+        queryset = self.get_queryset()
+        projection = self.get_projection()
+
+        def rows():
+            if projection:
+                for row in projection.project(queryset).iterator(chunk_size=self.stream_chunk_size):
+                    yield NDJSONRenderer.render_row(projection.to_representation(row))
+                return
+            for profile in queryset.iterator(chunk_size=self.stream_chunk_size):
+                yield NDJSONRenderer.render_row(self.get_serializer(profile).data)
+
+        response = StreamingHttpResponse(rows(), content_type=NDJSONRenderer.media_type)
+        response['X-Accel-Buffering'] = 'no' # Don't let nginx buffer the stream
+        return response
 
-    # Cache this view for 15 minutes (900 seconds)
-    @method_decorator(cache_page(settings.CACHES['default']['TIMEOUT'] if 'TIMEOUT' in settings.CACHES['default'] else 60*15))
-    def get(self, *args, **kwargs):
-        return super().get(*args, **kwargs)
+    def get_projection(self):
+        return ProjectedMatchSerializer.from_query_param(self.request.query_params.get('fields'))
+
+    def hydrate_values(self, provider_ids, projection):
+        """Like hydrate(), but as ``.values()`` dicts holding only the projected columns."""
+        rows = {row['id']: row for row in projection.project(ProviderProfile.objects.filter(pk__in=provider_ids))}
+        return [rows[pk] for pk in provider_ids if pk in rows]
+
+    def hydrate(self, provider_ids):
+        """Load the given providers in one query, keeping the index's ordering."""
+        profiles = ProviderProfile.objects.select_related('user').in_bulk(provider_ids)
+        return [profiles[pk] for pk in provider_ids if pk in profiles]
 
 
 class MLMatchStubAPIView(MatchAPIView): # Inherits queryset logic and permissions
     """
-    Stubbed ML hook that simply proxies to the rules-based endpoint logic.
-    In a real scenario, this would call an ML service or model.
+    Relevance-ranked matches. Every active provider is scored against the
+    request (defaulting to the seeker's own industry and location) in one
+    vectorized pass, and the top ``limit`` are returned best first.
+    """
+    serializer_class = ScoredMatchResultSerializer
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except (TypeError, ValueError):
+            limit = self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def list(self, request, *args, **kwargs):
+        industry = request.query_params.get('industry')
+        location = request.query_params.get('location')
+        seeker_profile = SeekerProfile.objects.without_encrypted().filter(user=request.user).first()
+        if seeker_profile:
+            industry = industry or seeker_profile.industry
+            location = location or seeker_profile.location
+
+        ranked = provider_scorer.top_k(industry=industry, location=location, k=self.get_limit())
+        scores = dict(ranked)
+        profiles = self.hydrate([pk for pk, _ in ranked])
+        for profile in profiles:
+            profile.score = scores[profile.pk]
+        serializer = self.get_serializer(profiles, many=True)
+        return Response(serializer.data)
+
+
+
+class BatchMatchAPIView(MatchAPIView):
+    """
+    POST many ``{id, industry, location}`` queries and get the first ``limit``
+    matches of each, keyed by query id, in the MatchAPIView ordering. All
+    queries run against one snapshot of the provider index, and every provider
+    in the union of results is loaded and serialized once.
     """
-    # No need to override anything if it just uses the same logic for now.
-    # If caching is different or parameters, override get()
-    pass
\ No newline at end of file
+    http_method_names = ['post', 'options']
+    pagination_class = None
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+
+    def post(self, request, *args, **kwargs):
+        params = BatchMatchRequestSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        queries = params.validated_data['queries']
+        projection = params.validated_data.get('fields')
+
+        evaluated = provider_index.search_many(
+            [(query.get('industry'), query.get('location')) for query in queries],
+            limit=params.validated_data['limit'],
+        )
+
+        provider_ids = list(dict.fromkeys(pk for _, keys in evaluated for _, _, pk in keys))
+        if projection:
+            rows = [projection.to_representation(row) for row in self.hydrate_values(provider_ids, projection)]
+        else:
+            rows = self.get_serializer(self.hydrate(provider_ids), many=True).data
+        rendered = {row['id']: row for row in rows}
+
+        results = {}
+        for query, (total, keys) in zip(queries, evaluated):
+            results[query['id']] = {
+                'industry': query.get('industry', ''),
+                'location': query.get('location', ''),
+                'count': total,
+                'results': [rendered[pk] for _, _, pk in keys if pk in rendered],
+            }
+        return Response({'results': results})
+
+
+class SeekerTopMatchesView(generics.ListAPIView):
+    """
+    The requesting seeker's precomputed top matches, read from SeekerMatch by
+    its (seeker, rank) index. Computed on the spot the first time a seeker
+    has none stored.
+    """
+    serializer_class = SeekerMatchSerializer
+    permission_classes = [permissions.IsAuthenticated, IsSeekerOrAdmin]
+    pagination_class = None
+
+    def get_queryset(self):
+        return (
+            SeekerMatch.objects.filter(seeker__user=self.request.user, provider__user__is_active=True)
+            .select_related('provider__user')
+            .order_by('rank')
+        )
+
+    def list(self, request, *args, **kwargs):
+        matches = list(self.get_queryset())
+        if not matches:
+            seeker_profile = SeekerProfile.objects.without_encrypted().filter(user=request.user).first()
+            if seeker_profile and refresh_seeker_matches([seeker_profile]):
+                matches = list(self.get_queryset())
+        return Response(self.get_serializer(matches, many=True).data)
+
+
+class SavedSearchListCreateView(generics.ListCreateAPIView):
+    """The requesting seeker's saved searches; new matching providers are alerted by email."""
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated, IsSeekerOrAdmin]
+    pagination_class = None
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(seeker__user=self.request.user)
+
+    def perform_create(self, serializer):
+        seeker_profile = SeekerProfile.objects.without_encrypted().filter(user=self.request.user).first()
+        if seeker_profile is None:
+            raise serializers.ValidationError({"detail": "Only seekers with a profile can save searches."})
+        serializer.save(seeker=seeker_profile)
+
+
+class SavedSearchDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated, IsSeekerOrAdmin]
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(seeker__user=self.request.user)
@@ -18,7 +18,8 @@
 
 # backend/payments/admin.py
 from django.contrib import admin
-from .models import PaymentRecord
+from core.blind_index import blind_index
+from .models import PaymentRecord, WebhookEvent
 
 @admin.register(PaymentRecord)
 class PaymentRecordAdmin(admin.ModelAdmin):
@@ -43,12 +44,18 @@ class PaymentRecordAdmin(admin.ModelAdmin):
         'id__iexact', # Search by exact UUID (case-insensitive for iexact, though UUIDs are usually exact)
         'user__email',
         'user__username',
-        'stripe_charge_id',
         'description',
-    )
+    ) # stripe_charge_id is matched exactly through its blind index, see get_search_results
     readonly_fields = ('created_at', 'updated_at', 'id', 'stripe_charge_id') # Make these read-only if appropriate
     list_per_page = 25
 
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        digest = blind_index(search_term)
+        if digest:
+            results |= queryset.filter(stripe_charge_id_bidx=digest)
+        return results, may_have_duplicates
+
     # Optional: Custom method to display user's email or username in list_display
     def user_email_display(self, obj):
         return obj.user.email if obj.user else 'N/A'
@@ -60,4 +67,13 @@ class PaymentRecordAdmin(admin.ModelAdmin):
     # view_stripe_charge_id.short_description = 'Stripe/Simulated ID'
 
     # Ensure all fields used in list_display, list_filter, search_fields, etc.,
-    # actually exist on the PaymentRecord model or are defined as methods on this admin class.
\ No newline at end of file
+    # actually exist on the PaymentRecord model or are defined as methods on this admin class.
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'type', 'status', 'attempts', 'event_created', 'received_at', 'processed_at')
+    list_filter = ('status', 'type')
+    search_fields = ('event_id',)
+    readonly_fields = ('event_id', 'type', 'ordering_key', 'payload', 'event_created', 'attempts', 'last_error', 'received_at', 'processed_at')
+    show_full_result_count = False
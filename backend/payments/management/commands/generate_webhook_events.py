@@ -0,0 +1,119 @@
+import json
+import random
+import secrets
+import statistics
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from payments.models import Payment, PaymentRecord, Subscription, WebhookEvent
+from payments.views import stripe_webhook_view
+from payments.webhooks import process_pending, sign
+from users.models import User, Role
+
+PREFIX = 'webhook-sim'
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a burst of synthetic, signed gateway webhooks against the "
+        "webhook endpoint and report acknowledgement latency; with --process, "
+        "apply them with the worker pool and report throughput. Uses throwaway "
+        "customers that are deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=20)
+        parser.add_argument('--events', type=int, default=1000)
+        parser.add_argument('--duplicates', type=float, default=0.05, help="Share of events delivered twice")
+        parser.add_argument('--process', action='store_true', help="Run the worker on the burst afterwards")
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--keep', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        secret = getattr(settings, 'STRIPE_WEBHOOK_SECRET', None) or secrets.token_hex(16)
+        customers = self._create_customers(options['customers'])
+        try:
+            events, expected_tiers = self._events(rng, customers, options['events'])
+            deliveries = events + rng.sample(events, int(len(events) * options['duplicates']))
+            factory = RequestFactory(SERVER_NAME='localhost')
+            timings = []
+            with override_settings(STRIPE_WEBHOOK_SECRET=secret):
+                for event in deliveries:
+                    body = json.dumps(event).encode()
+                    request = factory.post('/', body, content_type='application/json', HTTP_STRIPE_SIGNATURE=sign(body, secret))
+                    started = time.perf_counter()
+                    response = stripe_webhook_view(request)
+                    timings.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        self.stderr.write(f"{event['id']}: HTTP {response.status_code} {response.content.decode()}")
+            timings.sort()
+            self.stdout.write(
+                f"Acknowledged {len(deliveries)} deliveries ({len(events)} unique) in {sum(timings):.2f}s: "
+                f"p50 {statistics.median(timings) * 1e3:.2f} ms, p95 {timings[int(len(timings) * 0.95) - 1] * 1e3:.2f} ms, "
+                f"max {timings[-1] * 1e3:.2f} ms"
+            )
+
+            if options['process']:
+                self._process(options['workers'], customers, expected_tiers)
+        finally:
+            if not options['keep']:
+                WebhookEvent.objects.filter(event_id__startswith=f'evt_{PREFIX}').delete()
+                PaymentRecord.objects.filter(user__username__startswith=PREFIX).delete()
+                User.objects.filter(username__startswith=PREFIX).delete()
+
+    @staticmethod
+    def _create_customers(count):
+        customers = []
+        for i in range(count):
+            user = User.objects.create_user(username=f'{PREFIX}-{i}', email=f'{PREFIX}-{i}@example.invalid', role=Role.SEEKER)
+            customer_id = f'cus_{PREFIX}_{i}'
+            Subscription.objects.create(user=user, tier='BASIC', stripe_customer_id=customer_id, stripe_subscription_id=f'sub_{PREFIX}_{i}')
+            intents = [f'pi_{PREFIX}_{i}_{n}' for n in range(5)]
+            for intent in intents:
+                Payment.objects.create(user=user, amount=Decimal('500.00'), description='Report', stripe_payment_intent_id=intent)
+            customers.append((customer_id, f'sub_{PREFIX}_{i}', intents))
+        return customers
+
+    @staticmethod
+    def _events(rng, customers, count):
+        """Random mix of payment, charge and subscription events; returns them and each customer's final tier."""
+        base = int(time.time()) - count
+        events, expected_tiers = [], {}
+        for n in range(count):
+            customer_id, subscription_id, intents = rng.choice(customers)
+            kind = rng.choice(['payment_intent.succeeded', 'payment_intent.payment_failed', 'charge.succeeded', 'customer.subscription.updated'])
+            if kind.startswith('payment_intent'):
+                obj = {'object': 'payment_intent', 'id': rng.choice(intents), 'customer': customer_id}
+            elif kind == 'charge.succeeded':
+                obj = {'object': 'charge', 'id': f'ch_{PREFIX}_{n}', 'customer': customer_id, 'amount': 50000, 'currency': 'php'}
+            else:
+                tier = rng.choice(['BASIC', 'PREMIUM'])
+                expected_tiers[customer_id] = tier
+                obj = {'object': 'subscription', 'id': subscription_id, 'customer': customer_id, 'metadata': {'tier': tier}}
+            events.append({'id': f'evt_{PREFIX}_{n}', 'type': kind, 'created': base + n, 'data': {'object': obj}})
+        return events, expected_tiers
+
+    def _process(self, workers, customers, expected_tiers):
+        started = time.monotonic()
+        applied = 0
+        while True:
+            batch_applied, batch_not_applied = process_pending(workers=workers)
+            applied += batch_applied
+            if not batch_applied and not batch_not_applied:
+                break
+        elapsed = time.monotonic() - started
+        # Subscription updates overwrite each other, so only in-order processing leaves the last tier
+        out_of_order = sum(
+            1 for customer_id, tier in expected_tiers.items()
+            if Subscription.objects.blind_get(stripe_customer_id=customer_id).tier != tier
+        )
+        self.stdout.write(
+            f"Applied {applied} events with {workers} workers in {elapsed:.2f}s ({applied / elapsed:,.0f} events/s); "
+            f"{out_of_order} of {len(expected_tiers)} customers out of order"
+        )
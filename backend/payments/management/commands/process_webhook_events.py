@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.models import WebhookEvent
+from payments.webhooks import process_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply stored gateway webhook events to payments and subscriptions. "
+        "Each customer's events are applied in order on one thread; different "
+        "customers run in parallel. Run a single instance at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new events instead of exiting when idle")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when idle with --loop")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        applied = not_applied = 0
+        while True:
+            batch_applied, batch_not_applied = process_pending(options['workers'], options['batch_size'])
+            applied += batch_applied
+            not_applied += batch_not_applied
+            if batch_applied or batch_not_applied:
+                continue # Failed customers are now backing off and drop out of the next batch
+            if not options['loop']:
+                break
+            time.sleep(options['poll_interval'])
+
+        elapsed = time.monotonic() - started
+        failed = WebhookEvent.objects.filter(status=WebhookEvent.Status.FAILED).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Applied {applied} events in {elapsed:.1f}s ({applied / elapsed if elapsed else 0:,.0f} events/s); "
+            f"{not_applied} deferred for retry, {failed} failed for good"
+        ))
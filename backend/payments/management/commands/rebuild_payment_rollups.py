@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from payments.models import PaymentRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-user payment rollups behind the payments summary "
+        "from the payments table, e.g. after bulk updates that bypassed save()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help="Only this user id (repeatable)")
+
+    def handle(self, *args, **options):
+        rows = PaymentRollup.rebuild(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} payment rollup rows"))
@@ -0,0 +1,125 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import encrypted_model_fields.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='paymentrecord',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.RemoveField(
+            model_name='paymentrecord',
+            name='metadata',
+        ),
+        migrations.RemoveField(
+            model_name='paymentrecord',
+            name='payment_type',
+        ),
+        migrations.AddField(
+            model_name='paymentrecord',
+            name='payment_method',
+            field=encrypted_model_fields.fields.EncryptedCharField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='paymentrecord',
+            name='currency',
+            field=models.CharField(max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='paymentrecord',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='paymentrecord',
+            name='status',
+            field=models.CharField(default='pending', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='paymentrecord',
+            name='stripe_charge_id',
+            field=encrypted_model_fields.fields.EncryptedCharField(unique=True),
+        ),
+        migrations.CreateModel(
+            name='Subscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tier', models.CharField(choices=[('NONE', 'No Subscription'), ('BASIC', 'Basic'), ('PREMIUM', 'Premium')], default='NONE', max_length=10)),
+                ('stripe_customer_id', encrypted_model_fields.fields.EncryptedCharField(blank=True, null=True)),
+                ('stripe_subscription_id', encrypted_model_fields.fields.EncryptedCharField(blank=True, null=True)),
+                ('current_period_end', models.DateTimeField(blank=True, null=True)),
+                ('cancel_at_period_end', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='subscription', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subscription',
+                'verbose_name_plural': 'Subscriptions',
+            },
+        ),
+        migrations.CreateModel(
+            name='PaymentMethod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stripe_payment_method_id', encrypted_model_fields.fields.EncryptedCharField()),
+                ('is_default', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_methods', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Payment Method',
+                'verbose_name_plural': 'Payment Methods',
+            },
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('currency', models.CharField(default='PHP', max_length=3)),
+                ('description', models.CharField(max_length=255)),
+                ('stripe_payment_intent_id', encrypted_model_fields.fields.EncryptedCharField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SUCCESSFUL', 'Successful'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Payment',
+                'verbose_name_plural': 'Payments',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('CREATE', 'Create'), ('UPDATE', 'Update'), ('DELETE', 'Delete'), ('LOGIN', 'Login'), ('LOGOUT', 'Logout'), ('PAYMENT', 'Payment'), ('SUBSCRIPTION', 'Subscription')], max_length=20)),
+                ('model_name', models.CharField(max_length=100)),
+                ('object_id', models.CharField(max_length=100)),
+                ('details', models.JSONField(default=dict)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('user_agent', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_logs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'action', 'created_at'], name='payments_au_user_id_3e63d6_idx'), models.Index(fields=['model_name', 'object_id'], name='payments_au_model_n_4a1665_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_sync_models_with_migrations'),
+        ('core', '0004_unified_audit_store'), # Copies the rows first
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='AuditLog',
+        ),
+    ]
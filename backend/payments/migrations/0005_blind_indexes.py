@@ -0,0 +1,39 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:38
+
+from django.db import migrations, models
+import encrypted_model_fields.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_move_audit_log_to_core'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='stripe_payment_intent_id_bidx',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='paymentrecord',
+            name='stripe_charge_id_bidx',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='subscription',
+            name='stripe_customer_id_bidx',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='subscription',
+            name='stripe_subscription_id_bidx',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='paymentrecord',
+            name='stripe_charge_id',
+            field=encrypted_model_fields.fields.EncryptedCharField(),
+        ),
+    ]
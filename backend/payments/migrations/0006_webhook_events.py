@@ -0,0 +1,37 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:41
+
+from django.db import migrations, models
+import django.utils.timezone
+import encrypted_model_fields.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_blind_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=255, unique=True)),
+                ('type', models.CharField(max_length=100)),
+                ('ordering_key', models.CharField(max_length=255)),
+                ('payload', encrypted_model_fields.fields.EncryptedTextField()),
+                ('event_created', models.DateTimeField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSED', 'Processed'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Webhook Event',
+                'verbose_name_plural': 'Webhook Events',
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['event_created', 'id'], name='pending_webhook_event_idx'), models.Index(condition=models.Q(('status', 'PENDING')), fields=['next_attempt_at'], name='pending_webhook_retry_idx')],
+            },
+        ),
+    ]
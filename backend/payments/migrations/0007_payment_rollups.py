@@ -0,0 +1,69 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_rollups(apps, schema_editor):
+    """Initial rollups for existing payments; same aggregate as PaymentRollup.rebuild()."""
+    Payment = apps.get_model('payments', 'Payment')
+    PaymentRollup = apps.get_model('payments', 'PaymentRollup')
+    newest = Payment.objects.filter(
+        user_id=models.OuterRef('user_id'), currency=models.OuterRef('currency'), status=models.OuterRef('status'),
+    ).order_by('-created_at', '-id')
+    buckets = Payment.objects.order_by().values('user_id', 'currency', 'status').annotate(
+        bucket_count=models.Count('id'), bucket_total=models.Sum('amount'),
+        newest_id=models.Subquery(newest.values('id')[:1]), newest_at=models.Max('created_at'),
+    )
+    PaymentRollup.objects.bulk_create([
+        PaymentRollup(user_id=bucket['user_id'], currency=bucket['currency'], status=bucket['status'],
+                      count=bucket['bucket_count'], total=bucket['bucket_total'],
+                      last_payment_id=bucket['newest_id'], last_payment_at=bucket['newest_at'])
+        for bucket in buckets
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0006_webhook_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('status', models.CharField(max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('last_payment_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Payment Rollup',
+                'verbose_name_plural': 'Payment Rollups',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='payment_user_history_idx'),
+        ),
+        migrations.AddField(
+            model_name='paymentrollup',
+            name='last_payment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='payments.payment'),
+        ),
+        migrations.AddField(
+            model_name='paymentrollup',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_rollups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'currency', 'status'), name='unique_payment_rollup_bucket'),
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
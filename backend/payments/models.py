@@ -1,52 +1,39 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Sum, Value, When
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from encrypted_model_fields.fields import EncryptedCharField, EncryptedEmailField
+import json
 import uuid
 import logging
 
-logger = logging.getLogger(__name__)
+from django.contrib.contenttypes.models import ContentType
 
-class AuditLog(models.Model):
-    """Model for tracking all important system events"""
-    ACTION_TYPES = (
-        ('CREATE', _('Create')),
-        ('UPDATE', _('Update')),
-        ('DELETE', _('Delete')),
-        ('LOGIN', _('Login')),
-        ('LOGOUT', _('Logout')),
-        ('PAYMENT', _('Payment')),
-        ('SUBSCRIPTION', _('Subscription')),
-    )
+from core.audit import audit_sink
+from core.blind_index import BlindIndexMixin, BlindIndexQuerySet, blind_index_field
+from core.fields import EncryptedCharField, EncryptedEmailField, EncryptedQuerySet, EncryptedTextField
+from core.models import AuditLog, ChangeTrackingMixin
 
-    user = models.ForeignKey(
-        settings.AUTH_USER_MODEL,
-        on_delete=models.SET_NULL,
-        null=True,
-        related_name='audit_logs'
-    )
-    action = models.CharField(max_length=20, choices=ACTION_TYPES)
-    model_name = models.CharField(max_length=100)
-    object_id = models.CharField(max_length=100)
-    details = models.JSONField(default=dict)
-    ip_address = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.TextField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+logger = logging.getLogger(__name__)
 
-    class Meta:
-        ordering = ['-created_at']
-        indexes = [
-            models.Index(fields=['user', 'action', 'created_at']),
-            models.Index(fields=['model_name', 'object_id']),
-        ]
+def record_audit(instance, is_new, details):
+    """Append a payments event to the unified audit log, inside the caller's transaction."""
+    audit_sink.record(AuditLog(
+        user_id=instance.user_id, # Avoids loading the user just to log it
+        action=f"{type(instance).__name__} {'created' if is_new else 'updated'}",
+        target_content_type=ContentType.objects.get_for_model(instance),
+        target_object_id=str(instance.pk),
+        details=details,
+    ), sync=True)
 
-    def __str__(self):
-        return f"{self.action} by {self.user} on {self.model_name} at {self.created_at}"
+class PaymentRecord(BlindIndexMixin, ChangeTrackingMixin, models.Model):
+    BLIND_INDEXES = {'stripe_charge_id': 'stripe_charge_id_bidx'}
 
-class PaymentRecord(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='payment_records')
-    stripe_charge_id = EncryptedCharField(max_length=255, unique=True)
+    stripe_charge_id = EncryptedCharField(max_length=255)
+    # Ciphertexts never repeat, so uniqueness is enforced on the blind index
+    stripe_charge_id_bidx = blind_index_field(unique=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=3)
     status = models.CharField(max_length=50, default='pending')
@@ -55,22 +42,20 @@ class PaymentRecord(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BlindIndexQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         is_new = self._state.adding
+        if not is_new and not self.changed_fields:
+            return # Nothing to write or audit
         super().save(*args, **kwargs)
         
         # Create audit log
-        AuditLog.objects.create(
-            user=self.user,
-            action='CREATE' if is_new else 'UPDATE',
-            model_name='PaymentRecord',
-            object_id=str(self.id),
-            details={
-                'amount': str(self.amount),
-                'currency': self.currency,
-                'status': self.status
-            }
-        )
+        record_audit(self, is_new, {
+            'amount': str(self.amount),
+            'currency': self.currency,
+            'status': self.status
+        })
 
     def __str__(self):
         return f"Payment {self.id} by {self.user.username if self.user else 'Unknown User'} - {self.status}"
@@ -78,7 +63,11 @@ class PaymentRecord(models.Model):
     class Meta:
         ordering = ['-created_at']
 
-class Subscription(models.Model):
+class Subscription(BlindIndexMixin, ChangeTrackingMixin, models.Model):
+    BLIND_INDEXES = {
+        'stripe_customer_id': 'stripe_customer_id_bidx',
+        'stripe_subscription_id': 'stripe_subscription_id_bidx',
+    }
     SUBSCRIPTION_TIERS = (
         ('NONE', _('No Subscription')),
         ('BASIC', _('Basic')),
@@ -96,32 +85,29 @@ class Subscription(models.Model):
         default='NONE'
     )
     stripe_customer_id = EncryptedCharField(max_length=100, blank=True, null=True)
+    stripe_customer_id_bidx = blind_index_field(db_index=True)
     stripe_subscription_id = EncryptedCharField(max_length=100, blank=True, null=True)
+    stripe_subscription_id_bidx = blind_index_field(db_index=True)
     current_period_end = models.DateTimeField(null=True, blank=True)
     cancel_at_period_end = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BlindIndexQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         is_new = self._state.adding
-        old_instance = None
-        if not is_new:
-            old_instance = Subscription.objects.get(pk=self.pk)
-        
+        if not is_new and not self.changed_fields:
+            return # Nothing to write or audit
+        old_tier = self.previous_value('tier')
         super().save(*args, **kwargs)
         
         # Create audit log
-        AuditLog.objects.create(
-            user=self.user,
-            action='CREATE' if is_new else 'UPDATE',
-            model_name='Subscription',
-            object_id=str(self.id),
-            details={
-                'tier': self.tier,
-                'old_tier': old_instance.tier if old_instance else None,
-                'cancel_at_period_end': self.cancel_at_period_end
-            }
-        )
+        record_audit(self, is_new, {
+            'tier': self.tier,
+            'old_tier': old_tier,
+            'cancel_at_period_end': self.cancel_at_period_end
+        })
 
     class Meta:
         verbose_name = _('Subscription')
@@ -130,7 +116,8 @@ class Subscription(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.tier}"
 
-class Payment(models.Model):
+class Payment(BlindIndexMixin, ChangeTrackingMixin, models.Model):
+    BLIND_INDEXES = {'stripe_payment_intent_id': 'stripe_payment_intent_id_bidx'}
     PAYMENT_STATUS = (
         ('PENDING', _('Pending')),
         ('SUCCESSFUL', _('Successful')),
@@ -146,6 +133,7 @@ class Payment(models.Model):
     currency = models.CharField(max_length=3, default='PHP')
     description = models.CharField(max_length=255)
     stripe_payment_intent_id = EncryptedCharField(max_length=100, blank=True, null=True)
+    stripe_payment_intent_id_bidx = blind_index_field(db_index=True)
     status = models.CharField(
         max_length=10,
         choices=PAYMENT_STATUS,
@@ -154,37 +142,137 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BlindIndexQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         is_new = self._state.adding
-        old_instance = None
-        if not is_new:
-            old_instance = Payment.objects.get(pk=self.pk)
-        
-        super().save(*args, **kwargs)
-        
-        # Create audit log
-        AuditLog.objects.create(
-            user=self.user,
-            action='CREATE' if is_new else 'UPDATE',
-            model_name='Payment',
-            object_id=str(self.id),
-            details={
+        if not is_new and not self.changed_fields:
+            return # Nothing to write or audit
+        old_status = self.previous_value('status')
+        old_bucket = None if is_new or not self.is_tracked else (
+            self.previous_value('currency'), old_status, self.previous_value('amount'),
+        )
+        # The rollup must never count a write that rolled back, or miss one that committed
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new or self.is_tracked:
+                PaymentRollup.record(self, old_bucket)
+            else:
+                PaymentRollup.rebuild([self.user_id]) # Previous values unknown
+
+            # Create audit log
+            record_audit(self, is_new, {
                 'amount': str(self.amount),
                 'currency': self.currency,
                 'status': self.status,
-                'old_status': old_instance.status if old_instance else None
-            }
-        )
+                'old_status': old_status
+            })
+
+    def delete(self, *args, **kwargs):
+        stored = [self.previous_value(name) if self.is_tracked else getattr(self, name) for name in ('currency', 'status', 'amount')]
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            PaymentRollup.add(self.user_id, stored[0], stored[1], -1, -stored[2])
+        return result
 
     class Meta:
         verbose_name = _('Payment')
         verbose_name_plural = _('Payments')
         ordering = ['-created_at']
+        indexes = [
+            # Payment history pages, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='payment_user_history_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.amount} {self.currency}"
 
-class PaymentMethod(models.Model):
+class PaymentRollup(models.Model):
+    """
+    Per-user payment totals by currency and status, kept current by
+    ``Payment.save()``/``delete()`` with relative updates so the payments
+    summary is one indexed read instead of an aggregate over the history.
+    ``last_payment`` is the newest payment that entered the bucket; the
+    user's latest payment is the one on the bucket with the newest
+    ``last_payment_at``. Writes that bypass the model (``QuerySet.update``,
+    bulk deletes) are repaired by ``manage.py rebuild_payment_rollups``.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='payment_rollups')
+    currency = models.CharField(max_length=3)
+    status = models.CharField(max_length=10)
+    count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_payment = models.ForeignKey('Payment', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_payment_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Payment Rollup')
+        verbose_name_plural = _('Payment Rollups')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'currency', 'status'], name='unique_payment_rollup_bucket'),
+        ]
+
+    @classmethod
+    def add(cls, user_id, currency, status, count, amount, payment=None):
+        """Shift one bucket by ``count`` payments and ``amount``; ``payment`` may become its latest."""
+        bucket = cls.objects.filter(user_id=user_id, currency=currency, status=status)
+        updates = {'count': F('count') + count, 'total': F('total') + amount}
+        if payment is not None:
+            newer = Q(last_payment_at__isnull=True) | Q(last_payment_at__lte=payment.created_at)
+            updates['last_payment'] = Case(When(newer, then=Value(payment.pk)), default=F('last_payment'), output_field=models.BigIntegerField())
+            updates['last_payment_at'] = Case(When(newer, then=Value(payment.created_at)), default=F('last_payment_at'), output_field=models.DateTimeField())
+        if bucket.update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    user_id=user_id, currency=currency, status=status, count=count, total=amount,
+                    last_payment=payment, last_payment_at=payment.created_at if payment else None,
+                )
+        except IntegrityError: # Created concurrently
+            bucket.update(**updates)
+
+    @classmethod
+    def record(cls, payment, old_bucket=None):
+        """Account for a saved payment; ``old_bucket`` is its previous ``(currency, status, amount)``."""
+        new_bucket = (payment.currency, payment.status, payment.amount)
+        if old_bucket == new_bucket:
+            return
+        if old_bucket is None:
+            cls.add(payment.user_id, payment.currency, payment.status, 1, payment.amount, payment)
+        elif old_bucket[:2] == new_bucket[:2]:
+            cls.add(payment.user_id, payment.currency, payment.status, 0, payment.amount - old_bucket[2])
+        else:
+            cls.add(payment.user_id, old_bucket[0], old_bucket[1], -1, -old_bucket[2])
+            cls.add(payment.user_id, payment.currency, payment.status, 1, payment.amount, payment)
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """Recompute the rollups of ``user_ids`` (everyone when None) from the payments table."""
+        payments = Payment.objects.all() if user_ids is None else Payment.objects.filter(user_id__in=user_ids)
+        newest = payments.filter(
+            user_id=OuterRef('user_id'), currency=OuterRef('currency'), status=OuterRef('status'),
+        ).order_by('-created_at', '-id')
+        buckets = payments.order_by().values('user_id', 'currency', 'status').annotate(
+            bucket_count=Count('id'), bucket_total=Sum('amount'),
+            newest_id=Subquery(newest.values('id')[:1]), newest_at=Max('created_at'),
+        )
+        rows = [
+            cls(user_id=bucket['user_id'], currency=bucket['currency'], status=bucket['status'],
+                count=bucket['bucket_count'], total=bucket['bucket_total'],
+                last_payment_id=bucket['newest_id'], last_payment_at=bucket['newest_at'])
+            for bucket in buckets
+        ]
+        stale = cls.objects.all() if user_ids is None else cls.objects.filter(user_id__in=user_ids)
+        with transaction.atomic():
+            stale.delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+    def __str__(self):
+        return f"{self.user_id} {self.currency} {self.status}: {self.count} / {self.total}"
+
+class PaymentMethod(ChangeTrackingMixin, models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -195,24 +283,64 @@ class PaymentMethod(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EncryptedQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         is_new = self._state.adding
+        if not is_new and not self.changed_fields:
+            return # Nothing to write or audit
         super().save(*args, **kwargs)
         
         # Create audit log
-        AuditLog.objects.create(
-            user=self.user,
-            action='CREATE' if is_new else 'UPDATE',
-            model_name='PaymentMethod',
-            object_id=str(self.id),
-            details={
-                'is_default': self.is_default
-            }
-        )
+        record_audit(self, is_new, {
+            'is_default': self.is_default
+        })
 
     class Meta:
         verbose_name = _('Payment Method')
         verbose_name_plural = _('Payment Methods')
 
     def __str__(self):
-        return f"{self.user.email} - {self.stripe_payment_method_id}"
\ No newline at end of file
+        return f"{self.user.email} - {self.stripe_payment_method_id}"
+
+class WebhookEvent(models.Model):
+    """
+    A gateway webhook as received, stored before it is acknowledged and
+    applied later by ``manage.py process_webhook_events``. The unique
+    ``event_id`` makes redelivered events no-ops. Events sharing an
+    ``ordering_key`` (the customer) are applied strictly in ``event_created``
+    order; a failing event holds back that customer's later events.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        PROCESSED = 'PROCESSED', _('Processed')
+        FAILED = 'FAILED', _('Failed') # Out of retries
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    # Blind index of the gateway customer id, or the event id for events without one
+    ordering_key = models.CharField(max_length=255)
+    payload = EncryptedTextField() # JSON; holds gateway ids and amounts
+    event_created = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Webhook Event')
+        verbose_name_plural = _('Webhook Events')
+        indexes = [
+            # The worker only ever reads pending events: oldest first, and those backing off
+            models.Index(fields=['event_created', 'id'], condition=models.Q(status='PENDING'), name='pending_webhook_event_idx'),
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='PENDING'), name='pending_webhook_retry_idx'),
+        ]
+
+    @property
+    def data(self):
+        return json.loads(self.payload)
+
+    def __str__(self):
+        return f"{self.type} {self.event_id} ({self.status})"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import PaymentRecord, Subscription, Payment, PaymentMethod
+from .models import PaymentRecord, Subscription, Payment, PaymentMethod, PaymentRollup
 
 class PaymentRecordSerializer(serializers.ModelSerializer):
     class Meta:
@@ -40,6 +40,19 @@ class PaymentSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'amount', 'currency', 'status', 'payment_method', 'created_at', 'updated_at']
         read_only_fields = ['user', 'created_at', 'updated_at']
 
+class PaymentHistorySerializer(serializers.ModelSerializer):
+    """Light row for history pages; the view loads only these columns (no encrypted ones)."""
+    class Meta:
+        model = Payment
+        fields = ['id', 'amount', 'currency', 'status', 'description', 'created_at']
+        read_only_fields = fields
+
+class PaymentRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PaymentRollup
+        fields = ['currency', 'status', 'count', 'total']
+        read_only_fields = fields
+
 class PaymentMethodSerializer(serializers.ModelSerializer):
     class Meta:
         model = PaymentMethod
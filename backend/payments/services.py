@@ -260,9 +260,14 @@
 from django.conf import settings
 # from django.urls import reverse # Not needed for simulated success URL
 from .models import PaymentRecord # Ensure this model exists
+from . import webhooks
 from users.models import User # Assuming your User model is in 'users.models'
+import json
+import logging
 import uuid # For generating dummy IDs
 
+logger = logging.getLogger(__name__)
+
 # stripe.api_key = settings.STRIPE_SECRET_KEY # This line is no longer essential for simulation
 
 class PaymentService:
@@ -315,14 +320,23 @@ class PaymentService:
 
     def handle_webhook_event(self, payload, sig_header):
         """
-        MODIFIED: This webhook will not be called in the simulated flow.
-        If it were, it would do nothing or log that it's in simulation mode.
+        Verify and store a gateway webhook for ``manage.py process_webhook_events``.
+        Nothing is applied here so the gateway gets its acknowledgement at once;
+        redelivered events are stored once. Returns ``(body, status_code)``.
         """
-        print("SIMULATION MODE: Stripe webhook endpoint hit, but no action taken as Stripe is not used.")
-        # In a real scenario with Stripe disabled, this shouldn't be reached
-        # unless something is misconfigured.
-        # If you want to test the webhook endpoint structure, you could simulate an event here.
-        return {"status": "simulated_webhook_received"}, 200
+        secret = getattr(settings, 'STRIPE_WEBHOOK_SECRET', None)
+        if not secret:
+            logger.error("Webhook received but STRIPE_WEBHOOK_SECRET is not configured")
+            return {"error": "Webhooks are not configured"}, 503
+        try:
+            webhooks.verify_signature(payload, sig_header, secret)
+            event = json.loads(payload)
+            webhooks.store_event(event)
+        except webhooks.SignatureError as e:
+            return {"error": str(e)}, 400
+        except (ValueError, KeyError, TypeError):
+            return {"error": "Malformed event"}, 400
+        return {"status": "received"}, 200
 
     def fulfill_order_simulated(self, user, amount_in_cents, currency, description):
         """
@@ -1,3 +1,208 @@
-from django.test import TestCase
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.blind_index import blind_index
+from core.models import AuditLog
+from users.models import User, Role
+from rest_framework.test import APIClient
+
+from .models import Payment, PaymentRecord, PaymentRollup, Subscription, WebhookEvent
+from .webhooks import process_pending, sign
+
+
+class ChangeTrackingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='provider', email='provider@example.com', password='pass1234!', role=Role.PROVIDER)
+        self.payment = Payment.objects.create(user=self.user, amount=Decimal('100.00'), description='Report')
+
+    def test_update_writes_changed_columns_without_reading_first(self):
+        Payment.objects.create(user=self.user, amount=Decimal('50.00'), description='Other', status='SUCCESSFUL')
+        payment = Payment.objects.get(pk=self.payment.pk)
+        payment.status = 'SUCCESSFUL'
+        self.assertEqual(payment.changed_fields, {'status'})
+        self.assertEqual(payment.previous_value('status'), 'PENDING')
+        # SAVEPOINT, UPDATE, two rollup bucket UPDATEs, audit INSERT, RELEASE
+        with self.assertNumQueries(6) as queries:
+            payment.save()
+        self.assertIn('"status"', queries.captured_queries[1]['sql'])
+        self.assertNotIn('"description"', queries.captured_queries[1]['sql'])
+        self.assertEqual(AuditLog.objects.filter(action='Payment updated').get().details['old_status'], 'PENDING')
+        self.assertEqual(payment.changed_fields, set())
+
+    def test_unchanged_save_is_skipped(self):
+        subscription = Subscription.objects.create(user=self.user, tier='BASIC')
+        subscription = Subscription.objects.get(pk=subscription.pk)
+        with self.assertNumQueries(0):
+            subscription.save()
+            self.payment.save()
+        subscription.tier = 'PREMIUM'
+        subscription.save()
+        self.assertEqual(AuditLog.objects.filter(action='Subscription updated').get().details['old_tier'], 'BASIC')
+
+
+class BlindIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='provider', email='provider@example.com', password='pass1234!', role=Role.PROVIDER)
+        self.record = PaymentRecord.objects.create(user=self.user, stripe_charge_id='ch_123', amount=Decimal('10.00'), currency='PHP')
+
+    def test_digest_is_kept_in_sync_and_enforces_uniqueness(self):
+        self.assertEqual(PaymentRecord.objects.blind_get(stripe_charge_id='ch_123'), self.record)
+        with self.assertRaises(IntegrityError):
+            PaymentRecord.objects.create(user=self.user, stripe_charge_id='ch_123', amount=Decimal('5.00'), currency='PHP')
+
+    def test_digest_follows_the_encrypted_value(self):
+        payment = Payment.objects.create(user=self.user, amount=Decimal('1.00'), description='Report', stripe_payment_intent_id='pi_1')
+        payment = Payment.objects.get(pk=payment.pk)
+        payment.stripe_payment_intent_id = 'pi_2'
+        payment.save()
+        self.assertFalse(Payment.objects.blind_exists(stripe_payment_intent_id='pi_1'))
+        self.assertEqual(Payment.objects.blind_filter(stripe_payment_intent_id='pi_2').get(), payment)
+        with self.assertRaises(ValueError):
+            Payment.objects.blind_filter(description='Report')
+
+    def test_backfill_and_key_rotation(self):
+        PaymentRecord.objects.update(stripe_charge_id_bidx=None)
+        Subscription.objects.create(user=self.user, stripe_customer_id='cus_1')
+        call_command('backfill_blind_indexes', stdout=StringIO())
+        self.assertEqual(PaymentRecord.objects.get().stripe_charge_id_bidx, blind_index('ch_123'))
+
+        with override_settings(BLIND_INDEX_KEY='rotated'):
+            self.assertFalse(PaymentRecord.objects.blind_exists(stripe_charge_id='ch_123'))
+            call_command('backfill_blind_indexes', all=True, stdout=StringIO())
+            self.assertTrue(PaymentRecord.objects.blind_exists(stripe_charge_id='ch_123'))
+            self.assertTrue(Subscription.objects.blind_exists(stripe_customer_id='cus_1'))
+
+    def test_admin_search_matches_the_charge_id_exactly(self):
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass1234!')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:payments_paymentrecord_changelist'), {'q': 'ch_123'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.record])
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET='whsec_test', WEBHOOK_MAX_ATTEMPTS=3)
+class WebhookTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='provider', email='provider@example.com', password='pass1234!', role=Role.PROVIDER)
+        Subscription.objects.create(user=self.user, tier='BASIC', stripe_customer_id='cus_1')
+        self.created = int(time.time())
+
+    def deliver(self, event_id, type, obj, created=0, secret='whsec_test'):
+        body = json.dumps({'id': event_id, 'type': type, 'created': self.created + created, 'data': {'object': obj}}).encode()
+        return self.client.post(reverse('stripe_webhook'), body, content_type='application/json',
+                                HTTP_STRIPE_SIGNATURE=sign(body, secret))
+
+    def subscription_update(self, event_id, tier, created):
+        return self.deliver(event_id, 'customer.subscription.updated',
+                            {'object': 'subscription', 'id': 'sub_1', 'customer': 'cus_1', 'metadata': {'tier': tier}}, created)
+
+    def test_events_are_stored_once_and_acknowledged_before_processing(self):
+        self.assertEqual(self.subscription_update('evt_1', 'PREMIUM', 0).status_code, 200)
+        self.assertEqual(self.subscription_update('evt_1', 'PREMIUM', 0).status_code, 200)
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.Status.PENDING)
+        self.assertEqual(Subscription.objects.get().tier, 'BASIC')
+        self.assertEqual(self.deliver('evt_2', 'charge.succeeded', {}, secret='wrong').status_code, 400)
+        with override_settings(STRIPE_WEBHOOK_SECRET=None):
+            self.assertEqual(self.subscription_update('evt_3', 'PREMIUM', 0).status_code, 503)
+
+    def test_events_are_applied_in_order_per_customer(self):
+        self.subscription_update('evt_late', 'BASIC', 2)
+        self.subscription_update('evt_early', 'PREMIUM', 1)
+        self.deliver('evt_charge', 'charge.succeeded', {'object': 'charge', 'id': 'ch_1', 'customer': 'cus_1', 'amount': 1500, 'currency': 'php'}, 3)
+        self.assertEqual(process_pending(workers=1), (3, 0))
+        self.assertEqual(Subscription.objects.blind_get(stripe_subscription_id='sub_1').tier, 'BASIC')
+        record = PaymentRecord.objects.blind_get(stripe_charge_id='ch_1')
+        self.assertEqual((record.user, record.amount, record.status), (self.user, Decimal('15.00'), 'succeeded'))
+
+    def test_failures_hold_back_the_customer_and_are_retried(self):
+        self.deliver('evt_pay', 'payment_intent.succeeded', {'object': 'payment_intent', 'id': 'pi_1', 'customer': 'cus_1'}, 0)
+        self.subscription_update('evt_sub', 'PREMIUM', 1)
+        self.assertEqual(process_pending(workers=1), (0, 2))
+        self.assertEqual(process_pending(workers=1), (0, 0)) # Backing off
+        self.assertEqual(Subscription.objects.get().tier, 'BASIC')
+
+        payment = Payment.objects.create(user=self.user, amount=Decimal('5.00'), description='Report', stripe_payment_intent_id='pi_1')
+        WebhookEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(process_pending(workers=1), (2, 0))
+        payment.refresh_from_db()
+        self.assertEqual((payment.status, Subscription.objects.get().tier), ('SUCCESSFUL', 'PREMIUM'))
+
+        self.deliver('evt_missing', 'payment_intent.succeeded', {'object': 'payment_intent', 'id': 'pi_x', 'customer': 'cus_1'}, 2)
+        for _ in range(3):
+            WebhookEvent.objects.update(next_attempt_at=timezone.now())
+            process_pending(workers=1)
+        self.assertEqual(WebhookEvent.objects.get(event_id='evt_missing').status, WebhookEvent.Status.FAILED)
+
+
+class PaymentHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='provider', email='provider@example.com', password='pass1234!', role=Role.PROVIDER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.payments = [
+            Payment.objects.create(user=self.user, amount=Decimal('100.00'), description=f'Report {i}', stripe_payment_intent_id=f'pi_{i}')
+            for i in range(5)
+        ]
+
+    def test_history_is_cursor_paginated_without_encrypted_columns(self):
+        seen, url = [], reverse('payment-history') + '?page_size=2'
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                seen.extend(row['id'] for row in response.data['results'])
+                url = response.data['next']
+        self.assertEqual(seen, [payment.pk for payment in reversed(self.payments)])
+        self.assertNotIn('stripe_payment_intent_id', ' '.join(query['sql'] for query in queries.captured_queries))
+
+    def test_history_keeps_payments_sharing_a_millisecond(self):
+        moment = timezone.now().replace(microsecond=789000)
+        for i, payment in enumerate(self.payments):
+            payment.created_at = moment + timedelta(microseconds=i)
+        Payment.objects.bulk_update(self.payments, ['created_at'])
+        seen, url = [], reverse('payment-history') + '?page_size=1'
+        while url:
+            response = self.client.get(url)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, [payment.pk for payment in reversed(self.payments)])
+
+    def test_rollup_rolls_back_with_a_failed_save(self):
+        before = set(PaymentRollup.objects.values_list('currency', 'status', 'count', 'total'))
+        payment = Payment.objects.get(pk=self.payments[0].pk)
+        payment.status = 'SUCCESSFUL'
+        with mock.patch('payments.models.record_audit', side_effect=IntegrityError), self.assertRaises(IntegrityError):
+            payment.save()
+        self.assertEqual(set(PaymentRollup.objects.values_list('currency', 'status', 'count', 'total')), before)
+        self.assertEqual(Payment.objects.get(pk=payment.pk).status, 'PENDING')
+
+    def test_summary_follows_saves_and_deletes(self):
+        payment = Payment.objects.get(pk=self.payments[0].pk)
+        payment.status = 'SUCCESSFUL'
+        payment.save()
+        payment.amount = Decimal('250.00')
+        payment.save()
+        Payment.objects.get(pk=self.payments[1].pk).delete()
+        Payment.objects.create(user=self.user, amount=Decimal('10.00'), currency='USD', description='Report')
+
+        with self.assertNumQueries(1):
+            summary = self.client.get(reverse('payment-summary')).data
+        totals = {(row['currency'], row['status']): (row['count'], row['total']) for row in summary['totals']}
+        self.assertEqual(summary['count'], 5)
+        self.assertEqual(totals, {
+            ('PHP', 'PENDING'): (3, '300.00'), ('PHP', 'SUCCESSFUL'): (1, '250.00'), ('USD', 'PENDING'): (1, '10.00'),
+        })
+        self.assertEqual(summary['last_payment']['currency'], 'USD')
+
+        incremental = set(PaymentRollup.objects.filter(count__gt=0).values_list('currency', 'status', 'count', 'total', 'last_payment'))
+        call_command('rebuild_payment_rollups', stdout=StringIO())
+        self.assertEqual(set(PaymentRollup.objects.values_list('currency', 'status', 'count', 'total', 'last_payment')), incremental)
@@ -18,5 +18,6 @@ router.register(r'payments', views.PaymentViewSet, basename='payment')
 router.register(r'payment-methods', views.PaymentMethodViewSet, basename='payment-method')
 
 urlpatterns = [
+    path('webhook/', views.stripe_webhook_view, name='stripe_webhook'), # This is not an APIView
     path('', include(router.urls)),
 ]
\ No newline at end of file
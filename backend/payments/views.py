@@ -3,12 +3,19 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.conf import settings
+from django.http import JsonResponse
 from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
-from .models import Subscription, Payment, PaymentMethod
+from core.pagination import KeysetPagination
+from .models import Subscription, Payment, PaymentMethod, PaymentRollup
+from .services import PaymentService
 from .serializers import (
     SubscriptionSerializer,
     PaymentSerializer,
+    PaymentHistorySerializer,
+    PaymentRollupSerializer,
     PaymentMethodSerializer,
     CheckoutSessionSerializer,
 )
@@ -40,6 +47,13 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
         subscription.save()
         return Response({'status': 'success'})
 
+class PaymentHistoryPagination(KeysetPagination):
+    model = Payment
+    # Backed by payment_user_history_idx
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    max_page_size = 100
+
 class PaymentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = PaymentSerializer
@@ -49,8 +63,30 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def history(self, request):
-        payments = self.get_queryset()
-        return Response(self.get_serializer(payments, many=True).data)
+        payments = self.get_queryset().only(*PaymentHistorySerializer.Meta.fields)
+        paginator = PaymentHistoryPagination()
+        page = paginator.paginate_queryset(payments, request, view=self)
+        return paginator.get_paginated_response(PaymentHistorySerializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Totals per currency and status, payment count and latest payment, from the rollup table."""
+        buckets = [
+            bucket for bucket in PaymentRollup.objects.filter(user=request.user)
+            .select_related('last_payment').only(
+                'currency', 'status', 'count', 'total', 'last_payment_at',
+                *(f'last_payment__{name}' for name in PaymentHistorySerializer.Meta.fields),
+            )
+            if bucket.count
+        ]
+        latest = max(
+            (bucket for bucket in buckets if bucket.last_payment_at), key=lambda bucket: bucket.last_payment_at, default=None,
+        )
+        return Response({
+            'count': sum(bucket.count for bucket in buckets),
+            'totals': PaymentRollupSerializer(buckets, many=True).data,
+            'last_payment': PaymentHistorySerializer(latest.last_payment).data if latest and latest.last_payment else None,
+        })
 
     @action(detail=False, methods=['post'])
     def create_checkout_session(self, request):
@@ -74,4 +110,16 @@ class PaymentMethodViewSet(viewsets.ModelViewSet):
         return Response({
             'message': 'Payment functionality is disabled in this environment',
             'status': 'disabled'
-        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
\ No newline at end of file
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+@csrf_exempt
+@require_POST
+def stripe_webhook_view(request):
+    """
+    Gateway webhook receiver. A plain Django view rather than an APIView: no
+    authentication, parsing or throttling stands between the gateway and the
+    acknowledgement, which only needs the signature check and one INSERT.
+    """
+    body, status_code = PaymentService().handle_webhook_event(request.body, request.headers.get('Stripe-Signature'))
+    return JsonResponse(body, status=status_code)
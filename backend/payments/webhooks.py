@@ -0,0 +1,182 @@
+"""
+Gateway webhook pipeline.
+
+Receiving (``PaymentService.handle_webhook_event``) only verifies the
+signature and inserts a WebhookEvent row, so the gateway is acknowledged
+within a single INSERT. ``process_pending`` applies stored events to
+Payment, PaymentRecord and Subscription: each customer's events run in
+order on one thread, different customers run in parallel, and failures are
+retried with exponential backoff until ``WEBHOOK_MAX_ATTEMPTS``.
+
+Signatures follow the Stripe scheme, ``t=<unix time>,v1=<hex HMAC-SHA256 of
+"<t>.<body>">``, so the same endpoint serves the real gateway and
+``manage.py generate_webhook_events``.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import groupby
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.blind_index import blind_index
+from .models import Payment, PaymentRecord, Subscription, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_TOLERANCE = 300 # seconds
+
+
+class SignatureError(ValueError):
+    pass
+
+
+def sign(payload, secret, timestamp=None):
+    """``Stripe-Signature`` header value for ``payload`` (bytes)."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f'{timestamp}.'.encode() + payload, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+def verify_signature(payload, header, secret, tolerance=SIGNATURE_TOLERANCE):
+    try:
+        parts = [item.split('=', 1) for item in (header or '').split(',')]
+        timestamp = int(next(value for key, value in parts if key == 't'))
+        signatures = [value for key, value in parts if key == 'v1']
+    except (ValueError, StopIteration):
+        raise SignatureError("Malformed signature header")
+    if abs(time.time() - timestamp) > tolerance:
+        raise SignatureError("Signature timestamp outside the tolerance")
+    expected = sign(payload, secret, timestamp).split('v1=', 1)[1]
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise SignatureError("No matching signature")
+
+
+def store_event(event):
+    """Persist a parsed event; a redelivered event id is silently ignored."""
+    obj = event['data']['object']
+    customer = obj.get('id') if obj.get('object') == 'customer' else obj.get('customer')
+    WebhookEvent.objects.bulk_create([WebhookEvent(
+        event_id=event['id'],
+        type=event['type'],
+        ordering_key=blind_index(customer) if customer else event['id'],
+        payload=json.dumps(event, separators=(',', ':')),
+        event_created=datetime.fromtimestamp(event.get('created') or time.time(), tz=dt_timezone.utc),
+    )], ignore_conflicts=True)
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value, tz=dt_timezone.utc) if value else None
+
+
+def _payment_intent(obj, status):
+    payment = Payment.objects.blind_get(stripe_payment_intent_id=obj['id'])
+    payment.status = status
+    payment.save()
+
+
+def _charge(obj, status):
+    record = PaymentRecord.objects.blind_filter(stripe_charge_id=obj['id']).first()
+    if record is None:
+        subscription = Subscription.objects.blind_filter(stripe_customer_id=obj['customer']).select_related('user').first()
+        record = PaymentRecord(
+            stripe_charge_id=obj['id'],
+            user=subscription.user if subscription else None,
+            amount=Decimal(obj['amount']) / 100,
+            currency=obj['currency'].upper(),
+            description=obj.get('description'),
+        )
+    record.status = status
+    record.save()
+
+
+def _subscription(obj, deleted=False):
+    subscription = (
+        Subscription.objects.blind_filter(stripe_subscription_id=obj['id']).first()
+        or Subscription.objects.blind_get(stripe_customer_id=obj['customer'])
+    )
+    subscription.stripe_subscription_id = obj['id']
+    subscription.tier = 'NONE' if deleted else obj.get('metadata', {}).get('tier', subscription.tier)
+    subscription.current_period_end = _timestamp(obj.get('current_period_end'))
+    subscription.cancel_at_period_end = bool(obj.get('cancel_at_period_end'))
+    subscription.save()
+
+
+HANDLERS = {
+    'payment_intent.succeeded': lambda obj: _payment_intent(obj, 'SUCCESSFUL'),
+    'payment_intent.payment_failed': lambda obj: _payment_intent(obj, 'FAILED'),
+    'charge.succeeded': lambda obj: _charge(obj, 'succeeded'),
+    'charge.failed': lambda obj: _charge(obj, 'failed'),
+    'charge.refunded': lambda obj: _charge(obj, 'refunded'),
+    'customer.subscription.created': _subscription,
+    'customer.subscription.updated': _subscription,
+    'customer.subscription.deleted': lambda obj: _subscription(obj, deleted=True),
+}
+
+
+def apply_event(event):
+    """Apply one WebhookEvent and record the outcome; returns True on success."""
+    handler = HANDLERS.get(event.type)
+    try:
+        with transaction.atomic():
+            if handler is not None: # Types we do not act on are acknowledged and dropped
+                handler(event.data['data']['object'])
+            event.status = WebhookEvent.Status.PROCESSED
+            event.processed_at = timezone.now()
+            event.attempts += 1
+            event.last_error = ''
+            event.save(update_fields=['status', 'processed_at', 'attempts', 'last_error'])
+        return True
+    except Exception as exc:
+        event.status, event.processed_at = WebhookEvent.Status.PENDING, None # The transaction was rolled back
+        event.attempts += 1
+        event.last_error = f'{type(exc).__name__}: {exc}'
+        if event.attempts >= getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 8):
+            event.status = WebhookEvent.Status.FAILED
+            logger.error("Webhook event %s failed for good: %s", event.event_id, event.last_error)
+        else:
+            delay = getattr(settings, 'WEBHOOK_RETRY_BASE_DELAY', 5) * 2 ** (event.attempts - 1)
+            event.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        event.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+        return False
+
+
+def _apply_in_order(events, close_connection=False):
+    applied = 0
+    try:
+        for event in events:
+            if not apply_event(event):
+                break # Later events of this customer wait for the failed one
+            applied += 1
+    finally:
+        if close_connection:
+            connection.close() # Pool threads each hold their own connection
+    return applied, len(events) - applied
+
+
+def process_pending(workers=4, batch_size=500):
+    """
+    Apply one batch of due events. Customers with an event still backing off
+    are skipped entirely, so nothing overtakes the failed event. Returns
+    ``(applied, not_applied)``; the caller loops until nothing is due.
+    """
+    pending = WebhookEvent.objects.filter(status=WebhookEvent.Status.PENDING)
+    backing_off = pending.filter(next_attempt_at__gt=timezone.now()).values('ordering_key')
+    batch = list(pending.exclude(ordering_key__in=backing_off).order_by('event_created', 'id')[:batch_size])
+    batch.sort(key=lambda event: event.ordering_key) # Stable: keeps event order within a customer
+    groups = [list(events) for _, events in groupby(batch, key=lambda event: event.ordering_key)]
+    if connection.vendor == 'sqlite':
+        workers = 1 # One writer at a time; threads would only fail on the database lock
+    if workers <= 1 or len(groups) <= 1:
+        results = [_apply_in_order(events) for events in groups]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda events: _apply_in_order(events, close_connection=True), groups))
+    return sum(applied for applied, _ in results), sum(skipped for _, skipped in results)
@@ -0,0 +1,136 @@
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'ph_regions.json'
+
+# Shorter prefixes than this are too ambiguous to resolve ("m", "sa", ...)
+MIN_PREFIX_LENGTH = 3
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_SEPARATORS = re.compile(r'[,;/|]')
+
+
+def normalize_place(value):
+    """'Parañaque City' -> 'paranaque city', 'Lapu-Lapu' -> 'lapu lapu'."""
+    if not value:
+        return ''
+    text = unicodedata.normalize('NFKD', str(value))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    return _NON_ALNUM.sub(' ', text).strip()
+
+
+def _variants(name):
+    """The name itself, then without a 'City of' prefix or 'City' suffix."""
+    yield name
+    if name.startswith('city of '):
+        yield name[len('city of '):]
+    if name.endswith(' city'):
+        yield name[:-len(' city')]
+
+
+class _TrieNode:
+    __slots__ = ('children', 'region_ids')
+
+    def __init__(self):
+        self.children = {}
+        self.region_ids = set()
+
+
+class PrefixTrie:
+    """Character trie from normalized place names to the region ids they belong to."""
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def insert(self, name, region_id):
+        node = self._root
+        for char in name:
+            node = node.children.setdefault(char, _TrieNode())
+        node.region_ids.add(region_id)
+
+    def _find(self, name):
+        node = self._root
+        for char in name:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def exact(self, name):
+        node = self._find(name)
+        return frozenset(node.region_ids) if node else frozenset()
+
+    def prefixed(self, prefix):
+        """Region ids of every name starting with ``prefix``."""
+        node = self._find(prefix)
+        if node is None:
+            return frozenset()
+        region_ids, stack = set(), [node]
+        while stack:
+            node = stack.pop()
+            region_ids |= node.region_ids
+            stack.extend(node.children.values())
+        return frozenset(region_ids)
+
+
+class Gazetteer:
+    """
+    Offline lookup from free-text Philippine locations to canonical region ids
+    (ISO 3166-2:PH codes), so 'Metro Manila', 'NCR' and 'Makati City' all
+    canonicalize to 'PH-00'.
+    """
+
+    def __init__(self, regions):
+        self.names = {}
+        self._trie = PrefixTrie()
+        for region in regions:
+            self.names[region['id']] = region['name']
+            for name in (region['id'], region['name'], *region.get('aliases', ())):
+                self._trie.insert(normalize_place(name), region['id'])
+
+    @classmethod
+    def load(cls, path=GAZETTEER_PATH):
+        with open(path, encoding='utf-8') as handle:
+            return cls(json.load(handle)['regions'])
+
+    def canonicalize(self, location):
+        """
+        Region id for a stored location such as 'Makati City, Metro Manila,
+        Philippines', or '' if no comma-separated part is a known place. Only
+        exact names count here; prefixes are for search queries.
+        """
+        for part in _SEPARATORS.split(location or ''):
+            for name in _variants(normalize_place(part)):
+                region_ids = self._trie.exact(name)
+                if len(region_ids) == 1:
+                    return next(iter(region_ids))
+        return ''
+
+    def regions_for(self, *locations):
+        """Canonical region ids covered by any of the given locations."""
+        region_ids = {self.canonicalize(location) for location in locations}
+        region_ids.discard('')
+        return frozenset(region_ids)
+
+    def resolve(self, query):
+        """
+        Region ids a search string refers to: an exact place name first, else
+        every place starting with it ('davao d' -> Davao Region). Empty when
+        nothing matches, so callers can fall back to text matching.
+        """
+        query = normalize_place(query)
+        for name in _variants(query):
+            region_ids = self._trie.exact(name)
+            if region_ids:
+                return region_ids
+        if len(query) < MIN_PREFIX_LENGTH:
+            return frozenset()
+        return self._trie.prefixed(query)
+
+
+@lru_cache(maxsize=None)
+def get_gazetteer():
+    return Gazetteer.load()
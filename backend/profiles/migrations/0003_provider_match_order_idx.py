@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='providerprofile',
+            index=models.Index(fields=['-subscription_tier', '-updated_at', '-id'], name='provider_match_order_idx'),
+        ),
+    ]
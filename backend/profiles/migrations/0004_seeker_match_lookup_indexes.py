@@ -0,0 +1,21 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_provider_match_order_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='seekerprofile',
+            index=models.Index(fields=['industry'], name='seeker_industry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seekerprofile',
+            index=models.Index(fields=['location'], name='seeker_location_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from profiles.gazetteer import get_gazetteer
+
+
+def backfill_regions(apps, schema_editor):
+    gazetteer = get_gazetteer()
+    SeekerProfile = apps.get_model('profiles', 'SeekerProfile')
+    ProviderProfile = apps.get_model('profiles', 'ProviderProfile')
+    ProviderRegion = apps.get_model('profiles', 'ProviderRegion')
+
+    for Model in (SeekerProfile, ProviderProfile):
+        for profile in Model.objects.only('id', 'location').iterator(chunk_size=1000):
+            region = gazetteer.canonicalize(profile.location)
+            if region:
+                Model.objects.filter(pk=profile.pk).update(region=region)
+
+    coverage = []
+    for profile in ProviderProfile.objects.only('id', 'location', 'geos_served').iterator(chunk_size=1000):
+        regions = gazetteer.regions_for(profile.location, *(profile.geos_served or []))
+        coverage.extend(ProviderRegion(provider_id=profile.pk, region=region) for region in regions)
+    ProviderRegion.objects.bulk_create(coverage, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_seeker_match_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='providerprofile',
+            name='region',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='seekerprofile',
+            name='region',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16),
+        ),
+        migrations.CreateModel(
+            name='ProviderRegion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(db_index=True, max_length=16)),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coverage', to='profiles.providerprofile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='providerregion',
+            constraint=models.UniqueConstraint(fields=('provider', 'region'), name='unique_provider_region'),
+        ),
+        migrations.RunPython(backfill_regions, migrations.RunPython.noop),
+    ]
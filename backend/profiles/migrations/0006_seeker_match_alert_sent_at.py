@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_profile_regions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seekerprofile',
+            name='match_alert_sent_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -2,7 +2,8 @@ from django.db import models
 from django.conf import settings
 from cryptography.fernet import Fernet # For django-cryptography
 # from django_cryptography.fields import EncryptedCharField, EncryptedURLField # PII Encryption
-from encrypted_model_fields.fields import EncryptedTextField
+from core.fields import EncryptedQuerySet, EncryptedTextField
+from .gazetteer import get_gazetteer
 
 
 
@@ -14,6 +15,8 @@ class BaseProfile(models.Model):
     company_name = models.CharField(max_length=255, blank=True)
     # Location can be more structured (city, region, country) for better filtering
     location = models.CharField(max_length=255, help_text="e.g., City, Region, Country")
+    # Canonical region id derived from location on save (see profiles.gazetteer)
+    region = models.CharField(max_length=16, blank=True, db_index=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -23,6 +26,14 @@ class BaseProfile(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.company_name or 'Profile'}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'location' in update_fields:
+            self.region = get_gazetteer().canonicalize(self.location)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'region'}
+        super().save(*args, **kwargs)
+
 class SeekerProfile(BaseProfile):
     industry = models.CharField(max_length=100, help_text="e.g., Manufacturing, Retail, Technology")
     # Encrypted PII Field example:
@@ -34,6 +45,17 @@ class SeekerProfile(BaseProfile):
         help_text="Secure URL to the rating report (encrypted at rest)"
     )
     # Add other seeker-specific fields
+    # Last match alert digest, for MATCH_ALERT_MIN_INTERVAL (see matching.alerts)
+    match_alert_sent_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = EncryptedQuerySet.as_manager()
+
+    class Meta(BaseProfile.Meta):
+        indexes = [
+            # Finding seekers affected by a provider change (matching.top_matches)
+            models.Index(fields=['industry'], name='seeker_industry_idx'),
+            models.Index(fields=['location'], name='seeker_location_idx'),
+        ]
 
 class ProviderProfile(BaseProfile):
     # Service types could be a JSONField or a ManyToManyField to a ServiceType model
@@ -60,4 +82,47 @@ class ProviderProfile(BaseProfile):
         choices=SubscriptionTier.choices,
         default=SubscriptionTier.NONE
     )
-    # Add other provider-specific fields
\ No newline at end of file
+    # Add other provider-specific fields
+
+    @property
+    def covered_regions(self):
+        """Canonical region ids of the provider's location and every area in geos_served."""
+        return get_gazetteer().regions_for(self.location, *(self.geos_served or []))
+
+    # (location, geos_served) the stored ProviderRegion rows were derived from; None if unknown
+    synced_coverage = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.synced_coverage = instance.coverage_source()
+        return instance
+
+    def coverage_source(self):
+        """The values ``covered_regions`` is computed from, without loading deferred fields."""
+        loaded = self.__dict__
+        if 'location' not in loaded or 'geos_served' not in loaded:
+            return None
+        return loaded['location'], tuple(loaded['geos_served'] or ())
+
+    class Meta(BaseProfile.Meta):
+        indexes = [
+            # Keyset pagination order for matching (premium first, newest first)
+            models.Index(fields=['-subscription_tier', '-updated_at', '-id'], name='provider_match_order_idx'),
+        ]
+
+class ProviderRegion(models.Model):
+    """
+    One row per canonical region a provider covers, kept in sync with
+    location/geos_served on save, so geo matching is an indexed equality.
+    """
+    provider = models.ForeignKey(ProviderProfile, on_delete=models.CASCADE, related_name='coverage')
+    region = models.CharField(max_length=16, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'region'], name='unique_provider_region'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider_id} covers {self.region}"
@@ -1,7 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.conf import settings
-from .models import SeekerProfile, ProviderProfile
+from .models import SeekerProfile, ProviderProfile, ProviderRegion
 from users.models import Role # Assuming User model is in users.models
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -13,19 +13,34 @@ def create_user_profile(sender, instance, created, **kwargs):
             ProviderProfile.objects.create(user=instance)
         # Admin users might not need a specific profile, or you can define one
 
+# User fields the profiles depend on; saves that touch none of them (login's last_login) skip the sync
+PROFILE_USER_FIELDS = {'role'}
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def save_user_profile(sender, instance, **kwargs):
-    # In case the role changes, you might want to handle profile creation/deletion here too
-    # For simplicity, this example assumes role is set at creation and doesn't change
-    # or if it changes, profiles are managed manually or by another process.
-    try:
-        if instance.role == Role.SEEKER and hasattr(instance, 'seekerprofile'):
-            instance.seekerprofile.save()
-        elif instance.role == Role.PROVIDER and hasattr(instance, 'providerprofile'):
-            instance.providerprofile.save()
-    except (SeekerProfile.DoesNotExist, ProviderProfile.DoesNotExist):
-        # If profile was deleted manually and user saved again, recreate it
-        if instance.role == Role.SEEKER:
-            SeekerProfile.objects.get_or_create(user=instance)
-        elif instance.role == Role.PROVIDER:
-            ProviderProfile.objects.get_or_create(user=instance)
\ No newline at end of file
+def save_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not PROFILE_USER_FIELDS & set(update_fields)):
+        return
+    # Profiles store nothing copied from the user, so the only sync is making
+    # sure the profile for the current role exists (e.g. after a role change)
+    if instance.role == Role.SEEKER:
+        SeekerProfile.objects.get_or_create(user=instance)
+    elif instance.role == Role.PROVIDER:
+        ProviderProfile.objects.get_or_create(user=instance)
+
+@receiver(post_save, sender=ProviderProfile)
+def sync_provider_regions(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'location', 'geos_served'} & set(update_fields):
+        return
+    source = instance.coverage_source()
+    if not created and source is not None and source == instance.synced_coverage:
+        return # Full saves that change neither field (tier, services) need no read of the regions
+    instance.synced_coverage = source
+    regions = instance.covered_regions
+    existing = set() if created else set(instance.coverage.values_list('region', flat=True))
+    if regions == existing:
+        return
+    instance.coverage.exclude(region__in=regions).delete()
+    ProviderRegion.objects.bulk_create(
+        [ProviderRegion(provider=instance, region=region) for region in regions - existing],
+        ignore_conflicts=True,
+    )
@@ -1,3 +1,61 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from users.models import User, Role
+from .gazetteer import get_gazetteer
+from .models import ProviderProfile, ProviderRegion
+
+
+class GazetteerTests(TestCase):
+    def setUp(self):
+        self.gazetteer = get_gazetteer()
+
+    def test_spellings_canonicalize_to_one_region(self):
+        for location in ('Metro Manila', 'NCR', 'manila', 'Makati City, Philippines', 'Parañaque'):
+            self.assertEqual(self.gazetteer.canonicalize(location), 'PH-00', location)
+        self.assertEqual(self.gazetteer.canonicalize('Atlantis'), '')
+
+    def test_queries_resolve_by_prefix(self):
+        self.assertEqual(self.gazetteer.resolve('metro man'), {'PH-00'})
+        self.assertEqual(self.gazetteer.resolve('ce'), frozenset())
+
+    def test_profile_save_records_regions(self):
+        user = User.objects.create_user(username='lender', email='lender@example.com', password='pass1234!', role=Role.PROVIDER)
+        profile = user.providerprofile
+        profile.location = 'Makati City'
+        profile.geos_served = ['Cebu City']
+        profile.save()
+        self.assertEqual(profile.region, 'PH-00')
+        regions = set(ProviderRegion.objects.filter(provider=profile).values_list('region', flat=True))
+        self.assertEqual(regions, {'PH-00', 'PH-07'})
+
+        profile.geos_served = []
+        profile.save()
+        self.assertEqual(list(profile.coverage.values_list('region', flat=True)), ['PH-00'])
+
+    def test_saves_that_keep_the_coverage_skip_the_region_sync(self):
+        user = User.objects.create_user(username='lender', email='lender@example.com', password='pass1234!', role=Role.PROVIDER)
+        ProviderProfile.objects.filter(user=user).update(location='Makati City', geos_served=['Cebu City'])
+        profile = ProviderProfile.objects.get(user=user)
+        profile.subscription_tier = ProviderProfile.SubscriptionTier.PREMIUM
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+        self.assertNotIn('profiles_providerregion', ' '.join(query['sql'] for query in queries.captured_queries))
+
+        profile.geos_served.append('Davao City')
+        profile.save()
+        self.assertEqual(set(profile.coverage.values_list('region', flat=True)), {'PH-00', 'PH-07', 'PH-11'})
+
+
+class UserProfileSyncTests(TestCase):
+    def test_last_login_save_skips_profile_sync(self):
+        user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_role_change_creates_missing_profile(self):
+        user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        user.role = Role.PROVIDER
+        user.save(update_fields=['role'])
+        self.assertTrue(ProviderProfile.objects.filter(user=user).exists())
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        import users.authentication # Connects the user cache invalidation
+        import users.last_login # Connects the stale-buffer flush to request_finished
@@ -0,0 +1,178 @@
+"""
+JWT authentication that trusts signed user claims instead of loading the
+user row on every request.
+
+Access tokens carry ``role``, ``is_active`` and ``is_staff`` plus
+``claims_at``, the time they were read from the user (see
+``users.tokens.ClaimsRefreshToken``). ``ClaimsJWTAuthentication`` returns a
+``ClaimsUser`` that answers those attributes from the token and loads the
+full User only when something else is read, from a small in-process TTL
+cache that ``User`` saves evict.
+
+A save that may change a claim stores a revocation marker in the default
+cache for one access token lifetime. Tokens whose claims predate the marker
+are not trusted: their requests get the user as currently stored, and the
+next refresh stamps fresh claims. Other workers only see the marker through
+a shared cache, so with a per-process one (LocMem, the default outside
+``USE_REDIS_CACHE``) claims are never trusted and every request loads the
+user from the database; ``AUTH_TRUST_TOKEN_CLAIMS`` overrides the choice.
+"""
+import copy
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+CLAIMS = ('role', 'is_active', 'is_staff')
+CLAIMS_AT = 'claims_at'
+
+
+def stamp_claims(token, user):
+    for name in CLAIMS:
+        token[name] = getattr(user, name)
+    token[CLAIMS_AT] = int(time.time())
+    return token
+
+
+def _revocation_key(user_id):
+    return f'auth:claims-revoked:{user_id}'
+
+
+def revoke_claims(user_id):
+    """Stop trusting the claims of every token issued to the user so far."""
+    lifetime = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    cache.set(_revocation_key(user_id), time.time(), timeout=int(lifetime) + 1)
+
+
+def claims_revoked_at(user_id):
+    return cache.get(_revocation_key(user_id))
+
+
+def claims_trusted():
+    trusted = getattr(settings, 'AUTH_TRUST_TOKEN_CLAIMS', None)
+    if trusted is None:
+        return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+    return trusted
+
+
+class UserCache:
+    """
+    Users by id for ``AUTH_USER_CACHE_TIMEOUT`` seconds, at most
+    ``AUTH_USER_CACHE_SIZE`` of them. Each process holds its own; ``get``
+    returns a copy, so a request mutating its user never leaks into the next.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 30)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'AUTH_USER_CACHE_SIZE', 1000)
+
+    def get(self, user_id, not_before=None):
+        """The user, loaded again if cached before ``not_before`` (epoch seconds); None if there is none."""
+        entry = self._users.get(user_id)
+        now = time.time()
+        if entry is None or now - entry[0] >= self.timeout or (not_before is not None and entry[0] < not_before):
+            User = get_user_model()
+            user = User._default_manager.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            if user is None:
+                self.evict(user_id)
+                return None
+            entry = self.put(user, now)
+        return copy.copy(entry[1])
+
+    def put(self, user, loaded_at=None):
+        entry = (time.time() if loaded_at is None else loaded_at, copy.copy(user))
+        with self._lock:
+            self._users.pop(user.pk, None)
+            while self._users and len(self._users) >= self.max_size:
+                self._users.pop(next(iter(self._users))) # Oldest insertion first
+            self._users[user.pk] = entry
+        return entry
+
+    def evict(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+def load_user(user_id, not_before=None):
+    user = user_cache.get(user_id, not_before)
+    if user is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    return user
+
+
+class ClaimsUser(SimpleLazyObject):
+    """The request user: claim attributes come from the token, anything else loads the User."""
+
+    def __init__(self, user_id, claims, loader):
+        self.__dict__['_claims'] = {**claims, 'id': user_id, 'pk': user_id, 'is_authenticated': True, 'is_anonymous': False}
+        super().__init__(loader)
+
+    def __getattr__(self, name):
+        if self._wrapped is empty and name in self._claims:
+            return self._claims[name]
+        return super().__getattr__(name)
+
+    def __bool__(self):
+        return True
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not claims_trusted():
+            # Saves on other workers are invisible to this one's user cache too
+            return load_user(user_id, not_before=time.time())
+        revoked_at = claims_revoked_at(user_id)
+        claims_at = validated_token.get(CLAIMS_AT)
+        if claims_at is None or (revoked_at is not None and claims_at < revoked_at):
+            # Tokens from before claims, or whose claims may be stale
+            return load_user(user_id, revoked_at)
+        if not validated_token['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return ClaimsUser(user_id, {name: validated_token[name] for name in CLAIMS}, partial(load_user, user_id, revoked_at))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, created, update_fields=None, **kwargs):
+    user_cache.evict(instance.pk)
+    if not created and (update_fields is None or set(CLAIMS) & set(update_fields)):
+        revoke_claims(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_deleted_user(sender, instance, **kwargs):
+    user_cache.evict(instance.pk)
+    revoke_claims(instance.pk)
@@ -0,0 +1,100 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished
+from django.db import DatabaseError
+from django.dispatch import receiver
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """
+    Write-behind buffer for ``User.last_login``. Logins only note the user id
+    and time in-process; repeated logins of the same user coalesce into one
+    entry. The buffer is written with one ``bulk_update`` once it holds
+    ``LAST_LOGIN_BUFFER_SIZE`` users or its oldest entry is older than
+    ``LAST_LOGIN_BUFFER_MAX_AGE`` seconds, checked on every login and after
+    every request, and at interpreter exit.
+
+    ``bulk_update`` sends no ``post_save``, so a login never runs the User
+    receivers. A crashed process loses at most ``max_age`` seconds of
+    ``last_login`` values, which only ever lag behind.
+    """
+
+    def __init__(self, max_size=None, max_age=None):
+        self._max_size = max_size
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._oldest = None
+
+    @property
+    def max_size(self):
+        if self._max_size is None:
+            return getattr(settings, 'LAST_LOGIN_BUFFER_SIZE', 200)
+        return self._max_size
+
+    @property
+    def max_age(self):
+        if self._max_age is None:
+            return getattr(settings, 'LAST_LOGIN_BUFFER_MAX_AGE', 30.0)
+        return self._max_age
+
+    def touch(self, user, when=None):
+        """Record a login of ``user``; its in-memory ``last_login`` is updated right away."""
+        user.last_login = when or timezone.now()
+        if self.max_size <= 1:
+            get_user_model().objects.filter(pk=user.pk).update(last_login=user.last_login)
+            return
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending[user.pk] = user.last_login
+            due = len(self._pending) >= self.max_size
+        if due or self.is_stale():
+            self.flush()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def is_stale(self):
+        oldest = self._oldest
+        return bool(self._pending) and oldest is not None and time.monotonic() - oldest >= self.max_age
+
+    def flush(self):
+        """Write every buffered login now; returns the number of users updated."""
+        with self._lock:
+            pending, self._pending, self._oldest = self._pending, {}, None
+        if not pending:
+            return 0
+        User = get_user_model()
+        try:
+            return User.objects.bulk_update(
+                [User(pk=pk, last_login=when) for pk, when in pending.items()], ['last_login'], batch_size=500,
+            )
+        except DatabaseError:
+            logger.exception("Dropping last_login of %d users", len(pending))
+            return 0
+
+    def clear(self):
+        """Drop every buffered login without writing it; returns how many were dropped. For tests."""
+        with self._lock:
+            dropped, self._pending, self._oldest = len(self._pending), {}, None
+        return dropped
+
+
+last_login_buffer = LastLoginBuffer()
+atexit.register(last_login_buffer.flush)
+
+
+@receiver(request_finished)
+def flush_stale_last_logins(sender, **kwargs):
+    if last_login_buffer.is_stale():
+        last_login_buffer.flush()
@@ -0,0 +1,93 @@
+import statistics
+import time
+
+from django.contrib.auth.models import update_last_login
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from users.last_login import last_login_buffer
+from users.models import User, Role
+
+PASSWORD = 'bench-login-pass'
+
+
+def _legacy_profile_save(sender, instance, **kwargs):
+    """What profiles.signals.save_user_profile did on every User save."""
+    if instance.role == Role.SEEKER:
+        instance.seekerprofile.save()
+    elif instance.role == Role.PROVIDER:
+        instance.providerprofile.save()
+
+
+class SavePerLoginSerializer(TokenObtainPairSerializer):
+    """The stock ``UPDATE_LAST_LOGIN`` behaviour: one User save per login."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        update_last_login(None, self.user)
+        return data
+
+
+class Command(BaseCommand):
+    help = (
+        "Log throwaway users in through the token endpoint and report queries "
+        "and latency per login: a User save per login with the profile sync on "
+        "every save (the previous behaviour), a User save per login with the "
+        "filtered profile sync, and the write-behind last_login buffer. "
+        "Password hashing costs the same in every mode and is swapped for MD5 "
+        "so the database share stays visible. Runs inside a transaction that "
+        "is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--logins', type=int, default=500)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        save_view = TokenObtainPairView.as_view(serializer_class=SavePerLoginSerializer)
+        buffered_view = TokenObtainPairView.as_view(_serializer_class='users.serializers.LoginSerializer')
+
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']), transaction.atomic():
+            users = [
+                User.objects.create_user(
+                    username=f'bench-login-{i}', email=f'bench-login-{i}@example.invalid', password=PASSWORD,
+                    role=Role.PROVIDER if i % 2 else Role.SEEKER,
+                )
+                for i in range(options['users'])
+            ]
+            emails = [users[n % len(users)].email for n in range(options['logins'])]
+
+            post_save.connect(_legacy_profile_save, sender=User, dispatch_uid='bench_login_legacy')
+            try:
+                self._run('save + profile sync', factory, save_view, emails)
+            finally:
+                post_save.disconnect(sender=User, dispatch_uid='bench_login_legacy')
+            self._run('save, filtered sync', factory, save_view, emails)
+
+            last_login_buffer.flush()
+            self._run('write-behind buffer', factory, buffered_view, emails, after=last_login_buffer.flush)
+            transaction.set_rollback(True)
+
+    def _run(self, label, factory, view, emails, after=None):
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for email in emails:
+                request = factory.post('/', {'email': email, 'password': PASSWORD}, format='json')
+                started = time.perf_counter()
+                response = view(request)
+                timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    self.stderr.write(f"{email}: HTTP {response.status_code} {response.data}")
+            if after is not None:
+                after() # The bulk writes of the buffer count towards the logins
+        self.stdout.write(
+            f"{label:<21} {len(queries.captured_queries) / len(emails):5.2f} queries/login, "
+            f"p50 {statistics.median(timings) * 1e3:.2f} ms, total {sum(timings):.2f}s for {len(emails)} logins"
+        )
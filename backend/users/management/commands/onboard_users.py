@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.onboarding import OnboardingStats, onboard, read_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Create seekers and providers from a CSV file (see users.onboarding for "
+        "the columns), streamed in chunks with bulk inserts and passwords hashed "
+        "in a process pool. Invalid rows are skipped and reported by line. "
+        "Rows without a password get a set-password invite with --invite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Path, or - for standard input")
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=None, help="Hashing processes (default: one per CPU)")
+        parser.add_argument('--invite', action='store_true')
+
+    def handle(self, *args, **options):
+        stats = OnboardingStats()
+        try:
+            if options['csv_file'] == '-':
+                self._onboard(sys.stdin, options, stats)
+            else:
+                with open(options['csv_file'], newline='', encoding='utf-8-sig') as handle:
+                    self._onboard(handle, options, stats)
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+        for error in stats.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        if stats.error_count > len(stats.errors):
+            self.stderr.write(f"... and {stats.error_count - len(stats.errors)} more")
+        self.stdout.write(str(stats))
+
+    @staticmethod
+    def _onboard(handle, options, stats):
+        onboard(read_csv(handle), chunk_size=options['chunk_size'], workers=options['workers'],
+                invite=options['invite'], stats=stats)
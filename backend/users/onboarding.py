@@ -0,0 +1,270 @@
+"""
+Bulk onboarding of seekers and providers from CSV.
+
+Rows are read as a stream and handled in chunks. Each chunk is validated,
+its passwords are hashed in a process pool, and its users, profiles,
+provider regions and "User registered" audit rows are written with
+``bulk_create`` in one transaction. None of the per-row ``post_save``
+receivers run, so what they would have done is done here once: the
+provider index and match cache are invalidated and match alerts are
+recorded for every new provider in a single call.
+
+Rows without a password get an unusable one; with ``invite`` those users
+are emailed a link to set it (``users.views.SetPasswordView``).
+
+Columns: email, username, first_name, last_name, role (SEEKER or PROVIDER),
+password, consent_given, company_name, location, industry (seekers),
+service_types and geos_served (providers, separated by ``;``). Only email
+and role are required; username defaults to the email.
+"""
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework import serializers
+
+from core.models import AuditLog
+from core.utils.email import send_password_invite_email
+from profiles.gazetteer import get_gazetteer
+from profiles.models import ProviderProfile, ProviderRegion, SeekerProfile
+from .models import User, Role
+
+REQUIRED_COLUMNS = ('email', 'role')
+MAX_ERRORS = 100 # Kept in the report; later ones are only counted
+
+
+class ListField(serializers.Field):
+    """``a; b; c`` in a CSV cell as a list of non-empty strings."""
+
+    def to_internal_value(self, data):
+        return [item.strip() for item in (data or '').split(';') if item.strip()]
+
+
+class OnboardingRowSerializer(serializers.Serializer):
+    email = serializers.EmailField(max_length=254)
+    username = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    role = serializers.ChoiceField(choices=[Role.SEEKER, Role.PROVIDER])
+    password = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False)
+    consent_given = serializers.BooleanField(required=False, default=False)
+    company_name = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    location = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    industry = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    service_types = ListField(required=False, default=list)
+    geos_served = ListField(required=False, default=list)
+
+    def to_internal_value(self, data):
+        # Empty cells count as absent
+        return super().to_internal_value({key: value for key, value in data.items() if key and value not in (None, '')})
+
+
+class OnboardingStats:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.invited = 0
+        self.errors = []
+        self.error_count = 0
+        self.started = time.monotonic()
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'rows': self.rows, 'created': self.created, 'invited': self.invited, 'skipped': self.error_count,
+            'errors': self.errors, 'elapsed': round(self.elapsed, 3), 'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+    def __str__(self):
+        return (
+            f"{self.created} of {self.rows} rows onboarded, {self.error_count} skipped, {self.invited} invited "
+            f"in {self.elapsed:.1f}s ({self.rows_per_second:,.0f} rows/s)"
+        )
+
+
+def read_csv(text_stream):
+    """Yield ``(line number, row dict)``; raises ValueError when a required column is missing."""
+    reader = csv.DictReader(text_stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _validate(chunk, stats, seen):
+    """Valid rows of ``chunk`` as ``(line, data)``; invalid and duplicate rows are recorded in ``stats``."""
+    valid = []
+    for line, row in chunk:
+        serializer = OnboardingRowSerializer(data=row)
+        if not serializer.is_valid():
+            stats.error(line, '; '.join(f'{field}: {" ".join(map(str, errors))}' for field, errors in serializer.errors.items()))
+            continue
+        data = serializer.validated_data
+        data['email'] = User.objects.normalize_email(data['email'])
+        data['username'] = data.get('username') or data['email']
+        try:
+            # Also checks an email used as the username against its length and characters
+            User._meta.get_field('username').run_validators(data['username'])
+        except ValidationError as exc:
+            stats.error(line, f"username: {' '.join(exc.messages)}")
+            continue
+        keys = (data['email'].lower(), data['username'])
+        if seen & set(keys):
+            stats.error(line, "Duplicate email or username in the file")
+            continue
+        seen.update(keys)
+        valid.append((line, data))
+
+    taken_emails = set(User.objects.filter(email__in=[data['email'] for _, data in valid]).values_list('email', flat=True))
+    taken_usernames = set(User.objects.filter(username__in=[data['username'] for _, data in valid]).values_list('username', flat=True))
+    kept = []
+    for line, data in valid:
+        if data['email'] in taken_emails or data['username'] in taken_usernames:
+            stats.error(line, "A user with this email or username already exists")
+        else:
+            kept.append((line, data))
+    return kept
+
+
+def _hash_passwords(rows, pool, workers):
+    passwords = [data.get('password') for _, data in rows]
+    to_hash = [password for password in passwords if password]
+    if pool is not None and len(to_hash) > 1:
+        hashed = iter(pool.map(make_password, to_hash, chunksize=max(1, len(to_hash) // (workers * 4))))
+    else:
+        hashed = iter(map(make_password, to_hash))
+    return [next(hashed) if password else make_password(None) for password in passwords]
+
+
+def _write_chunk(rows, hashes, actor, ip_address):
+    gazetteer = get_gazetteer()
+    users = [
+        User(
+            email=data['email'], username=data['username'], password=password,
+            first_name=data.get('first_name', ''), last_name=data.get('last_name', ''),
+            role=data['role'], consent_given=data['consent_given'],
+        )
+        for (_, data), password in zip(rows, hashes)
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        seekers, providers = [], []
+        for user, (_, data) in zip(users, rows):
+            common = {
+                'user': user, 'company_name': data.get('company_name', ''), 'location': data.get('location', ''),
+                'region': gazetteer.canonicalize(data.get('location', '')),
+            }
+            if user.role == Role.SEEKER:
+                seekers.append(SeekerProfile(industry=data.get('industry', ''), **common))
+            else:
+                providers.append(ProviderProfile(service_types=data['service_types'], geos_served=data['geos_served'], **common))
+        SeekerProfile.objects.bulk_create(seekers)
+        ProviderProfile.objects.bulk_create(providers)
+        ProviderRegion.objects.bulk_create([
+            ProviderRegion(provider=provider, region=region)
+            for provider in providers for region in provider.covered_regions
+        ])
+        user_type = ContentType.objects.get_for_model(User)
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                user=user, action="User registered", ip_address=ip_address,
+                target_content_type=user_type, target_object_id=user.pk,
+                details={'source': 'bulk onboarding', 'onboarded_by': getattr(actor, 'pk', None)},
+            )
+            for user in users
+        ])
+    return users, providers
+
+
+def _write_each(rows, hashes, actor, ip_address, stats):
+    """
+    Write a chunk the database refused as a whole one row at a time, so only
+    the offending rows are skipped: a user created meanwhile by a signup, or a
+    value the serializer let through that a column cannot hold.
+    """
+    users, providers = [], []
+    for row, password in zip(rows, hashes):
+        try:
+            written_users, written_providers = _write_chunk([row], [password], actor, ip_address)
+        except IntegrityError:
+            stats.error(row[0], "A user with this email or username already exists")
+            continue
+        except DataError:
+            stats.error(row[0], "A value is too long or invalid for its column")
+            continue
+        users.extend(written_users)
+        providers.extend(written_providers)
+    return users, providers
+
+
+def _send_invites(users, stats):
+    for user in users:
+        if user.has_usable_password():
+            continue
+        uid = urlsafe_base64_encode(force_bytes(user.pk))
+        if send_password_invite_email(user.email, user.first_name or user.username, uid, default_token_generator.make_token(user)):
+            stats.invited += 1
+
+
+def onboard(rows, chunk_size=500, workers=None, invite=False, actor=None, ip_address=None, stats=None):
+    """
+    Create users and profiles for ``rows`` (``(line, dict)`` pairs as from
+    ``read_csv``). Invalid rows are skipped and reported; each chunk commits
+    on its own. ``workers`` processes hash passwords (1 hashes in-process,
+    None uses one per CPU). Returns the OnboardingStats.
+    """
+    # Imported here: matching depends on users, not the other way around
+    from matching.alerts import record_match_alerts
+    from matching.cache import match_cache
+    from matching.index import ProviderIndex, provider_index
+
+    stats = stats or OnboardingStats()
+    seen, entries = set(), []
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        rows = iter(rows)
+        while chunk := list(islice(rows, chunk_size)):
+            stats.rows += len(chunk)
+            valid = _validate(chunk, stats, seen)
+            if not valid:
+                continue
+            hashes = _hash_passwords(valid, pool, workers)
+            try:
+                users, providers = _write_chunk(valid, hashes, actor, ip_address)
+            except (IntegrityError, DataError):
+                users, providers = _write_each(valid, hashes, actor, ip_address, stats)
+            stats.created += len(users)
+            entries.extend(ProviderIndex.entry_for(provider) for provider in providers)
+            if invite:
+                _send_invites(users, stats)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if entries:
+            provider_index.invalidate() # bulk_create bypasses the index signals
+            match_cache.invalidate_provider(None, None, known=False)
+            record_match_alerts(entries)
+    return stats
@@ -1,5 +1,14 @@
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenBlacklistSerializer, TokenObtainPairSerializer, TokenRefreshSerializer
+from .authentication import user_cache
+from .last_login import last_login_buffer
 from .models import User, Role
+from .tokens import ClaimsRefreshToken
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
@@ -37,4 +46,58 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 class UserDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'role', 'date_joined')
\ No newline at end of file
+        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'role', 'date_joined')
+
+class SetPasswordSerializer(serializers.Serializer):
+    """First password of an invited account, from the uid and token in the invite link."""
+    uid = serializers.CharField()
+    token = serializers.CharField()
+    password = serializers.CharField(write_only=True, style={'input_type': 'password'})
+
+    def validate(self, attrs):
+        try:
+            user = User.objects.get(pk=force_str(urlsafe_base64_decode(attrs['uid'])))
+        except (User.DoesNotExist, ValueError, TypeError, OverflowError):
+            user = None
+        if user is None or not default_token_generator.check_token(user, attrs['token']):
+            raise serializers.ValidationError({"token": "Invalid or expired link."})
+        try:
+            validate_password(attrs['password'], user)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({"password": list(exc.messages)})
+        attrs['user'] = user
+        return attrs
+
+    def save(self):
+        user = self.validated_data['user']
+        user.set_password(self.validated_data['password'])
+        user.save(update_fields=['password'])
+        return user
+
+
+class BulkOnboardingSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    invite = serializers.BooleanField(default=False)
+    chunk_size = serializers.IntegerField(default=500, min_value=1, max_value=5000)
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    """
+    Token pair login that records ``last_login`` through the write-behind
+    buffer instead of saving the user, and issues tokens with user claims.
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        last_login_buffer.touch(self.user)
+        user_cache.put(self.user) # The first authenticated requests need no lookup
+        return data
+
+
+class RefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class LogoutSerializer(TokenBlacklistSerializer):
+    token_class = ClaimsRefreshToken
@@ -1,3 +1,282 @@
-from django.test import TestCase
+import io
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import AuditLog
+from core.utils.email import send_password_invite_email
+from matching.alerts import saved_search_index
+from matching.index import provider_index
+from matching.models import MatchAlert, SavedSearch
+
+from .authentication import ClaimsJWTAuthentication, user_cache
+from .last_login import LastLoginBuffer, last_login_buffer
+from .models import User, Role
+from . import onboarding
+from .onboarding import onboard, read_csv
+from .tokens import ClaimsRefreshToken, token_blacklist
+
+
+class LastLoginBufferTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='pass1234!')
+            for i in range(3)
+        ]
+
+    def test_logins_coalesce_into_one_bulk_update(self):
+        buffer = LastLoginBuffer(max_size=10, max_age=60)
+        with self.assertNumQueries(0):
+            for user in self.users + self.users:
+                buffer.touch(user)
+        self.assertEqual(buffer.pending, 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(buffer.flush(), 3)
+        for user in self.users:
+            self.assertEqual(User.objects.get(pk=user.pk).last_login, user.last_login)
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_flushes_when_full_or_stale(self):
+        buffer = LastLoginBuffer(max_size=2, max_age=60)
+        buffer.touch(self.users[0])
+        buffer.touch(self.users[1])
+        self.assertEqual(buffer.pending, 0)
+        self.assertIsNotNone(User.objects.get(pk=self.users[1].pk).last_login)
+
+        buffer = LastLoginBuffer(max_size=10, max_age=0)
+        buffer.touch(self.users[2])
+        self.assertEqual(buffer.pending, 0)
+
+    def test_clear_drops_pending_logins(self):
+        buffer = LastLoginBuffer(max_size=10, max_age=60)
+        buffer.touch(self.users[0])
+        self.assertEqual(buffer.clear(), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertIsNone(User.objects.get(pk=self.users[0].pk).last_login)
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        # The buffer is process-wide: start empty and leave nothing for a later test to flush
+        last_login_buffer.clear()
+        self.addCleanup(last_login_buffer.clear)
+
+    def test_login_does_not_save_the_user(self):
+        user = User.objects.create_user(username='lender', email='lender@example.com', password='pass1234!', role=Role.PROVIDER)
+        # The user lookup only: no last_login UPDATE, no profile save
+        with self.assertNumQueries(1):
+            response = APIClient().post(reverse('token_obtain_pair'), {'email': user.email, 'password': 'pass1234!'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+        self.assertEqual(last_login_buffer.pending, 1)
+        last_login_buffer.flush()
+        self.assertIsNotNone(User.objects.get(pk=user.pk).last_login)
+
+
+@override_settings(AUTH_TRUST_TOKEN_CLAIMS=True) # As with a shared cache; the fallback is tested below
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        last_login_buffer.clear()
+        self.addCleanup(last_login_buffer.clear)
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.client = APIClient()
+        response = self.client.post(reverse('token_obtain_pair'), {'email': self.user.email, 'password': 'pass1234!'}, format='json')
+        self.tokens = response.data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        last_login_buffer.flush()
+
+    def test_access_token_carries_claims(self):
+        token = AccessToken(self.tokens['access'])
+        self.assertEqual((token['role'], token['is_active'], token['is_staff']), (Role.SEEKER, True, False))
+
+    def test_authenticated_requests_need_no_user_query(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('user_me'))
+        self.assertEqual(response.data['email'], self.user.email)
+
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        user_cache.clear()
+        with self.assertNumQueries(0):
+            user, _ = ClaimsJWTAuthentication().authenticate(request)
+            self.assertEqual((user.pk, user.role, user.is_staff), (self.user.pk, Role.SEEKER, False))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, self.user.email) # Anything beyond the claims loads the user
+
+    @override_settings(AUTH_TRUST_TOKEN_CLAIMS=None)
+    def test_claims_are_not_trusted_without_a_shared_cache(self):
+        # The test cache is LocMem: a revocation stored by another worker would never be seen here
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        with self.assertNumQueries(1):
+            user, _ = ClaimsJWTAuthentication().authenticate(request)
+        self.assertEqual(user.email, self.user.email)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False, role=Role.PROVIDER) # e.g. saved by another worker
+        with self.assertRaises(AuthenticationFailed):
+            ClaimsJWTAuthentication().authenticate(request)
+
+    def test_role_change_revokes_claims_until_refresh(self):
+        self.user.role = Role.PROVIDER
+        self.user.save()
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        self.assertEqual(user.role, Role.PROVIDER)
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(AccessToken(response.data['access'])['role'], Role.PROVIDER)
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        self.assertEqual(self.client.get(reverse('user_me')).status_code, 401)
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class RefreshTokenBlacklistTests(TestCase):
+    def setUp(self):
+        last_login_buffer.clear()
+        self.addCleanup(last_login_buffer.clear)
+        cache.clear()
+        user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        self.client = APIClient()
+        self.refresh = self.client.post(reverse('token_obtain_pair'), {'email': user.email, 'password': 'pass1234!'}, format='json').data['refresh']
+        last_login_buffer.flush()
+
+    def test_rotated_token_cannot_be_reused(self):
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], self.refresh)
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_blacklists_the_token(self):
+        self.assertEqual(self.client.post(reverse('token_blacklist'), {'refresh': self.refresh}, format='json').status_code, 200)
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_entries_expire_with_the_token(self):
+        jti = ClaimsRefreshToken(self.refresh)['jti']
+        with mock.patch.object(token_blacklist.cache, 'add', wraps=token_blacklist.cache.add) as add:
+            self.assertTrue(token_blacklist.add(jti, time.time() + 60))
+            self.assertFalse(token_blacklist.add(jti, time.time() + 60))
+        self.assertEqual(add.call_args.kwargs['timeout'], 60)
+        self.assertIn(jti, token_blacklist)
+        self.assertTrue(token_blacklist.add('expired', time.time() - 1))
+        self.assertNotIn('expired', token_blacklist)
+
+
+ONBOARDING_CSV = """email,username,first_name,role,password,company_name,location,industry,service_types,geos_served
+seeker1@example.com,,Ana,SEEKER,pass1234!,Ana Trading,Makati City,Retail,,
+lender1@example.com,lender1,,PROVIDER,,First Lender,Makati City,,Term Loan; Trade Finance,Cebu City
+not-an-email,,,SEEKER,,,,,,
+existing@example.com,,,SEEKER,,,,,,
+seeker1@example.com,other,,SEEKER,,,,,,
+"""
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class OnboardingTests(TestCase):
+    def setUp(self):
+        provider_index.reset()
+        saved_search_index.reset()
+        cache.clear()
+        User.objects.create_user(username='existing', email='existing@example.com', password='pass1234!')
+        self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='pass1234!', role=Role.ADMIN, is_staff=True)
+
+    def test_rows_are_bulk_created_without_per_row_signals(self):
+        seeker = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass1234!', role=Role.SEEKER)
+        search = SavedSearch.objects.create(seeker=seeker.seekerprofile, industry='loan', location='NCR')
+        provider_index.search() # build
+
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=User, dispatch_uid='onboarding-test')
+        try:
+            stats = onboard(read_csv(io.StringIO(ONBOARDING_CSV)), chunk_size=2, workers=1)
+        finally:
+            post_save.disconnect(sender=User, dispatch_uid='onboarding-test')
+        receiver.assert_not_called()
+        self.assertEqual((stats.rows, stats.created, stats.error_count), (5, 2, 3))
+        self.assertEqual([error['line'] for error in stats.errors], [4, 5, 6])
+
+        ana = User.objects.get(email='seeker1@example.com')
+        self.assertEqual((ana.username, ana.first_name, ana.role), ('seeker1@example.com', 'Ana', Role.SEEKER))
+        self.assertTrue(ana.check_password('pass1234!'))
+        self.assertEqual((ana.seekerprofile.industry, ana.seekerprofile.region), ('Retail', 'PH-00'))
+
+        lender = User.objects.get(username='lender1')
+        self.assertFalse(lender.has_usable_password())
+        profile = lender.providerprofile
+        self.assertEqual(profile.service_types, ['Term Loan', 'Trade Finance'])
+        self.assertEqual(set(profile.coverage.values_list('region', flat=True)), {'PH-00', 'PH-07'})
+        self.assertEqual(AuditLog.objects.filter(action="User registered", target_object_id__in=[str(ana.pk), str(lender.pk)]).count(), 2)
+        # What the skipped receivers would have done
+        self.assertFalse(provider_index.built)
+        self.assertEqual(provider_index.search(industry='trade finance'), [profile.pk])
+        self.assertTrue(MatchAlert.objects.filter(saved_search=search, provider=profile).exists())
+
+    def test_rows_the_database_refuses_are_skipped_one_by_one(self):
+        long_email = f"{'a' * 150}@example.com"
+        rows = ONBOARDING_CSV + f"{long_email},,,SEEKER,,,,,,\n"
+        real_validate = onboarding._validate
+
+        def validate_then_race(chunk, stats, seen):
+            valid = real_validate(chunk, stats, seen)
+            # A signup between the checks and the insert
+            User.objects.create_user(username='racer', email='seeker1@example.com', password='pass1234!')
+            return valid
+
+        with mock.patch('users.onboarding._validate', side_effect=validate_then_race):
+            stats = onboard(read_csv(io.StringIO(rows)), workers=1)
+        self.assertEqual((stats.rows, stats.created, stats.error_count), (6, 1, 5))
+        errors = {error['line']: error['error'] for error in stats.errors}
+        self.assertIn('username', errors[7])
+        self.assertEqual(errors[2], "A user with this email or username already exists")
+        self.assertTrue(User.objects.filter(username='lender1').exists())
+
+    def test_invited_user_sets_password(self):
+        with mock.patch('users.onboarding.send_password_invite_email', return_value=True) as send:
+            stats = onboard(read_csv(io.StringIO(ONBOARDING_CSV)), workers=1, invite=True)
+        self.assertEqual(stats.invited, 1)
+        email, _, uid, token = send.call_args.args
+        self.assertEqual(email, 'lender1@example.com')
+        with mock.patch('core.utils.email.send_email', return_value=True) as send_email:
+            send_password_invite_email(email, '<i>Lender</i>', uid, token)
+        html = send_email.call_args.args[2]
+        self.assertIn('&lt;i&gt;Lender&lt;/i&gt;', html)
+        self.assertIn(f'{settings.SITE_URL}/set-password/{uid}/{token}', html)
+
+        client = APIClient()
+        response = client.post(reverse('set_password'), {'uid': uid, 'token': token, 'password': 'a-long-new-passphrase'}, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue(User.objects.get(email=email).check_password('a-long-new-passphrase'))
+        response = client.post(reverse('set_password'), {'uid': uid, 'token': token, 'password': 'another-passphrase'}, format='json')
+        self.assertEqual(response.status_code, 400) # The token is single use
+
+    def test_staff_upload(self):
+        client = APIClient()
+        upload = SimpleUploadedFile('people.csv', ONBOARDING_CSV.encode(), content_type='text/csv')
+        client.force_authenticate(User.objects.get(email='existing@example.com'))
+        self.assertEqual(client.post(reverse('bulk_onboarding'), {'file': upload}).status_code, 403)
+
+        client.force_authenticate(self.staff)
+        upload.seek(0)
+        response = client.post(reverse('bulk_onboarding'), {'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['skipped']), (2, 3))
+        self.assertIn('rows_per_second', response.data)
+
+        bad = SimpleUploadedFile('people.csv', b'name,role\nx,SEEKER\n', content_type='text/csv')
+        self.assertEqual(client.post(reverse('bulk_onboarding'), {'file': bad}).status_code, 400)
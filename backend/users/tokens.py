@@ -0,0 +1,75 @@
+"""
+Refresh tokens with user claims and a cache-backed blacklist.
+
+The blacklist keeps one cache key per blacklisted ``jti`` that expires with
+the token, in the ``TOKEN_BLACKLIST_CACHE`` alias. Checking a token is one
+cache read and blacklisting it one ``cache.add``, however many tokens were
+ever issued; nothing is written for tokens that are never revoked. Because
+``add`` only succeeds for the first caller, a refresh token used twice at
+the same time rotates once and the second request is refused.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import claims_revoked_at, load_user, stamp_claims
+
+
+class RefreshTokenBlacklist:
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'TOKEN_BLACKLIST_CACHE', 'default')]
+
+    @staticmethod
+    def _key(jti):
+        return f'auth:refresh-blacklist:{jti}'
+
+    def add(self, jti, exp):
+        """Blacklist ``jti`` until ``exp`` (epoch seconds); False if it already was."""
+        timeout = math.ceil(exp - time.time())
+        if timeout <= 0:
+            return True # Expired tokens are refused anyway
+        return self.cache.add(self._key(jti), 1, timeout=timeout)
+
+    def __contains__(self, jti):
+        return self.cache.get(self._key(jti)) is not None
+
+
+token_blacklist = RefreshTokenBlacklist()
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the user claims read by ``ClaimsJWTAuthentication``."""
+
+    @classmethod
+    def for_user(cls, user):
+        return stamp_claims(super().for_user(user), user)
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in token_blacklist:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        if not token_blacklist.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError(_("Token is blacklisted"))
+
+    @property
+    def access_token(self):
+        if self.token is not None:
+            # A refresh: read the claims again, so changes reach the new access token
+            user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+            try:
+                stamp_claims(self, load_user(user_id, claims_revoked_at(user_id)))
+            except AuthenticationFailed:
+                raise TokenError(_("User is inactive or no longer exists"))
+        return super().access_token
@@ -1,10 +1,13 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import UserRegistrationView, UserMeView
+from rest_framework_simplejwt.views import TokenBlacklistView, TokenRefreshView
+from .views import UserRegistrationView, UserMeView, LoginView, SetPasswordView, BulkOnboardingView
 
 urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='user_register'),
-    path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'), # Default JWT login
+    path('login/', LoginView.as_view(), name='token_obtain_pair'), # Throttled JWT login
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'), # Default JWT refresh
+    path('logout/', TokenBlacklistView.as_view(), name='token_blacklist'), # Blacklists the refresh token
     path('me/', UserMeView.as_view(), name='user_me'),
+    path('password/set/', SetPasswordView.as_view(), name='set_password'),
+    path('onboard/', BulkOnboardingView.as_view(), name='bulk_onboarding'), # Staff CSV import
 ]
\ No newline at end of file
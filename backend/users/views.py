@@ -1,8 +1,16 @@
+import io
+
+from django.conf import settings
 from rest_framework import generics, permissions, status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .serializers import UserRegistrationSerializer, UserDetailSerializer
+from .onboarding import onboard, read_csv
+from .serializers import UserRegistrationSerializer, UserDetailSerializer, SetPasswordSerializer, BulkOnboardingSerializer
 from .models import User
+from core.auditing_receivers import get_client_ip
+from core.throttling import FailedLoginThrottle, IPThrottle
 from core.signals import user_registered # Import audit signal
 
 # Custom permission classes (examples)
@@ -22,6 +30,8 @@ class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny] # Anyone can register
+    throttle_classes = [IPThrottle]
+    throttle_scope = 'register'
 
     def perform_create(self, serializer):
         user = serializer.save()
@@ -44,9 +54,49 @@ class UserMeView(generics.RetrieveUpdateAPIView):
     #     serializer.save()
 
 
-# You can customize TokenObtainPairView if needed, e.g., to add user role to token payload
-# class MyTokenObtainPairView(TokenObtainPairView):
-#     pass
+class SetPasswordView(generics.GenericAPIView):
+    """Sets the first password of an invited account (see users.onboarding)."""
+    serializer_class = SetPasswordSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BulkOnboardingView(APIView):
+    """
+    Staff upload of a CSV of seekers and providers (multipart ``file``).
+    The file is streamed through users.onboarding in chunks; the response
+    reports the rows created and skipped, with the first errors by line.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        params = BulkOnboardingSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        text = io.TextIOWrapper(params.validated_data['file'], encoding='utf-8-sig', newline='')
+        try:
+            stats = onboard(
+                read_csv(text),
+                chunk_size=params.validated_data['chunk_size'],
+                workers=getattr(settings, 'ONBOARDING_HASH_WORKERS', None),
+                invite=params.validated_data['invite'],
+                actor=request.user,
+                ip_address=get_client_ip(request),
+            )
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({'file': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats.as_dict(), status=status.HTTP_201_CREATED if stats.created else status.HTTP_200_OK)
+
+
+class LoginView(TokenObtainPairView):
+    """JWT login, throttled per IP and on recent failures per IP and account (see core.throttling)."""
+    throttle_classes = [IPThrottle, FailedLoginThrottle]
+    throttle_scope = 'login'
 
 # class MyTokenRefreshView(TokenRefreshView):
 #     pass
\ No newline at end of file